@@ -13,6 +13,14 @@ from app.core.config import settings
 from app.models.user import User
 from app.models.call import Call
 from app.models.inbound_config import InboundConfig
+from app.models.campaign import Campaign
+from app.models.analysis_job import AnalysisJob
+from app.models.call_stats import CallStatsDaily
+from app.models.analysis_cache import AnalysisCacheEntry
+from app.models.reanalysis_run import ReanalysisRun
+from app.models.transcript_ingest import TranscriptIngestEntry
+from app.models.call_turn import CallTurn
+from app.models.prompt_template import PromptTemplate
 
 config = context.config
 
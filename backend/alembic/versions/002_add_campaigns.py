@@ -0,0 +1,65 @@
+"""Add campaigns table and campaign columns to calls table
+
+Revision ID: 002_add_campaigns
+Revises: 001_add_voice_settings
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002_add_campaigns'
+down_revision = '001_add_voice_settings'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # New call status for numbers waiting for a dialer slot
+    op.execute("ALTER TYPE callstatus ADD VALUE IF NOT EXISTS 'QUEUED'")
+
+    op.create_table(
+        'campaigns',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('language', sa.String(), nullable=False),
+        sa.Column('tts_provider', sa.String(), nullable=False),
+        sa.Column('voice', sa.String(), nullable=False),
+        sa.Column('greeting_message', sa.Text(), nullable=False),
+        sa.Column('prompt', sa.Text(), nullable=False),
+        sa.Column('funnel_goal', sa.Text(), nullable=False),
+        sa.Column('stability', sa.Float(), nullable=True),
+        sa.Column('speed', sa.Float(), nullable=True),
+        sa.Column('similarity_boost', sa.Float(), nullable=True),
+        sa.Column('max_concurrent_calls', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('DRAFT', 'RUNNING', 'PAUSED', 'COMPLETED', 'CANCELLED', name='campaignstatus'),
+            nullable=False
+        ),
+        sa.Column('total_calls', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_campaigns_id', 'campaigns', ['id'])
+
+    op.add_column('calls', sa.Column('campaign_id', sa.Integer(), nullable=True))
+    op.add_column('calls', sa.Column('dialed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_foreign_key(
+        'calls_campaign_id_fkey', 'calls', 'campaigns', ['campaign_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index('ix_calls_campaign_id', 'calls', ['campaign_id'])
+
+
+def downgrade():
+    op.drop_index('ix_calls_campaign_id', table_name='calls')
+    op.drop_constraint('calls_campaign_id_fkey', 'calls', type_='foreignkey')
+    op.drop_column('calls', 'dialed_at')
+    op.drop_column('calls', 'campaign_id')
+    op.drop_index('ix_campaigns_id', table_name='campaigns')
+    op.drop_table('campaigns')
+    op.execute("DROP TYPE IF EXISTS campaignstatus")
+    # Postgres cannot drop a single enum value; 'QUEUED' stays in callstatus
@@ -0,0 +1,46 @@
+"""Add analysis_jobs table for the durable analysis queue
+
+Revision ID: 003_add_analysis_jobs
+Revises: 002_add_campaigns
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003_add_analysis_jobs'
+down_revision = '002_add_campaigns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analysis_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('call_id', sa.Integer(), sa.ForeignKey('calls.id', ondelete='CASCADE'), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'RUNNING', 'DONE', 'FAILED', name='jobstatus'),
+            nullable=False
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_analysis_jobs_id', 'analysis_jobs', ['id'])
+    op.create_index('ix_analysis_jobs_call_id', 'analysis_jobs', ['call_id'])
+    op.create_index('ix_analysis_jobs_status_run_after', 'analysis_jobs', ['status', 'run_after'])
+
+
+def downgrade():
+    op.drop_index('ix_analysis_jobs_status_run_after', table_name='analysis_jobs')
+    op.drop_index('ix_analysis_jobs_call_id', table_name='analysis_jobs')
+    op.drop_index('ix_analysis_jobs_id', table_name='analysis_jobs')
+    op.drop_table('analysis_jobs')
+    op.execute("DROP TYPE IF EXISTS jobstatus")
@@ -0,0 +1,49 @@
+"""Add call_stats_daily rollup table and backfill it from completed calls
+
+Revision ID: 004_add_call_stats_daily
+Revises: 003_add_analysis_jobs
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_add_call_stats_daily'
+down_revision = '003_add_analysis_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'call_stats_daily',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('called', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('talked', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('interested', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lead', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('duration_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+    # Backfill: one aggregated pass over completed calls
+    op.execute("""
+        INSERT INTO call_stats_daily (day, called, talked, interested, lead, duration_sum, duration_count)
+        SELECT
+            (created_at AT TIME ZONE 'UTC')::date,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE disposition IN ('INTERESTED', 'REJECTED', 'CONTINUE_IN_CHAT')),
+            COUNT(*) FILTER (WHERE disposition = 'INTERESTED'),
+            COUNT(*) FILTER (WHERE crm_status = 'ADDED'),
+            COALESCE(SUM(duration), 0),
+            COUNT(duration)
+        FROM calls
+        WHERE status = 'COMPLETED'
+        GROUP BY 1
+    """)
+
+
+def downgrade():
+    op.drop_table('call_stats_daily')
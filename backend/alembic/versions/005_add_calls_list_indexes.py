@@ -0,0 +1,36 @@
+"""Add composite indexes for keyset pagination and filters on calls
+
+Revision ID: 005_add_calls_list_indexes
+Revises: 004_add_call_stats_daily
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '005_add_calls_list_indexes'
+down_revision = '004_add_call_stats_daily'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    'ix_calls_created_at_id': ['created_at', 'id'],
+    'ix_calls_status_created_at_id': ['status', 'created_at', 'id'],
+    'ix_calls_disposition_created_at_id': ['disposition', 'created_at', 'id'],
+    'ix_calls_language_created_at_id': ['language', 'created_at', 'id'],
+    'ix_calls_tts_provider_created_at_id': ['tts_provider', 'created_at', 'id'],
+}
+
+
+def upgrade():
+    # CONCURRENTLY keeps the calls table writable while the indexes build
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'calls', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='calls', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,34 @@
+"""Add per-stage timestamps to calls
+
+Revision ID: 006_add_call_stage_timestamps
+Revises: 005_add_calls_list_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_add_call_stage_timestamps'
+down_revision = '005_add_calls_list_indexes'
+branch_labels = None
+depends_on = None
+
+STAGE_COLUMNS = (
+    'calling_at',
+    'analyzing_at',
+    'preparing_followup_at',
+    'sending_sms_at',
+    'adding_to_crm_at',
+    'failed_at',
+)
+
+
+def upgrade():
+    for name in STAGE_COLUMNS:
+        op.add_column('calls', sa.Column(name, sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    for name in reversed(STAGE_COLUMNS):
+        op.drop_column('calls', name)
@@ -0,0 +1,32 @@
+"""Add analysis_cache table for cached LLM analyses
+
+Revision ID: 007_add_analysis_cache
+Revises: 006_add_call_stage_timestamps
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '007_add_analysis_cache'
+down_revision = '006_add_call_stage_timestamps'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'analysis_cache',
+        sa.Column('key', sa.String(length=64), primary_key=True),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('result', postgresql.JSONB(), nullable=False),
+        sa.Column('hits', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('last_hit_at', sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('analysis_cache')
@@ -0,0 +1,58 @@
+"""Add reanalysis_runs table for batch re-analysis of calls
+
+Revision ID: 008_add_reanalysis_runs
+Revises: 007_add_analysis_cache
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '008_add_reanalysis_runs'
+down_revision = '007_add_analysis_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'reanalysis_runs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('mode', sa.Enum('ONLINE', 'BATCH', name='reanalysismode'), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('PENDING', 'RUNNING', 'PAUSED', 'DONE', 'CANCELLED', 'FAILED', name='reanalysisstatus'),
+            nullable=False
+        ),
+        sa.Column('date_from', sa.Date(), nullable=True),
+        sa.Column('date_to', sa.Date(), nullable=True),
+        # dispositiontype already exists (calls.disposition)
+        sa.Column(
+            'disposition',
+            postgresql.ENUM(name='dispositiontype', create_type=False),
+            nullable=True
+        ),
+        sa.Column('language', sa.String(), nullable=True),
+        sa.Column('concurrency', sa.Integer(), nullable=False, server_default='2'),
+        sa.Column('total_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('changed_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_calls', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_call_id', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('locked_by', sa.String(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_reanalysis_runs_id', 'reanalysis_runs', ['id'])
+
+
+def downgrade():
+    op.drop_index('ix_reanalysis_runs_id', table_name='reanalysis_runs')
+    op.drop_table('reanalysis_runs')
+    op.execute("DROP TYPE IF EXISTS reanalysisstatus")
+    op.execute("DROP TYPE IF EXISTS reanalysismode")
@@ -0,0 +1,56 @@
+"""Add transcript_ingest_log and unique/lookup indexes for the transcript webhook
+
+Revision ID: 009_add_transcript_ingest_log
+Revises: 008_add_reanalysis_runs
+Create Date: 2026-10-18
+
+ux_calls_call_id fails to build if calls.call_id has duplicates; check with
+SELECT call_id FROM calls WHERE call_id IS NOT NULL GROUP BY 1 HAVING count(*) > 1
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009_add_transcript_ingest_log'
+down_revision = '008_add_reanalysis_runs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transcript_ingest_log',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('idempotency_key', sa.String(), nullable=False),
+        sa.Column('external_call_id', sa.String(), nullable=True),
+        sa.Column('call_ref_id', sa.Integer(), sa.ForeignKey('calls.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.UniqueConstraint('idempotency_key', name='transcript_ingest_log_idempotency_key_key'),
+    )
+    op.create_index('ix_transcript_ingest_log_id', 'transcript_ingest_log', ['id'])
+    op.create_index('ix_transcript_ingest_log_received_at', 'transcript_ingest_log', ['received_at'])
+
+    # CONCURRENTLY keeps the calls table writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ux_calls_call_id', 'calls', ['call_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_calls_voximplant_call_id', 'calls', ['voximplant_call_id'],
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_calls_voximplant_call_id', table_name='calls', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ux_calls_call_id', table_name='calls', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_index('ix_transcript_ingest_log_received_at', table_name='transcript_ingest_log')
+    op.drop_index('ix_transcript_ingest_log_id', table_name='transcript_ingest_log')
+    op.drop_table('transcript_ingest_log')
@@ -0,0 +1,83 @@
+"""Add call_turns, calls.search_vector and full-text / trigram search indexes
+
+Revision ID: 010_add_call_turns_and_search
+Revises: 009_add_transcript_ingest_log
+Create Date: 2026-10-18
+
+Adding the stored calls.search_vector column rewrites the calls table under an
+exclusive lock (about a minute per 500k calls); transcript webhooks are still
+acknowledged meanwhile and applied once the lock is released.
+Turns of calls stored before this revision: python -m app.services.call_turns backfill
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '010_add_call_turns_and_search'
+down_revision = '009_add_transcript_ingest_log'
+branch_labels = None
+depends_on = None
+
+
+# app.models.call.SEARCH_VECTOR_SQL at this revision
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian'::regconfig, coalesce(summary, '')), 'A')"
+    " || setweight(to_tsvector('russian'::regconfig, coalesce(customer_interest, '')), 'B')"
+    " || setweight(to_tsvector('russian'::regconfig, coalesce(transcript, '')), 'C')"
+)
+
+TRGM_COLUMNS = {
+    'ix_calls_transcript_trgm': 'transcript',
+    'ix_calls_summary_trgm': 'summary',
+    'ix_calls_customer_interest_trgm': 'customer_interest',
+}
+
+
+def upgrade():
+    op.create_table(
+        'call_turns',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('call_id', sa.Integer(), sa.ForeignKey('calls.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('speaker', sa.String(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('offset_seconds', sa.Float(), nullable=True),
+        sa.Column(
+            'search_vector', postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('russian'::regconfig, text)", persisted=True)
+        ),
+    )
+    op.create_index('ux_call_turns_call_id_position', 'call_turns', ['call_id', 'position'], unique=True)
+    op.create_index('ix_call_turns_search_vector', 'call_turns', ['search_vector'], postgresql_using='gin')
+
+    op.add_column(
+        'calls',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True))
+    )
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY keeps the calls table writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_calls_search_vector', 'calls', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True
+        )
+        for name, column in TRGM_COLUMNS.items():
+            op.create_index(
+                name, 'calls', [column],
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in [*TRGM_COLUMNS, 'ix_calls_search_vector']:
+            op.drop_index(name, table_name='calls', postgresql_concurrently=True, if_exists=True)
+
+    op.drop_column('calls', 'search_vector')
+    op.drop_index('ix_call_turns_search_vector', table_name='call_turns')
+    op.drop_index('ux_call_turns_call_id_position', table_name='call_turns')
+    op.drop_table('call_turns')
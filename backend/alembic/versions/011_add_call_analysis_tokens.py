@@ -0,0 +1,31 @@
+"""Add OpenAI token usage of the analysis to calls
+
+Revision ID: 011_add_call_analysis_tokens
+Revises: 010_add_call_turns_and_search
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011_add_call_analysis_tokens'
+down_revision = '010_add_call_turns_and_search'
+branch_labels = None
+depends_on = None
+
+TOKEN_COLUMNS = (
+    'analysis_input_tokens',
+    'analysis_cached_tokens',
+    'analysis_output_tokens',
+)
+
+
+def upgrade():
+    for name in TOKEN_COLUMNS:
+        op.add_column('calls', sa.Column(name, sa.Integer(), nullable=True))
+
+
+def downgrade():
+    for name in reversed(TOKEN_COLUMNS):
+        op.drop_column('calls', name)
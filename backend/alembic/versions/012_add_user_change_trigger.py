@@ -0,0 +1,38 @@
+"""Notify user_events on user deactivation, password change, rename or delete
+
+Revision ID: 012_add_user_change_trigger
+Revises: 011_add_call_analysis_tokens
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '012_add_user_change_trigger'
+down_revision = '011_add_call_analysis_tokens'
+branch_labels = None
+depends_on = None
+
+
+# app.models.user.USER_EVENTS_TRIGGER_SQL at this revision
+USER_EVENTS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION notify_user_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('user_events', OLD.username);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_notify_change
+AFTER UPDATE OF is_active, hashed_password, username OR DELETE ON users
+FOR EACH ROW EXECUTE FUNCTION notify_user_change();
+"""
+
+
+def upgrade():
+    op.execute(USER_EVENTS_TRIGGER_SQL)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS users_notify_change ON users")
+    op.execute("DROP FUNCTION IF EXISTS notify_user_change()")
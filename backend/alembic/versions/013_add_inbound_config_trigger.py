@@ -0,0 +1,38 @@
+"""Notify inbound_config on any change of inbound_configs
+
+Revision ID: 013_add_inbound_config_trigger
+Revises: 012_add_user_change_trigger
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '013_add_inbound_config_trigger'
+down_revision = '012_add_user_change_trigger'
+branch_labels = None
+depends_on = None
+
+
+# app.models.inbound_config.INBOUND_CONFIG_TRIGGER_SQL at this revision
+INBOUND_CONFIG_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION notify_inbound_config_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('inbound_config', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inbound_configs_notify_change
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON inbound_configs
+FOR EACH STATEMENT EXECUTE FUNCTION notify_inbound_config_change();
+"""
+
+
+def upgrade():
+    op.execute(INBOUND_CONFIG_TRIGGER_SQL)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS inbound_configs_notify_change ON inbound_configs")
+    op.execute("DROP FUNCTION IF EXISTS notify_inbound_config_change()")
@@ -0,0 +1,39 @@
+"""Add prompt_templates registry and the calls columns referencing it
+
+Revision ID: 014_add_prompt_templates
+Revises: 013_add_inbound_config_trigger
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014_add_prompt_templates'
+down_revision = '013_add_inbound_config_trigger'
+branch_labels = None
+depends_on = None
+
+TEMPLATE_COLUMNS = (
+    'prompt_template_id',
+    'greeting_template_id',
+    'funnel_goal_template_id',
+)
+
+
+def upgrade():
+    op.create_table(
+        'prompt_templates',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=False, unique=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    for name in TEMPLATE_COLUMNS:
+        op.add_column('calls', sa.Column(name, sa.Integer(), sa.ForeignKey('prompt_templates.id'), nullable=True))
+
+
+def downgrade():
+    for name in reversed(TEMPLATE_COLUMNS):
+        op.drop_column('calls', name)
+    op.drop_table('prompt_templates')
@@ -0,0 +1,77 @@
+"""Move call and inbound config prompt texts to prompt_templates
+
+Revision ID: 015_prompt_texts_to_templates
+Revises: 014_add_prompt_templates
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015_prompt_texts_to_templates'
+down_revision = '014_add_prompt_templates'
+branch_labels = None
+depends_on = None
+
+# Text column -> id column, on both tables
+TEXT_COLUMNS = {
+    'greeting_message': 'greeting_template_id',
+    'prompt': 'prompt_template_id',
+    'funnel_goal': 'funnel_goal_template_id',
+}
+TABLES = ('calls', 'inbound_configs')
+
+# The same key as app.services.prompt_registry.content_hash
+CONTENT_HASH_SQL = "encode(sha256(convert_to({}, 'UTF8')), 'hex')"
+
+
+def upgrade():
+    for name in TEXT_COLUMNS.values():
+        op.add_column('inbound_configs', sa.Column(name, sa.Integer(), sa.ForeignKey('prompt_templates.id'), nullable=True))
+
+    # One template per distinct text of both tables (NULL inbound texts become empty ones)
+    texts = " UNION ".join(
+        f"SELECT coalesce({column}, '') FROM {table}" for table in TABLES for column in TEXT_COLUMNS
+    )
+    op.execute(f"""
+        INSERT INTO prompt_templates (content_hash, content)
+        SELECT {CONTENT_HASH_SQL.format('content')}, content
+        FROM ({texts}) AS texts (content)
+        ON CONFLICT (content_hash) DO NOTHING
+    """)
+
+    # One pass per table; calls dialed since 014 keep the ids they already have
+    for table in TABLES:
+        assignments = ",\n".join(
+            f"""{id_column} = coalesce({id_column}, (
+                    SELECT id FROM prompt_templates
+                    WHERE content_hash = {CONTENT_HASH_SQL.format(f"coalesce({table}.{column}, '')")}
+                ))"""
+            for column, id_column in TEXT_COLUMNS.items()
+        )
+        op.execute(f"UPDATE {table} SET {assignments}")
+
+    for table in TABLES:
+        for column, id_column in TEXT_COLUMNS.items():
+            op.alter_column(table, id_column, nullable=False)
+            op.drop_column(table, column)
+
+
+def downgrade():
+    for table in TABLES:
+        for column in TEXT_COLUMNS:
+            op.add_column(table, sa.Column(column, sa.Text(), nullable=True))
+        op.execute(f"""
+            UPDATE {table} SET
+                greeting_message = (SELECT content FROM prompt_templates WHERE id = {table}.greeting_template_id),
+                prompt = (SELECT content FROM prompt_templates WHERE id = {table}.prompt_template_id),
+                funnel_goal = (SELECT content FROM prompt_templates WHERE id = {table}.funnel_goal_template_id)
+        """)
+
+    for column in TEXT_COLUMNS:
+        op.alter_column('calls', column, nullable=False)
+    for name in TEXT_COLUMNS.values():
+        op.drop_column('inbound_configs', name)
+        # calls keep the 014 columns, nullable again
+        op.alter_column('calls', name, nullable=True)
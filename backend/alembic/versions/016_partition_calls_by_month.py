@@ -0,0 +1,157 @@
+"""Partition calls by created_at month
+
+Revision ID: 016_partition_calls_by_month
+Revises: 015_prompt_texts_to_templates
+Create Date: 2026-10-18
+
+calls becomes PARTITION BY RANGE (created_at) with a partition per month from
+the oldest call to CALL_PARTITIONS_AHEAD_MONTHS ahead; the primary key is
+(id, created_at). The rows are copied into the new table and every index is
+rebuilt under an exclusive lock (about half a minute per 500k calls); transcript
+webhooks are still acknowledged meanwhile and applied afterwards.
+
+Foreign keys to calls.id (call_turns, analysis_jobs, transcript_ingest_log)
+are dropped: a key referenced on a partitioned table must include created_at.
+ux_calls_call_id becomes the non-unique ix_calls_call_id for the same reason.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '016_partition_calls_by_month'
+down_revision = '015_prompt_texts_to_templates'
+branch_labels = None
+depends_on = None
+
+# settings.CALL_PARTITIONS_AHEAD_MONTHS at this revision
+AHEAD_MONTHS = 3
+
+# Foreign keys to calls.id: (table, column, ON DELETE)
+REFERENCES = (
+    ('call_turns', 'call_id', 'CASCADE'),
+    ('analysis_jobs', 'call_id', 'CASCADE'),
+    ('transcript_ingest_log', 'call_ref_id', 'SET NULL'),
+)
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _indexes(conn, table):
+    """Index name -> definition, without the primary key"""
+    rows = conn.execute(sa.text(
+        "SELECT indexname, indexdef FROM pg_indexes"
+        " WHERE schemaname = 'public' AND tablename = :table AND indexname <> :pkey"
+    ), {'table': table, 'pkey': f'{table}_pkey'})
+    return dict(rows.all())
+
+
+def _foreign_keys(conn, table):
+    """Constraint name -> definition of the foreign keys of a table"""
+    rows = conn.execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+        " WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+    ), {'table': table})
+    return dict(rows.all())
+
+
+def _plain_columns(conn, table):
+    rows = conn.execute(sa.text(
+        "SELECT column_name FROM information_schema.columns"
+        " WHERE table_schema = 'public' AND table_name = :table AND is_generated = 'NEVER'"
+        " ORDER BY ordinal_position"
+    ), {'table': table})
+    return ", ".join(name for (name,) in rows)
+
+
+def _set_aside_calls(conn):
+    """
+    Renames calls to calls_old and frees the names of its indexes and primary
+    key; returns what the replacement table must get back
+    """
+    saved = {
+        'indexes': _indexes(conn, 'calls'),
+        'foreign_keys': _foreign_keys(conn, 'calls'),
+        'sequence': conn.scalar(sa.text("SELECT pg_get_serial_sequence('calls', 'id')")),
+    }
+    op.execute(f"ALTER SEQUENCE {saved['sequence']} OWNED BY NONE")
+    op.execute("ALTER TABLE calls RENAME TO calls_old")
+    op.execute("ALTER TABLE calls_old RENAME CONSTRAINT calls_pkey TO calls_old_pkey")
+    for name in saved['indexes']:
+        op.execute(f"DROP INDEX {name}")
+    return saved
+
+
+def _fill_calls(conn, saved, primary_key, index_definitions):
+    """Copies calls_old into the new calls, drops it, then builds keys and indexes on the loaded table"""
+    columns = _plain_columns(conn, 'calls_old')
+    op.execute(f"INSERT INTO calls ({columns}) SELECT {columns} FROM calls_old")
+    op.execute("DROP TABLE calls_old")
+    op.execute(f"ALTER SEQUENCE {saved['sequence']} OWNED BY calls.id")
+
+    op.execute(f"ALTER TABLE calls ADD CONSTRAINT calls_pkey PRIMARY KEY ({primary_key})")
+    for name, definition in saved['foreign_keys'].items():
+        op.execute(f"ALTER TABLE calls ADD CONSTRAINT {name} {definition}")
+    for definition in index_definitions:
+        op.execute(definition)
+
+
+def upgrade():
+    conn = op.get_bind()
+    for table, column, _ in REFERENCES:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+
+    op.execute("UPDATE calls SET created_at = coalesce(updated_at, now()) WHERE created_at IS NULL")
+    oldest = conn.scalar(sa.text("SELECT min(created_at AT TIME ZONE 'UTC')::date FROM calls"))
+    current = conn.scalar(sa.text("SELECT (now() AT TIME ZONE 'UTC')::date")).replace(day=1)
+    month = (oldest or current).replace(day=1)
+
+    saved = _set_aside_calls(conn)
+    # Columns with defaults and the generated search vector
+    op.execute(
+        "CREATE TABLE calls (LIKE calls_old INCLUDING DEFAULTS INCLUDING GENERATED)"
+        " PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER TABLE calls ALTER COLUMN created_at SET NOT NULL")
+    while month <= _add_months(current, AHEAD_MONTHS):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE calls_{month:%Y_%m} PARTITION OF calls"
+            f" FOR VALUES FROM ('{month} 00:00+00') TO ('{end} 00:00+00')"
+        )
+        month = end
+
+    indexes = saved['indexes']
+    if 'ux_calls_call_id' in indexes:
+        indexes['ux_calls_call_id'] = "CREATE INDEX ix_calls_call_id ON public.calls USING btree (call_id)"
+    _fill_calls(conn, saved, "id, created_at", indexes.values())
+
+
+def downgrade():
+    conn = op.get_bind()
+    leftovers = conn.execute(sa.text(
+        "SELECT relname FROM pg_class WHERE relname ~ '^calls_[0-9]{4}_[0-9]{2}$'"
+        " AND relkind = 'r' AND NOT relispartition"
+    )).scalars().all()
+    if leftovers:
+        raise RuntimeError(f"Detached calls partitions left: {', '.join(leftovers)}; archive or drop them first")
+
+    saved = _set_aside_calls(conn)
+    op.execute("CREATE TABLE calls (LIKE calls_old INCLUDING DEFAULTS INCLUDING GENERATED)")
+    indexes = saved['indexes']
+    if 'ix_calls_call_id' in indexes:
+        indexes['ix_calls_call_id'] = "CREATE UNIQUE INDEX ux_calls_call_id ON public.calls USING btree (call_id)"
+    _fill_calls(conn, saved, "id", indexes.values())
+    op.execute("ALTER TABLE calls ALTER COLUMN created_at DROP NOT NULL")
+
+    # NOT VALID: rows of archived calls may be left in the child tables
+    for table, column, on_delete in REFERENCES:
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey FOREIGN KEY ({column})"
+            f" REFERENCES calls (id) ON DELETE {on_delete} NOT VALID"
+        )
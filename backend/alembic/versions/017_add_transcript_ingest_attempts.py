@@ -0,0 +1,35 @@
+"""Add transcript_ingest_log.attempts and the replay index
+
+Revision ID: 017_add_ingest_attempts
+Revises: 016_partition_calls_by_month
+Create Date: 2026-10-18
+
+Deliveries that already failed get attempts = 1, so each is replayed
+TRANSCRIPT_MAX_ATTEMPTS - 1 more times at most.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '017_add_ingest_attempts'
+down_revision = '016_partition_calls_by_month'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'transcript_ingest_log',
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.execute("UPDATE transcript_ingest_log SET attempts = 1 WHERE processed_at IS NULL AND error IS NOT NULL")
+    op.create_index(
+        'ix_transcript_ingest_log_pending', 'transcript_ingest_log', ['attempts', 'id'],
+        postgresql_where=sa.text('processed_at IS NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transcript_ingest_log_pending', table_name='transcript_ingest_log')
+    op.drop_column('transcript_ingest_log', 'attempts')
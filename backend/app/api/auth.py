@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import verify_password, create_access_token
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.security import verify_password_async, create_access_token
 from app.models.user import User
 from app.schemas.auth import Token, UserLogin
 
@@ -9,10 +10,12 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_data.username).first()
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(User).filter(User.username == user_data.username))
+    user = result.scalars().first()
 
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    # bcrypt runs in its own small pool (app.core.security.bcrypt_executor)
+    if not user or not await verify_password_async(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,145 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
-from typing import List
-from datetime import datetime
-import uuid
-
-from app.core.database import get_db
-from app.api.deps import get_current_user
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_, update
+from typing import List, Optional
+from datetime import date, datetime
+import asyncio
+import json
+import math
+
+from app.core.database import get_db, get_async_db, AsyncSessionLocal, SessionLocal
+from app.api.deps import get_current_user, get_current_user_from_stream
 from app.models.user import User
-from app.models.call import Call, CallStatus, DispositionType, CRMStatus
-from app.models.inbound_config import InboundConfig
-from app.schemas.call import CallCreate, CallResponse, CallListItem, CallAnalytics
-from app.services.voximplant import voximplant_service
-from app.services.openai_service import openai_service
+from app.models.call import Call, CallStatus, DispositionType
+from app.models.call_turn import CallTurn
+from app.schemas.call import CallCreate, CallResponse, CallListItem, CallSearchResult, CallTurnResponse, CallAnalytics, TranscriptWebhook
+from app.services.dialer import dial_call
+from app.services.http_client import UNSENT_ERRORS, voximplant_client
+from app.services.call_context import load_call_context, token_matches
+from app.services.prompt_registry import register_texts
+from app.services.call_projection import (
+    LIST_COLUMNS, SEARCH_COLUMNS, DETAIL_OPTIONS, DETAIL_TEXTS, InvalidFields, parse_fields, partial_call
+)
+from app.services.transcript_ingest import idempotency_key, record_delivery, process_delivery
+from app.services.call_stats import read_daily_totals
+from app.services.call_events import call_event_broker, call_event, publish_call_status, publish_status_change, FINAL_STATUSES
+from app.services.call_state import can_transition, transition, stage_values
+from app.services.pagination import decode_cursor, next_cursor, InvalidCursor
+from app.services.call_export import CallExport, Compression, ExportFormat
+from app.services.call_search import SearchMode, MIN_SUBSTRING_LENGTH, call_condition, turn_condition, matched_turns
+from app.services.call_turns import normalize_speaker
 from app.services.mock_transcript import get_mock_transcript, get_mock_duration
 
 router = APIRouter()
 
 
-async def process_call_background(call_id: int, db: Session):
+async def process_call_background(call_id: int):
     """Background task to update call status to CALLING after initiation"""
-    import asyncio
-    from sqlalchemy.orm import sessionmaker
-    from app.core.database import engine
-
-    # Create new session for background task
-    SessionLocal = sessionmaker(bind=engine)
-    bg_db = SessionLocal()
-
-    try:
-        call = bg_db.query(Call).filter(Call.id == call_id).first()
-        if not call:
-            return
-
-        # Update status to CALLING - real call is happening via Voximplant
-        call.status = CallStatus.CALLING
-        bg_db.commit()
-
-        print(f"[Background] Call {call_id} status updated to CALLING")
-        print(f"[Background] Waiting for webhook to receive transcript...")
-
-    except Exception as e:
-        print(f"Background task error: {e}")
-        call.status = CallStatus.FAILED
-        bg_db.commit()
-    finally:
-        bg_db.close()
-
-
-async def process_transcript_analysis(call_id: int, db: Session):
-    """Process transcript analysis after receiving it from webhook"""
-    import asyncio
-    from sqlalchemy.orm import sessionmaker
-    from app.core.database import engine
-
-    # Create new session for background task
-    SessionLocal = sessionmaker(bind=engine)
-    bg_db = SessionLocal()
-
-    try:
-        call = bg_db.query(Call).filter(Call.id == call_id).first()
-        if not call:
-            return
-
-        print(f"[Analysis] Starting analysis for call {call_id}")
-
-        # Step 1: Already in ANALYZING status, analyze with OpenAI
-        analysis = await openai_service.analyze_conversation(
-            transcript=call.transcript,
-            prompt=call.prompt,
-            funnel_goal=call.funnel_goal
-        )
-
-        call.summary = analysis.get("summary", "")
-        call.disposition = DispositionType(analysis.get("disposition", "no_answer"))
-        call.customer_interest = analysis.get("customer_interest", "")
-        call.funnel_achieved = analysis.get("funnel_achieved", None)
-        bg_db.commit()
-
-        print(f"[Analysis] Analysis completed: {call.disposition}")
-
-        # Step 2: Preparing follow-up
-        call.status = CallStatus.PREPARING_FOLLOWUP
-        bg_db.commit()
-        await asyncio.sleep(1)
-
-        call.followup_message = analysis.get("followup_message", "")
-        bg_db.commit()
-
-        print(f"[Analysis] Follow-up message prepared")
-
-        # Step 3: Sending SMS (if interested)
-        call.status = CallStatus.SENDING_SMS
-        bg_db.commit()
-        await asyncio.sleep(1)
-
-        if call.disposition == DispositionType.INTERESTED:
-            call.telegram_link_sent = True
-            bg_db.commit()
-            print(f"[Analysis] SMS/Telegram link sent")
-
-        # Step 4: Adding to CRM
-        call.status = CallStatus.ADDING_TO_CRM
-        bg_db.commit()
-        await asyncio.sleep(1)
-
-        # Auto-determine CRM status based on disposition
-        crm_status_value = analysis.get("crm_status", "pending")
-
-        # Override: if interested, always add to CRM
-        if call.disposition == DispositionType.INTERESTED:
-            crm_status_value = "added"
-        # If no answer/busy/wrong number, don't create CRM entry
-        elif call.disposition in [DispositionType.NO_ANSWER, DispositionType.BUSY, DispositionType.WRONG_NUMBER]:
-            crm_status_value = "not_created"
-
-        call.crm_status = CRMStatus(crm_status_value)
-        bg_db.commit()
-
-        print(f"[Analysis] CRM status updated: {call.crm_status}")
-
-        # Step 5: Completed
-        call.status = CallStatus.COMPLETED
-        call.completed_at = datetime.utcnow()
-        bg_db.commit()
-
-        print(f"[Analysis] Call {call_id} completed successfully")
-
-    except Exception as e:
-        print(f"[Analysis] Error: {e}")
-        call.status = CallStatus.FAILED
-        bg_db.commit()
-    finally:
-        bg_db.close()
+    async with AsyncSessionLocal() as bg_db:
+        call = None
+        try:
+            call = await bg_db.get(Call, call_id, with_for_update=True)
+            if not call:
+                return
+
+            # Transcript webhook may have been faster - never move a call backwards
+            if not can_transition(call.status, CallStatus.CALLING):
+                return
+
+            # Update status to CALLING - real call is happening via Voximplant
+            transition(call, CallStatus.CALLING)
+            await publish_call_status(bg_db, call)
+            await bg_db.commit()
+
+            print(f"[Background] Call {call_id} status updated to CALLING")
+            print(f"[Background] Waiting for webhook to receive transcript...")
+
+        except Exception as e:
+            print(f"Background task error: {e}")
+            if call is not None:
+                await bg_db.rollback()
+                await bg_db.execute(
+                    update(Call).filter(Call.id == call_id).values(**stage_values(CallStatus.FAILED))
+                )
+                await publish_status_change(bg_db, [call_id], CallStatus.FAILED)
+                await bg_db.commit()
 
 
 @router.post("/calls", response_model=CallResponse)
 async def create_call(
     call_data: CallCreate,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Initiate a new call"""
@@ -149,9 +82,11 @@ async def create_call(
         language=call_data.language,
         tts_provider=call_data.tts_provider,
         voice=call_data.voice,
-        greeting_message=call_data.greeting_message,
-        prompt=call_data.prompt,
-        funnel_goal=call_data.funnel_goal,
+        **await register_texts(db, {
+            "greeting_message": call_data.greeting_message,
+            "prompt": call_data.prompt,
+            "funnel_goal": call_data.funnel_goal,
+        }),
         stability=call_data.stability,
         speed=call_data.speed,
         similarity_boost=call_data.similarity_boost,
@@ -159,70 +94,307 @@ async def create_call(
     )
 
     db.add(new_call)
-    db.commit()
-    db.refresh(new_call)
+    await db.commit()
+    await db.refresh(new_call)
 
     # Start Voximplant call (async)
     try:
-        call_id = str(uuid.uuid4())
-        voximplant_call_id = await voximplant_service.start_call(
-            call_id=call_id,
-            phone_number=call_data.phone_number,
-            language=call_data.language,
-            tts_provider=call_data.tts_provider,
-            voice=call_data.voice,
-            greeting_message=call_data.greeting_message,
-            prompt=call_data.prompt,
-            funnel_goal=call_data.funnel_goal,
-            stability=call_data.stability,
-            speed=call_data.speed,
-            similarity_boost=call_data.similarity_boost
+        await dial_call(db, new_call)
+        await db.commit()
+        await db.refresh(new_call)
+    except UNSENT_ERRORS as e:
+        # Voximplant was not asked to dial: no call to keep, the client retries
+        await db.rollback()
+        await db.delete(new_call)
+        await db.commit()
+        retry_after = max(math.ceil(voximplant_client.breaker.retry_after()), 1)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Voximplant unavailable, call not started: {type(e).__name__}",
+            headers={"Retry-After": str(retry_after)}
         )
-        new_call.call_id = call_id
-        new_call.voximplant_call_id = voximplant_call_id
-        db.commit()
     except Exception as e:
         print(f"Voximplant call error: {e}")
         # Continue anyway for MVP
 
+    # Texts of the response, deferred on the model
+    await db.refresh(new_call, DETAIL_TEXTS)
+
     # Process call in background
-    background_tasks.add_task(process_call_background, new_call.id, db)
+    background_tasks.add_task(process_call_background, new_call.id)
 
     return new_call
 
 
+# Seconds between SSE comments that keep proxies from closing an idle stream
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def _sse(event: dict) -> str:
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+@router.get("/calls/events")
+async def stream_call_events(
+    request: Request,
+    call_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user_from_stream)
+):
+    """
+    Server-Sent Events with call status changes (instead of polling GET /calls/{id}).
+    With call_id: the current status first, then its changes until the call
+    is completed/failed. Without call_id: changes of all calls.
+    """
+    async def events():
+        # Subscribe before reading the snapshot so no change falls in between
+        queue = call_event_broker.subscribe(call_id)
+        try:
+            if call_id is not None:
+                async with AsyncSessionLocal() as db:
+                    call = await db.get(Call, call_id)
+                if not call:
+                    yield _sse({"id": call_id, "error": "Call not found"})
+                    return
+                yield _sse(call_event(call))
+                if call.status in FINAL_STATUSES:
+                    return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"
+                    continue
+
+                yield _sse(event)
+                if call_id is not None and event.get("status") in (s.value for s in FINAL_STATUSES):
+                    return
+        finally:
+            call_event_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/calls/search", response_model=List[CallSearchResult])
+def search_calls(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    mode: SearchMode = "text",
+    speaker: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    status: Optional[CallStatus] = None,
+    disposition: Optional[DispositionType] = None,
+    language: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Search calls by transcript, summary and customer interest, newest first.
+    mode=text: full-text (Russian stemming, "phrase", -word, or);
+    mode=substring: case-insensitive substring, at least 3 characters.
+    speaker (agent/customer) limits matches to that side's turns.
+    Paginated like GET /calls (X-Next-Cursor).
+    """
+    q = q.strip()
+    speaker = normalize_speaker(speaker) if speaker else None
+    if mode == "substring" and len(q) < MIN_SUBSTRING_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Substring search needs at least {MIN_SUBSTRING_LENGTH} characters")
+
+    query = db.query(*SEARCH_COLUMNS).filter(call_condition(q, mode))
+
+    if speaker:
+        query = query.filter(
+            select(CallTurn.id)
+            .filter(CallTurn.call_id == Call.id, CallTurn.speaker == speaker, turn_condition(q, mode))
+            .exists()
+        )
+    if status is not None:
+        query = query.filter(Call.status == status)
+    if disposition is not None:
+        query = query.filter(Call.disposition == disposition)
+    if language is not None:
+        query = query.filter(Call.language == language)
+    if date_from is not None:
+        query = query.filter(Call.created_at >= date_from)
+    if date_to is not None:
+        query = query.filter(Call.created_at < date_to)
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(Call.created_at, Call.id) < tuple_(cursor_created_at, cursor_id))
+
+    calls = query.order_by(Call.created_at.desc(), Call.id.desc()).limit(limit).all()
+
+    page_cursor = next_cursor(calls, limit)
+    if page_cursor:
+        response.headers["X-Next-Cursor"] = page_cursor
+
+    turns = matched_turns(db, [call.id for call in calls], q, mode, speaker)
+    results = []
+    for call in calls:
+        result = CallSearchResult.model_validate(call)
+        result.matched_turns = [CallTurnResponse.model_validate(turn) for turn in turns.get(call.id, [])]
+        results.append(result)
+    return results
+
+
+@router.get("/calls/export")
+def export_calls(
+    export_format: ExportFormat = Query(default="ndjson", alias="format"),
+    compression: Optional[Compression] = None,
+    status: Optional[CallStatus] = None,
+    disposition: Optional[DispositionType] = None,
+    language: Optional[str] = None,
+    tts_provider: Optional[str] = None,
+    campaign_id: Optional[int] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export matching calls (ordered by id) as a downloadable file:
+    format=ndjson|csv|parquet, compression=gzip|zstd. Streamed from a
+    server-side cursor, so the export size does not matter to the API process.
+    """
+    export = CallExport(
+        export_format, compression,
+        status=status, disposition=disposition, language=language, tts_provider=tts_provider,
+        campaign_id=campaign_id, date_from=date_from, date_to=date_to,
+    )
+
+    def body():
+        # Own session: request dependencies are closed before the body is streamed
+        db = SessionLocal()
+        try:
+            yield from export.chunks(db)
+        finally:
+            db.close()
+            print(f"[Export] {export.counters['rows']} calls as {export.filename} ({export.counters['bytes']} bytes)")
+
+    return StreamingResponse(
+        body(),
+        media_type=export.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export.filename}"'}
+    )
+
+
 @router.get("/calls/{call_id}", response_model=CallResponse)
 def get_call(
     call_id: int,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get call details by ID"""
-    call = db.query(Call).filter(Call.id == call_id).first()
+    """
+    Get call details by ID.
+    fields=status,summary returns only those fields (and id), selecting just their columns.
+    """
+    if fields is not None:
+        try:
+            names = parse_fields(fields)
+        except InvalidFields as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        row = db.query(*(getattr(Call, name) for name in names)).filter(Call.id == call_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Call not found")
+        return JSONResponse(partial_call(row, names))
+
+    call = db.query(Call).options(*DETAIL_OPTIONS).filter(Call.id == call_id).first()
     if not call:
         raise HTTPException(status_code=404, detail="Call not found")
     return call
 
 
+@router.get("/calls/{call_id}/turns", response_model=List[CallTurnResponse])
+def get_call_turns(
+    call_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Transcript of a call turn by turn (speaker, text, offset)"""
+    if not db.query(Call.id).filter(Call.id == call_id).first():
+        raise HTTPException(status_code=404, detail="Call not found")
+    return db.query(CallTurn).filter(CallTurn.call_id == call_id).order_by(CallTurn.position).all()
+
+
 @router.get("/calls", response_model=List[CallListItem])
 def list_calls(
+    response: Response,
+    cursor: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(default=100, ge=1, le=500),
+    status: Optional[CallStatus] = None,
+    disposition: Optional[DispositionType] = None,
+    language: Optional[str] = None,
+    tts_provider: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all calls"""
-    calls = db.query(Call).order_by(Call.created_at.desc()).offset(skip).limit(limit).all()
+    """
+    List calls, newest first.
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one
+    (keyset pagination; `skip` is kept for old clients and ignored with a cursor).
+    """
+    query = db.query(*LIST_COLUMNS)
+
+    if status is not None:
+        query = query.filter(Call.status == status)
+    if disposition is not None:
+        query = query.filter(Call.disposition == disposition)
+    if language is not None:
+        query = query.filter(Call.language == language)
+    if tts_provider is not None:
+        query = query.filter(Call.tts_provider == tts_provider)
+    if date_from is not None:
+        query = query.filter(Call.created_at >= date_from)
+    if date_to is not None:
+        query = query.filter(Call.created_at < date_to)
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(Call.created_at, Call.id) < tuple_(cursor_created_at, cursor_id))
+
+    query = query.order_by(Call.created_at.desc(), Call.id.desc())
+    if skip and not cursor:
+        query = query.offset(skip)
+    calls = query.limit(limit).all()
+
+    page_cursor = next_cursor(calls, limit)
+    if page_cursor:
+        response.headers["X-Next-Cursor"] = page_cursor
     return calls
 
 
 @router.get("/analytics", response_model=CallAnalytics)
 def get_analytics(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get call analytics"""
-    total_calls = db.query(Call).count()
+    """
+    Get call analytics for completed calls, optionally limited to
+    [date_from, date_to] by call creation day (UTC). Reads the daily rollup.
+    """
+    totals = read_daily_totals(db, date_from, date_to)
+    total_calls = totals["called"]
 
     if total_calls == 0:
         return CallAnalytics(
@@ -235,32 +407,17 @@ def get_analytics(
 
     # Funnel metrics
     called = total_calls
-
-    talked = db.query(Call).filter(
-        Call.disposition.in_([
-            DispositionType.INTERESTED,
-            DispositionType.REJECTED,
-            DispositionType.CONTINUE_IN_CHAT
-        ])
-    ).count()
-
-    interested = db.query(Call).filter(
-        Call.disposition == DispositionType.INTERESTED
-    ).count()
-
-    lead = db.query(Call).filter(
-        Call.crm_status == CRMStatus.ADDED
-    ).count()
+    talked = totals["talked"]
+    interested = totals["interested"]
+    lead = totals["lead"]
 
     # Rates
     talk_rate = (talked / called * 100) if called > 0 else 0.0
     interest_rate = (interested / talked * 100) if talked > 0 else 0.0
 
     # Average duration
-    avg_duration_result = db.query(func.avg(Call.duration)).filter(
-        Call.duration.isnot(None)
-    ).scalar()
-    avg_duration = float(avg_duration_result) if avg_duration_result else 0.0
+    duration_count = totals["duration_count"]
+    avg_duration = float(totals["duration_sum"]) / duration_count if duration_count else 0.0
 
     return CallAnalytics(
         total_calls=total_calls,
@@ -275,92 +432,54 @@ def get_analytics(
         }
     )
 
+@router.get("/call-context/{call_id}")
+async def get_call_context(
+    call_id: str,
+    call_token: Optional[str] = Header(default=None, alias="X-Call-Token"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Context of an outbound call for the Voximplant scenario (prompt, voice,
+    provider keys). StartScenarios only sends {call_id, token, webhook_url};
+    the token is checked here (see app.services.call_context).
+    """
+    if not token_matches(call_id, call_token):
+        raise HTTPException(status_code=403, detail="Invalid call token")
+
+    body = await load_call_context(db, call_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Call not found or not starting")
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+
+
 @router.post("/call-transcript")
 async def receive_call_transcript(
-    call_data: dict,
+    request: Request,
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    idempotency_key_header: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Receive call transcript from Voximplant webhook
-    Expected data: {call_id, phone, transcript, raw_text}
+    Expected data: {call_id, phone, duration_seconds, transcript, raw_text}
+
+    The raw body is appended to the ingest log and acknowledged right away;
+    the transcript is applied after the response. Deliveries with an already
+    seen idempotency key (Idempotency-Key header, or call_id + transcript) are no-ops.
     """
+    body = await request.body()
     try:
-        import json
-        print("=" * 80)
-        print("🎯 WEBHOOK RECEIVED - TRANSCRIPT INCOMING!")
-        print("=" * 80)
-        print(f"[Webhook] Full payload received: {json.dumps(call_data, indent=2)}")
-
-        call_id = call_data.get("call_id")
-        phone = call_data.get("phone")
-        duration = call_data.get("duration_seconds", 0)
-        transcript = call_data.get("transcript", [])
-        raw_text = call_data.get("raw_text", "")
-
-        print(f"[Webhook] Received transcript for call_id: {call_id}")
-        print(f"[Webhook] Phone: {phone}")
-        print(f"[Webhook] Transcript array length: {len(transcript)}")
-        print(f"[Webhook] Raw text length: {len(raw_text)}")
-        print(f"[Webhook] Raw text: {raw_text[:200] if raw_text else 'EMPTY'}")
-
-        # Find call by call_id (for outbound calls)
-        call = db.query(Call).filter(Call.call_id == call_id).first()
-
-        if not call:
-            # This is an inbound call - create new record
-            print(f"[Webhook] Call not found with call_id: {call_id} - creating as INBOUND call")
-
-            # Get inbound config for settings
-            inbound_config = db.query(InboundConfig).filter(InboundConfig.is_active == True).first()
-
-            # Generate our own internal call_id
-            internal_call_id = str(uuid.uuid4())
-
-            # Create new call record for inbound
-            call = Call(
-                phone_number=phone or "unknown",
-                language=inbound_config.language if inbound_config else "ru",
-                voice=inbound_config.voice if inbound_config else "3EuKHIEZbSzrHGNmdYsx",
-                greeting_message=inbound_config.greeting_message if inbound_config else "Входящий звонок",
-                prompt=inbound_config.prompt if inbound_config else "",
-                funnel_goal=inbound_config.funnel_goal if inbound_config else "",
-                status=CallStatus.ANALYZING,
-                call_id=internal_call_id,
-                voximplant_call_id=call_id,  # Save original Voximplant call_id
-            )
-            db.add(call)
-            db.commit()
-            db.refresh(call)
-
-            print(f"[Webhook] Created INBOUND call with ID: {call.id}, internal call_id: {internal_call_id}")
-
-
-        # Update call with transcript
-        call.duration = duration
-        call.transcript = raw_text
-        call.status = CallStatus.ANALYZING
-
-        db.commit()
-        db.refresh(call)
-
-        print(f"[Webhook] Transcript saved for call ID: {call.id}")
-        print("=" * 80)
-        print("✅ TRANSCRIPT SUCCESSFULLY SAVED TO DATABASE")
-        print(f"✅ Starting analysis for call ID: {call.id}")
-        print("=" * 80)
-
-        # Trigger analysis and full processing in background
-        background_tasks.add_task(process_transcript_analysis, call.id, db)
-
-        return {"status": "success", "message": "Transcript received"}
+        payload = TranscriptWebhook.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
 
-    except Exception as e:
-        print("=" * 80)
-        print("❌ WEBHOOK ERROR!")
-        print("=" * 80)
-        print(f"[Webhook] Error processing transcript: {e}")
-        import traceback
-        print(traceback.format_exc())
-        print("=" * 80)
-        return {"status": "error", "message": str(e)}
+    key = idempotency_key(payload, idempotency_key_header)
+    delivery_id = await record_delivery(db, key, payload, body)
+    if delivery_id is None:
+        print(f"[Webhook] Duplicate delivery for call_id {payload.call_id} ignored")
+        return {"status": "success", "message": "Duplicate delivery ignored"}
+
+    print(f"[Webhook] Transcript for call_id {payload.call_id} logged as delivery {delivery_id} ({len(body)} bytes)")
+    background_tasks.add_task(process_delivery, delivery_id)
+
+    return {"status": "success", "message": "Transcript received"}
@@ -0,0 +1,234 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from sqlalchemy.orm import Session
+from sqlalchemy import func, insert
+from typing import List
+import io
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.models.call import Call, CallStatus, CRMStatus
+from app.models.campaign import Campaign, CampaignStatus
+from app.schemas.campaign import (
+    CampaignCreate,
+    CampaignResponse,
+    CampaignListItem,
+    CampaignUploadResult,
+    CampaignProgress
+)
+from app.services.campaign_import import iter_phone_numbers, is_ndjson
+from app.services.dialer import campaign_dialer
+from app.services.call_state import stage_values
+from app.services.prompt_registry import register_texts_sync
+
+router = APIRouter()
+
+
+def _get_campaign_or_404(db: Session, campaign_id: int) -> Campaign:
+    campaign = db.query(Campaign).filter(Campaign.id == campaign_id).first()
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign
+
+
+@router.post("/campaigns", response_model=CampaignResponse)
+def create_campaign(
+    campaign_data: CampaignCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create a campaign (prompt/voice config); numbers are uploaded separately"""
+    if campaign_data.max_concurrent_calls > settings.CAMPAIGN_MAX_CONCURRENT_CALLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"max_concurrent_calls must be <= {settings.CAMPAIGN_MAX_CONCURRENT_CALLS}"
+        )
+
+    campaign = Campaign(**campaign_data.model_dump(), status=CampaignStatus.DRAFT)
+    db.add(campaign)
+    db.commit()
+    db.refresh(campaign)
+    return campaign
+
+
+@router.get("/campaigns", response_model=List[CampaignListItem])
+def list_campaigns(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List campaigns"""
+    return db.query(Campaign).order_by(Campaign.created_at.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/campaigns/{campaign_id}", response_model=CampaignResponse)
+def get_campaign(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get campaign details"""
+    return _get_campaign_or_404(db, campaign_id)
+
+
+@router.get("/campaigns/{campaign_id}/progress", response_model=CampaignProgress)
+def get_campaign_progress(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Call counts per status for a campaign"""
+    campaign = _get_campaign_or_404(db, campaign_id)
+    rows = db.query(Call.status, func.count(Call.id)).filter(
+        Call.campaign_id == campaign_id
+    ).group_by(Call.status).all()
+
+    return CampaignProgress(
+        campaign_id=campaign.id,
+        status=campaign.status,
+        total_calls=campaign.total_calls,
+        by_status={status.value: count for status, count in rows}
+    )
+
+
+@router.post("/campaigns/{campaign_id}/numbers", response_model=CampaignUploadResult)
+def upload_campaign_numbers(
+    campaign_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload phone numbers as CSV or NDJSON (.ndjson/.jsonl).
+    Creates one QUEUED call per unique number, inserted in batches.
+    """
+    campaign = _get_campaign_or_404(db, campaign_id)
+    if campaign.status in (CampaignStatus.COMPLETED, CampaignStatus.CANCELLED):
+        raise HTTPException(status_code=400, detail=f"Campaign is {campaign.status.value}")
+
+    # Numbers already in this campaign are skipped
+    seen = {
+        row.phone_number for row in
+        db.query(Call.phone_number).filter(Call.campaign_id == campaign_id).all()
+    }
+
+    call_template = {
+        "campaign_id": campaign.id,
+        "language": campaign.language,
+        "tts_provider": campaign.tts_provider,
+        "voice": campaign.voice,
+        **register_texts_sync(db, {
+            "greeting_message": campaign.greeting_message,
+            "prompt": campaign.prompt,
+            "funnel_goal": campaign.funnel_goal,
+        }),
+        "stability": campaign.stability,
+        "speed": campaign.speed,
+        "similarity_boost": campaign.similarity_boost,
+        "status": CallStatus.QUEUED,
+        "crm_status": CRMStatus.PENDING,
+        "telegram_link_sent": False,
+    }
+
+    inserted = 0
+    skipped = 0
+    batch = []
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    ndjson = is_ndjson(file.filename, file.content_type)
+
+    try:
+        for phone in iter_phone_numbers(stream, ndjson=ndjson):
+            if phone is None or phone in seen:
+                skipped += 1
+                continue
+            seen.add(phone)
+            batch.append({**call_template, "phone_number": phone})
+
+            if len(batch) >= settings.CAMPAIGN_INSERT_BATCH_SIZE:
+                db.execute(insert(Call), batch)
+                inserted += len(batch)
+                batch = []
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+    if batch:
+        db.execute(insert(Call), batch)
+        inserted += len(batch)
+
+    campaign.total_calls = (campaign.total_calls or 0) + inserted
+    db.commit()
+
+    print(f"[Campaign] {campaign.id}: uploaded {inserted} numbers, skipped {skipped}")
+
+    return CampaignUploadResult(
+        campaign_id=campaign.id,
+        inserted=inserted,
+        skipped=skipped,
+        total_calls=campaign.total_calls
+    )
+
+
+@router.post("/campaigns/{campaign_id}/start", response_model=CampaignResponse)
+def start_campaign(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Start or resume dialing"""
+    campaign = _get_campaign_or_404(db, campaign_id)
+    if campaign.status not in (CampaignStatus.DRAFT, CampaignStatus.PAUSED):
+        raise HTTPException(status_code=400, detail=f"Campaign is {campaign.status.value}")
+    if not campaign.total_calls:
+        raise HTTPException(status_code=400, detail="Upload phone numbers first")
+
+    campaign.status = CampaignStatus.RUNNING
+    if campaign.started_at is None:
+        campaign.started_at = func.now()
+    db.commit()
+    db.refresh(campaign)
+
+    campaign_dialer.notify_slot_freed()
+    return campaign
+
+
+@router.post("/campaigns/{campaign_id}/pause", response_model=CampaignResponse)
+def pause_campaign(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stop dialing new numbers; calls already in progress finish normally"""
+    campaign = _get_campaign_or_404(db, campaign_id)
+    if campaign.status != CampaignStatus.RUNNING:
+        raise HTTPException(status_code=400, detail=f"Campaign is {campaign.status.value}")
+
+    campaign.status = CampaignStatus.PAUSED
+    db.commit()
+    db.refresh(campaign)
+    return campaign
+
+
+@router.post("/campaigns/{campaign_id}/cancel", response_model=CampaignResponse)
+def cancel_campaign(
+    campaign_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel the campaign and drop numbers that were not dialed yet"""
+    campaign = _get_campaign_or_404(db, campaign_id)
+    if campaign.status in (CampaignStatus.COMPLETED, CampaignStatus.CANCELLED):
+        raise HTTPException(status_code=400, detail=f"Campaign is {campaign.status.value}")
+
+    db.query(Call).filter(
+        Call.campaign_id == campaign_id,
+        Call.status == CallStatus.QUEUED
+    ).update(stage_values(CallStatus.FAILED), synchronize_session=False)
+
+    campaign.status = CampaignStatus.CANCELLED
+    campaign.completed_at = func.now()
+    db.commit()
+    db.refresh(campaign)
+    return campaign
@@ -1,18 +1,49 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.core.auth_cache import principal_cache
 from app.core.database import get_db
 from app.core.security import decode_access_token
 from app.models.user import User
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
-    token = credentials.credentials
+    return get_user_by_token(credentials.credentials, db)
+
+
+def get_current_user_from_stream(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    token: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Auth for streaming endpoints: browsers' EventSource cannot send headers,
+    so the token may also come as ?token=
+    """
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return get_user_by_token(token, db)
+
+
+def get_user_by_token(token: str, db: Session) -> User:
+    # Verified recently and the user has not changed since: no JWT decode, no query
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+    generation = principal_cache.generation
+
     payload = decode_access_token(token)
 
     if payload is None:
@@ -41,4 +72,5 @@ def get_current_user(
             detail="Inactive user"
         )
 
+    principal_cache.put(token, user, payload.get("exp"), generation)
     return user
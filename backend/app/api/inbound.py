@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.api.deps import get_current_user
 from app.models.user import User
 from app.models.inbound_config import InboundConfig
@@ -13,24 +13,34 @@ from app.schemas.inbound_config import (
     InboundConfigResponse,
     InboundConfigForVoximplant
 )
+from app.services.inbound_config_cache import inbound_config_cache, etag_matches
+from app.services.prompt_registry import TEMPLATE_COLUMNS, register_texts
 
 router = APIRouter(prefix="/inbound", tags=["inbound"])
 
 
+async def _default_config(db: AsyncSession) -> InboundConfig:
+    """Новый конфиг с текстами по умолчанию (тексты хранятся в prompt_templates)"""
+    defaults = InboundConfigCreate()
+    return InboundConfig(**await register_texts(db, {field: getattr(defaults, field) for field in TEMPLATE_COLUMNS}))
+
+
 @router.get("/config", response_model=InboundConfigResponse)
 async def get_inbound_config(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Получить текущую конфигурацию входящих звонков"""
-    config = db.query(InboundConfig).first()
+    result = await db.execute(select(InboundConfig))
+    config = result.scalars().first()
 
     if not config:
         # Создаём конфиг по умолчанию если его нет
-        config = InboundConfig()
+        config = await _default_config(db)
         db.add(config)
-        db.commit()
-        db.refresh(config)
+        await db.commit()
+        await db.refresh(config)
+        inbound_config_cache.invalidate()
 
     return config
 
@@ -38,26 +48,34 @@ async def get_inbound_config(
 @router.put("/config", response_model=InboundConfigResponse)
 async def update_inbound_config(
     config_update: InboundConfigUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Обновить конфигурацию входящих звонков"""
-    config = db.query(InboundConfig).first()
+    result = await db.execute(select(InboundConfig))
+    config = result.scalars().first()
 
     if not config:
         # Создаём конфиг если его нет
-        config = InboundConfig()
+        config = await _default_config(db)
         db.add(config)
-        db.commit()
-        db.refresh(config)
+        await db.commit()
+        await db.refresh(config)
 
     # Обновляем только переданные поля
     update_data = config_update.model_dump(exclude_unset=True)
+    # Тексты заменяются ссылками на prompt_templates; null текст не меняет
+    texts = {field: update_data.pop(field) for field in TEMPLATE_COLUMNS if field in update_data}
+    texts = {field: text for field, text in texts.items() if text is not None}
+    if texts:
+        update_data.update(await register_texts(db, texts))
     for field, value in update_data.items():
         setattr(config, field, value)
 
-    db.commit()
-    db.refresh(config)
+    await db.commit()
+    await db.refresh(config)
+    # Other processes are notified by the inbound_configs trigger
+    inbound_config_cache.invalidate()
 
     return config
 
@@ -65,33 +83,16 @@ async def update_inbound_config(
 # Вебхук для Voximplant - получение конфига при входящем звонке
 @router.get("/webhook/config", response_model=InboundConfigForVoximplant)
 async def get_config_for_voximplant(
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(default=None)
 ):
     """
     Вебхук для Voximplant.
     Возвращает конфигурацию для обработки входящего звонка.
     Не требует авторизации (вызывается из Voximplant сценария).
+    Отдаётся из памяти процесса; с If-None-Match текущей версии - 304 без тела.
     """
-    config = db.query(InboundConfig).filter(InboundConfig.is_active == True).first()
-
-    if not config:
-        # Возвращаем дефолтные значения если конфига нет
-        return InboundConfigForVoximplant(
-            language="ru",
-            voice="3EuKHIEZbSzrHGNmdYsx",
-            greeting_message="Здравствуйте! Чем могу помочь?",
-            prompt="Ты - полезный ассистент. Помогай клиентам с их вопросами.",
-            funnel_goal="Помочь клиенту решить его вопрос",
-            elevenlabs_api_key=settings.ELEVENLABS_API_KEY,
-            elevenlabs_agent_id=settings.ELEVENLABS_AGENT_ID
-        )
-
-    return InboundConfigForVoximplant(
-        language=config.language,
-        voice=config.voice,
-        greeting_message=config.greeting_message,
-        prompt=config.prompt,
-        funnel_goal=config.funnel_goal,
-        elevenlabs_api_key=settings.ELEVENLABS_API_KEY,
-        elevenlabs_agent_id=settings.ELEVENLABS_AGENT_ID
-    )
+    current = await inbound_config_cache.get()
+    headers = {"ETag": current["etag"], "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, current["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=current["body"], media_type="application/json", headers=headers)
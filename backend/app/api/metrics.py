@@ -0,0 +1,39 @@
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from sqlalchemy import func, select
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import call_status_collector, render_metrics
+from app.models.call import Call, CallStatus
+
+router = APIRouter()
+
+
+async def _count_calls_by_status() -> dict[str, int]:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(Call.status, func.count()).group_by(Call.status))).all()
+    counts = {status.value: 0 for status in CallStatus}
+    counts.update({status.value: count for status, count in rows})
+    return counts
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(default=None)):
+    """
+    Prometheus scrape endpoint (see app.core.metrics).
+    With METRICS_TOKEN set the scraper must send `Authorization: Bearer <token>`.
+    """
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        authorization or "", f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    # A full count of calls: not on every scrape of every scraper
+    if call_status_collector.is_stale(settings.METRICS_STATUS_REFRESH_SECONDS):
+        call_status_collector.update(await _count_calls_by_status())
+
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,188 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import AsyncIterator, List, Optional
+import codecs
+
+from app.core.database import get_db, get_async_db, SessionLocal
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.models.reanalysis_run import ReanalysisRun, ReanalysisMode, ReanalysisStatus
+from app.schemas.reanalysis import ReanalysisCreate, ReanalysisRunResponse
+from app.services.reanalysis import create_run, batch_request_lines, ingest_batch_results
+
+router = APIRouter()
+
+# Uploaded batch results are read in chunks of this size
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+def _get_run_or_404(db: Session, run_id: int) -> ReanalysisRun:
+    run = db.query(ReanalysisRun).filter(ReanalysisRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Re-analysis run not found")
+    return run
+
+
+def _check_batch_run(run: Optional[ReanalysisRun]) -> ReanalysisRun:
+    if not run:
+        raise HTTPException(status_code=404, detail="Re-analysis run not found")
+    if run.mode != ReanalysisMode.BATCH:
+        raise HTTPException(status_code=400, detail="Not a batch run")
+    if run.status in (ReanalysisStatus.DONE, ReanalysisStatus.CANCELLED):
+        raise HTTPException(status_code=400, detail=f"Run is {run.status.value}")
+    return run
+
+
+def _get_batch_run_or_400(db: Session, run_id: int) -> ReanalysisRun:
+    return _check_batch_run(db.get(ReanalysisRun, run_id))
+
+
+async def _upload_lines(file: UploadFile) -> AsyncIterator[str]:
+    """Lines of an uploaded UTF-8 file; spooled uploads are read off the event loop"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    tail = ""
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        *lines, tail = (tail + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+@router.post("/admin/reanalysis", response_model=ReanalysisRunResponse)
+def create_reanalysis_run(
+    run_data: ReanalysisCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Re-analyze completed calls matching the filter.
+    Online runs are picked up by the analysis workers; batch runs are exported
+    with GET .../batch-requests and finished with POST .../batch-results.
+    """
+    if run_data.date_from and run_data.date_to and run_data.date_from > run_data.date_to:
+        raise HTTPException(status_code=400, detail="date_from is after date_to")
+
+    run = create_run(db, **run_data.model_dump())
+    print(f"[Reanalysis] Run {run.id} created ({run.mode.value}): {run.total_calls} calls")
+    return run
+
+
+@router.get("/admin/reanalysis", response_model=List[ReanalysisRunResponse])
+def list_reanalysis_runs(
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return db.query(ReanalysisRun).order_by(ReanalysisRun.id.desc()).offset(skip).limit(limit).all()
+
+
+@router.get("/admin/reanalysis/{run_id}", response_model=ReanalysisRunResponse)
+def get_reanalysis_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Run progress (processed/changed/failed of total_calls)"""
+    return _get_run_or_404(db, run_id)
+
+
+@router.post("/admin/reanalysis/{run_id}/pause", response_model=ReanalysisRunResponse)
+def pause_reanalysis_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stop after the current page; the checkpoint is kept"""
+    run = _get_run_or_404(db, run_id)
+    if run.status not in (ReanalysisStatus.PENDING, ReanalysisStatus.RUNNING):
+        raise HTTPException(status_code=400, detail=f"Run is {run.status.value}")
+
+    run.status = ReanalysisStatus.PAUSED
+    run.locked_by = None
+    run.locked_at = None
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+@router.post("/admin/reanalysis/{run_id}/resume", response_model=ReanalysisRunResponse)
+def resume_reanalysis_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Continue a paused (or failed) run from its checkpoint"""
+    run = _get_run_or_404(db, run_id)
+    if run.status not in (ReanalysisStatus.PAUSED, ReanalysisStatus.FAILED):
+        raise HTTPException(status_code=400, detail=f"Run is {run.status.value}")
+
+    run.status = ReanalysisStatus.PENDING
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+@router.post("/admin/reanalysis/{run_id}/cancel", response_model=ReanalysisRunResponse)
+def cancel_reanalysis_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Calls already re-analyzed keep their new results"""
+    run = _get_run_or_404(db, run_id)
+    if run.status in (ReanalysisStatus.DONE, ReanalysisStatus.CANCELLED):
+        raise HTTPException(status_code=400, detail=f"Run is {run.status.value}")
+
+    run.status = ReanalysisStatus.CANCELLED
+    run.locked_by = None
+    run.locked_at = None
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+@router.get("/admin/reanalysis/{run_id}/batch-requests")
+def export_batch_requests(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """OpenAI Batch API input file (JSONL) for a batch run"""
+    _get_batch_run_or_400(db, run_id)
+
+    def lines():
+        # Own session: the request's session is closed before the body is streamed
+        export_db = SessionLocal()
+        try:
+            yield from batch_request_lines(export_db, export_db.get(ReanalysisRun, run_id))
+        finally:
+            export_db.close()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="reanalysis-{run_id}-requests.jsonl"'}
+    )
+
+
+@router.post("/admin/reanalysis/{run_id}/batch-results", response_model=ReanalysisRunResponse)
+async def ingest_batch_results_file(
+    run_id: int,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Apply an OpenAI Batch API output file (JSONL) to the run's calls"""
+    _check_batch_run(await db.get(ReanalysisRun, run_id))
+    # Counters are committed by the ingest in its own sessions
+    await db.rollback()
+
+    totals = await ingest_batch_results(run_id, _upload_lines(file))
+    print(f"[Reanalysis] Run {run_id}: ingested batch results {totals}")
+
+    return await db.get(ReanalysisRun, run_id, populate_existing=True)
@@ -0,0 +1,103 @@
+"""
+Verified token -> user principal cache for get_current_user.
+
+A hit costs neither a JWT decode nor a users query, so the dashboard's
+parallel requests authenticate from memory. Entries live
+AUTH_CACHE_TTL_SECONDS (never past the token's exp) and are dropped as soon
+as the user changes: a trigger on users notifies USER_EVENTS_CHANNEL on
+deactivation, password change or delete, and every API process evicts that
+user's tokens (LISTEN connection of app.services.call_events).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+from app.models.user import User
+
+
+def principal(user: User) -> User:
+    """Session-independent copy of the user without the password hash"""
+    return User(id=user.id, username=user.username, is_active=user.is_active)
+
+
+class PrincipalCache:
+    """Bounded LRU with TTL; safe to use from the request threadpool"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[User, float]] = OrderedDict()
+        self._tokens_by_user: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation: a lookup that raced with one is not stored
+        self.generation = 0
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(token)
+                self.counters["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                self._drop(token)
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, token: str, user: User, expires_at: Optional[float], generation: int):
+        """Caches the user verified for the token (expires_at: the token's exp, unix time)"""
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        ttl = self.ttl_seconds
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._drop(token)
+            self._entries[token] = (principal(user), time.monotonic() + ttl)
+            self._tokens_by_user.setdefault(user.username, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.counters["evictions"] += 1
+
+    def invalidate_user(self, username: str):
+        with self._lock:
+            self.generation += 1
+            self.counters["invalidations"] += 1
+            for token in self._tokens_by_user.pop(username, set()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        """Everything is re-verified (e.g. user events may have been missed while LISTEN was down)"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0].username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].username]
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
@@ -0,0 +1,162 @@
+"""
+Prometheus metrics of the API, the call pipeline and its external dependencies.
+
+Scraped from GET /metrics (API) and from WORKER_METRICS_PORT (app.worker).
+Supervisors that start several processes (app.server, app.worker) call
+`setup_multiprocess` first: every process then writes its samples under
+METRICS_MULTIPROC_DIR and the scrape sums them, so counters and histograms
+cover all workers whichever one answers.
+
+calls_by_status is counted in Postgres by GET /metrics (at most every
+METRICS_STATUS_REFRESH_SECONDS), so it is the same whichever process answers.
+"""
+import os
+import shutil
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# Local work (handlers, DB pool) vs slow external APIs
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EXTERNAL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0)
+# Time spent in a call status: seconds (analysis) to the whole conversation
+STAGE_BUCKETS = (0.05, 0.25, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 900.0, 1800.0, 3600.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "halo_http_request_duration_seconds",
+    "Time from request to response headers, by route template",
+    ["method", "route", "status"],
+    buckets=FAST_BUCKETS,
+)
+VOXIMPLANT_REQUEST_SECONDS = Histogram(
+    "halo_voximplant_request_duration_seconds",
+    "Voximplant Management API requests",
+    ["operation", "outcome"],
+    buckets=EXTERNAL_BUCKETS,
+)
+VOXIMPLANT_ERRORS = Counter(
+    "halo_voximplant_errors_total",
+    "Failed Voximplant Management API requests",
+    ["operation", "reason"],
+)
+UPSTREAM_RETRIES = Counter(
+    "halo_upstream_retries_total",
+    "Outbound HTTP requests retried (app.services.http_client)",
+    ["upstream"],
+)
+UPSTREAM_CIRCUIT_OPENED = Counter(
+    "halo_upstream_circuit_opened_total",
+    "Times an upstream's circuit breaker opened",
+    ["upstream"],
+)
+OPENAI_ANALYSIS_SECONDS = Histogram(
+    "halo_openai_analysis_duration_seconds",
+    "analyze_conversation OpenAI requests (including the validation retry); cache hits are not counted",
+    ["outcome"],
+    buckets=EXTERNAL_BUCKETS,
+)
+OPENAI_TOKENS = Counter(
+    "halo_openai_tokens_total",
+    "OpenAI analysis token usage; cached is the part of input served from the prompt cache",
+    ["kind"],
+)
+CALL_STAGE_SECONDS = Histogram(
+    "halo_call_stage_duration_seconds",
+    "Time a call spent in a status before moving on (queued/initiating count from created_at)",
+    ["stage"],
+    buckets=STAGE_BUCKETS,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "halo_db_pool_checkout_seconds",
+    "Wait for a pooled database connection (including opening a new one)",
+    ["engine"],
+    buckets=FAST_BUCKETS,
+)
+
+
+def setup_multiprocess(path: str):
+    """Called by a supervisor before it starts its processes; samples of the previous run are dropped"""
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ[MULTIPROC_ENV] = path
+
+
+def exposition_registry() -> CollectorRegistry:
+    if not os.environ.get(MULTIPROC_ENV):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class HTTPMetricsMiddleware:
+    """ASGI middleware: handler latency up to the response start, so streams (SSE) are not timed to their end"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: int):
+            nonlocal observed
+            observed = True
+            route = scope.get("route")
+            # Route templates only: raw paths (ids, phone numbers) would make a series per URL
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), str(status)
+            ).observe(time.perf_counter() - started)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not observed:
+                observe(500)
+            raise
+
+
+class CallStatusCollector:
+    """calls_by_status gauge, counted by GET /metrics"""
+
+    def __init__(self):
+        self.counts: dict[str, int] = {}
+        self.refreshed_at: Optional[float] = None
+
+    def is_stale(self, max_age: float) -> bool:
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at >= max_age
+
+    def update(self, counts: dict[str, int]):
+        self.counts = counts
+        self.refreshed_at = time.monotonic()
+
+    def collect(self):
+        gauge = GaugeMetricFamily("halo_calls_by_status", "Calls in each status", labels=["status"])
+        for status, count in self.counts.items():
+            gauge.add_metric([status], count)
+        yield gauge
+
+
+call_status_collector = CallStatusCollector()
+_call_status_registry = CollectorRegistry(auto_describe=False)
+_call_status_registry.register(call_status_collector)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Text exposition of every process's metrics plus calls_by_status"""
+    body = generate_latest(exposition_registry()) + generate_latest(_call_status_registry)
+    return body, CONTENT_TYPE_LATEST
@@ -0,0 +1,74 @@
+"""
+Database schema setup, run once per deploy before API and worker processes start:
+
+    python -m app.core.schema
+
+An empty database gets every table from the models (with their extensions and
+triggers) and is stamped with the latest alembic revision; an existing one is
+migrated with `alembic upgrade head`. Either way the calls partitions of the
+current and upcoming months are created (app.services.call_partitions). A
+Postgres advisory lock makes concurrent runs (several containers starting at
+once) wait for each other.
+
+API processes no longer touch the schema on import, so any number of uvicorn
+workers can start at the same time.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, inspect, select
+
+from app.core.database import Base, engine
+from app.models.user import User  # noqa: F401 - every model must be imported for create_all
+from app.models.call import Call  # noqa: F401
+from app.models.inbound_config import InboundConfig  # noqa: F401
+from app.models.campaign import Campaign  # noqa: F401
+from app.models.analysis_job import AnalysisJob  # noqa: F401
+from app.models.call_stats import CallStatsDaily  # noqa: F401
+from app.models.analysis_cache import AnalysisCacheEntry  # noqa: F401
+from app.models.reanalysis_run import ReanalysisRun  # noqa: F401
+from app.models.transcript_ingest import TranscriptIngestEntry  # noqa: F401
+from app.models.call_turn import CallTurn  # noqa: F401
+from app.models.prompt_template import PromptTemplate  # noqa: F401
+from app.services.call_partitions import ensure_partitions
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pg_advisory_lock key of the schema setup
+SCHEMA_LOCK_ID = 4_186_001
+
+
+def alembic_config() -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    return config
+
+
+def setup_schema() -> str:
+    """Creates or migrates the schema; returns what was done"""
+    # Autocommit: the lock connection must not hold a transaction open while
+    # migrations build indexes CONCURRENTLY
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(select(func.pg_advisory_lock(SCHEMA_LOCK_ID)))
+        try:
+            with engine.begin() as conn:
+                tables = set(inspect(conn).get_table_names())
+                fresh = not tables & {"alembic_version", "calls"}
+                if fresh:
+                    Base.metadata.create_all(conn)
+
+            if fresh:
+                command.stamp(alembic_config(), "head")
+            else:
+                command.upgrade(alembic_config(), "head")
+
+            with engine.begin() as conn:
+                ensure_partitions(conn)
+            return "created" if fresh else "migrated"
+        finally:
+            lock_conn.execute(select(func.pg_advisory_unlock(SCHEMA_LOCK_ID)))
+
+
+if __name__ == "__main__":
+    print(f"[Schema] Database schema {setup_schema()}")
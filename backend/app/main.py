@@ -1,16 +1,39 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api import auth, calls, inbound
+from app.api import auth, calls, inbound, campaigns, reanalysis, metrics
+from app.core.metrics import HTTPMetricsMiddleware
+from app.services.dialer import campaign_dialer
+from app.services.call_events import call_event_broker
+from app.core.auth_cache import principal_cache
+from app.models.user import USER_EVENTS_CHANNEL
+from app.models.inbound_config import INBOUND_CONFIG_CHANNEL
+from app.services.inbound_config_cache import inbound_config_cache
+from app.services.http_client import close_http_clients
+
+# The schema is created / migrated by `python -m app.core.schema` before the
+# server starts, never on import: several worker processes import this module at once
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    call_event_broker.listen(USER_EVENTS_CHANNEL, principal_cache.invalidate_user, principal_cache.clear)
+    call_event_broker.listen(INBOUND_CONFIG_CHANNEL, inbound_config_cache.invalidate, inbound_config_cache.on_connect)
+    await call_event_broker.start()
+    if settings.DIALER_ENABLED:
+        await campaign_dialer.start()
+    yield
+    await campaign_dialer.stop()
+    await call_event_broker.stop()
+    await close_http_clients()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="HALO AI API",
     description="AI-powered call automation platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -20,13 +43,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(HTTPMetricsMiddleware)
 
 # Include routers
 # Note: nginx already adds /api prefix, so we don't add it here
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(calls.router, prefix="", tags=["calls"])
 app.include_router(inbound.router, prefix="", tags=["inbound"])
+app.include_router(campaigns.router, prefix="", tags=["campaigns"])
+app.include_router(reanalysis.router, prefix="", tags=["admin"])
+app.include_router(metrics.router, prefix="", tags=["monitoring"])
 
 
 @app.get("/")
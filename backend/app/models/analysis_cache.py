@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AnalysisCacheEntry(Base):
+    """Кэш результатов LLM-анализа: ключ = sha256(модель, промпт, цель воронки, транскрипт, версия схемы)"""
+    __tablename__ = "analysis_cache"
+
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    result = Column(JSONB, nullable=False)
+
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
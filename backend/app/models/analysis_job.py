@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Enum, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class AnalysisJob(Base):
+    """Задача анализа транскрипта; выполняется отдельным воркером (app.worker)"""
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        # Claim query: WHERE status = 'PENDING' AND run_after <= now() ORDER BY run_after
+        Index("ix_analysis_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # calls.id; no foreign key to the partitioned calls table - jobs are deleted with archived calls
+    call_id = Column(Integer, nullable=False, index=True)
+
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    # Worker lease
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
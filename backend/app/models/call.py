@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Enum, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Enum, Boolean, ForeignKey, Index, Computed, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.prompt_template import template_text
 import enum
 
 
 class CallStatus(str, enum.Enum):
+    QUEUED = "queued"  # Ждёт свободного слота в дозвонщике кампании
     INITIATING = "initiating"
     CALLING = "calling"
     ANALYZING = "analyzing"
@@ -30,19 +34,60 @@ class CRMStatus(str, enum.Enum):
     NOT_CREATED = "not_created"
 
 
+# Full-text document of a call for GET /calls/search (Russian stemming):
+# summary (A) ranks above customer_interest (B) above the transcript (C)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian'::regconfig, coalesce(summary, '')), 'A')"
+    " || setweight(to_tsvector('russian'::regconfig, coalesce(customer_interest, '')), 'B')"
+    " || setweight(to_tsvector('russian'::regconfig, coalesce(transcript, '')), 'C')"
+)
+
+
+# Deferred groups: greeting_message, prompt and funnel_goal; transcript and the analysis texts
+PROMPT_TEXTS = "prompt_texts"
+CALL_TEXTS = "call_texts"
+
+
 class Call(Base):
     __tablename__ = "calls"
-
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # Keyset pagination of GET /calls: ORDER BY created_at DESC, id DESC (+ filters)
+        Index("ix_calls_created_at_id", "created_at", "id"),
+        Index("ix_calls_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_calls_disposition_created_at_id", "disposition", "created_at", "id"),
+        Index("ix_calls_language_created_at_id", "language", "created_at", "id"),
+        Index("ix_calls_tts_provider_created_at_id", "tts_provider", "created_at", "id"),
+        # Transcript webhook lookups (not unique: a unique index must include created_at)
+        Index("ix_calls_call_id", "call_id"),
+        Index("ix_calls_voximplant_call_id", "voximplant_call_id"),
+        # GET /calls/search: full-text, and substring via pg_trgm
+        Index("ix_calls_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_calls_transcript_trgm", "transcript", postgresql_using="gin", postgresql_ops={"transcript": "gin_trgm_ops"}),
+        Index("ix_calls_summary_trgm", "summary", postgresql_using="gin", postgresql_ops={"summary": "gin_trgm_ops"}),
+        Index(
+            "ix_calls_customer_interest_trgm", "customer_interest",
+            postgresql_using="gin", postgresql_ops={"customer_interest": "gin_trgm_ops"}
+        ),
+        # A partition per month, managed by app/services/call_partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    # Table key is (id, created_at) - partitions require the partition key in it; the ORM identity is id
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
     # Call info
     phone_number = Column(String, nullable=False)
     language = Column(String, nullable=False)  # ru, uz, tj, auto
     tts_provider = Column(String, nullable=False, default="elevenlabs")  # elevenlabs, openai, yandex
     voice = Column(String, nullable=False)  # Voice ID or name
-    greeting_message = Column(Text, nullable=False)
-    prompt = Column(Text, nullable=False)
-    funnel_goal = Column(Text, nullable=False)  # Цель звонка (воронка)
+    # Texts live once in prompt_templates (app/services/prompt_registry.py), calls keep their ids
+    greeting_template_id = Column(Integer, ForeignKey("prompt_templates.id"), nullable=False)
+    prompt_template_id = Column(Integer, ForeignKey("prompt_templates.id"), nullable=False)
+    funnel_goal_template_id = Column(Integer, ForeignKey("prompt_templates.id"), nullable=False)
+    # Read-only texts by id, not loaded with the call: undefer_group(PROMPT_TEXTS) where they are needed
+    greeting_message = template_text(greeting_template_id, deferred=True, group=PROMPT_TEXTS)
+    prompt = template_text(prompt_template_id, deferred=True, group=PROMPT_TEXTS)
+    funnel_goal = template_text(funnel_goal_template_id, deferred=True, group=PROMPT_TEXTS)  # Цель звонка (воронка)
 
     # Voice settings
     stability = Column(Float, nullable=True)  # ElevenLabs only
@@ -52,6 +97,10 @@ class Call(Base):
     # Status tracking
     status = Column(Enum(CallStatus), default=CallStatus.INITIATING)
 
+    # Campaign (null for single calls created via POST /calls and inbound calls)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id", ondelete="CASCADE"), nullable=True, index=True)
+    dialed_at = Column(DateTime(timezone=True), nullable=True)
+
     # Call internal id
     call_id = Column(String, nullable=True)
 
@@ -60,18 +109,40 @@ class Call(Base):
     duration = Column(Float, nullable=True)  # in seconds
     disposition = Column(Enum(DispositionType), nullable=True)
 
-    # AI Analysis
-    transcript = Column(Text, nullable=True)
-    summary = Column(Text, nullable=True)
-    followup_message = Column(Text, nullable=True)
-    customer_interest = Column(Text, nullable=True)
+    # AI Analysis; the texts are not loaded with the call: undefer(...) / undefer_group(CALL_TEXTS)
+    transcript = deferred(Column(Text, nullable=True), group=CALL_TEXTS)
+    summary = deferred(Column(Text, nullable=True), group=CALL_TEXTS)
+    followup_message = deferred(Column(Text, nullable=True), group=CALL_TEXTS)
+    customer_interest = deferred(Column(Text, nullable=True), group=CALL_TEXTS)
     funnel_achieved = Column(Boolean, nullable=True)  # Достигнута ли цель воронки
 
+    # OpenAI usage of the analysis request (null if the result came from the analysis cache)
+    analysis_input_tokens = Column(Integer, nullable=True)
+    analysis_cached_tokens = Column(Integer, nullable=True)  # part of input served from OpenAI's prompt cache
+    analysis_output_tokens = Column(Integer, nullable=True)
+
+    # Search document, kept up to date by Postgres; not loaded with the call
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
     # CRM
     crm_status = Column(Enum(CRMStatus), default=CRMStatus.PENDING)
     telegram_link_sent = Column(Boolean, default=False)
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Stage timestamps (когда звонок перешёл в статус), see app/services/call_state.py
+    calling_at = Column(DateTime(timezone=True), nullable=True)
+    analyzing_at = Column(DateTime(timezone=True), nullable=True)
+    preparing_followup_at = Column(DateTime(timezone=True), nullable=True)
+    sending_sms_at = Column(DateTime(timezone=True), nullable=True)
+    adding_to_crm_at = Column(DateTime(timezone=True), nullable=True)
+    failed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# gin_trgm_ops indexes above need the extension on a fresh database
+event.listen(Call.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, Float, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class CallStatsDaily(Base):
+    """Дневные агрегаты воронки по завершённым звонкам (день = created_at звонка, UTC)"""
+    __tablename__ = "call_stats_daily"
+
+    day = Column(Date, primary_key=True)
+
+    # Funnel
+    called = Column(Integer, nullable=False, default=0)
+    talked = Column(Integer, nullable=False, default=0)
+    interested = Column(Integer, nullable=False, default=0)
+    lead = Column(Integer, nullable=False, default=0)
+
+    # Duration (avg = duration_sum / duration_count)
+    duration_sum = Column(Float, nullable=False, default=0.0)
+    duration_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
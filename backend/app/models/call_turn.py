@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Float, Text, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from app.core.database import Base
+
+
+class CallTurn(Base):
+    """Реплика транскрипта звонка: кто говорил, что и когда (секунды от начала звонка)"""
+    __tablename__ = "call_turns"
+    __table_args__ = (
+        Index("ux_call_turns_call_id_position", "call_id", "position", unique=True),
+        Index("ix_call_turns_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # calls.id; no foreign key to the partitioned calls table - turns are archived with their calls
+    call_id = Column(Integer, nullable=False)
+
+    position = Column(Integer, nullable=False)  # 0-based order in the transcript
+    speaker = Column(String, nullable=False)  # agent, customer or the raw label
+    text = Column(Text, nullable=False)
+    offset_seconds = Column(Float, nullable=True)  # null for plain "Speaker: text" lines
+
+    # Search by speaker in GET /calls/search; kept up to date by Postgres
+    search_vector = deferred(Column(TSVECTOR, Computed("to_tsvector('russian'::regconfig, text)", persisted=True)))
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Enum
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+
+class CampaignStatus(str, enum.Enum):
+    DRAFT = "draft"
+    RUNNING = "running"
+    PAUSED = "paused"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+
+class Campaign(Base):
+    """Массовая исходящая кампания: один промпт/голос на много номеров"""
+    __tablename__ = "campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+
+    # Call settings shared by every call in the campaign
+    language = Column(String, nullable=False)  # ru, uz, tj, auto
+    tts_provider = Column(String, nullable=False, default="elevenlabs")  # elevenlabs, openai, yandex
+    voice = Column(String, nullable=False)
+    greeting_message = Column(Text, nullable=False)
+    prompt = Column(Text, nullable=False)
+    funnel_goal = Column(Text, nullable=False)
+
+    # Voice settings
+    stability = Column(Float, nullable=True)
+    speed = Column(Float, nullable=True)
+    similarity_boost = Column(Float, nullable=True)
+
+    # Dialer settings
+    max_concurrent_calls = Column(Integer, nullable=False, default=5)
+
+    # Status tracking
+    status = Column(Enum(CampaignStatus), nullable=False, default=CampaignStatus.DRAFT)
+    total_calls = Column(Integer, nullable=False, default=0)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
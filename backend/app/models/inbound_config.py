@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, DDL, event
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.prompt_template import template_text
 
 
 class InboundConfig(Base):
@@ -13,10 +14,13 @@ class InboundConfig(Base):
     language = Column(String, default="ru")  # ru, uz, tj, auto
     voice = Column(String, default="3EuKHIEZbSzrHGNmdYsx")  # ElevenLabs voice ID
 
-    # Сообщения и промпт
-    greeting_message = Column(Text, default="Здравствуйте! Чем могу помочь?")
-    prompt = Column(Text, default="Ты - полезный ассистент. Помогай клиентам с их вопросами.")
-    funnel_goal = Column(Text, default="Помочь клиенту решить его вопрос")
+    # Сообщения и промпт: тексты в prompt_templates (app/services/prompt_registry.py), здесь их id
+    greeting_template_id = Column(Integer, ForeignKey("prompt_templates.id"), nullable=False)
+    prompt_template_id = Column(Integer, ForeignKey("prompt_templates.id"), nullable=False)
+    funnel_goal_template_id = Column(Integer, ForeignKey("prompt_templates.id"), nullable=False)
+    greeting_message = template_text(greeting_template_id)
+    prompt = template_text(prompt_template_id)
+    funnel_goal = template_text(funnel_goal_template_id)
 
     # Активность конфига
     is_active = Column(Boolean, default=True)
@@ -24,3 +28,22 @@ class InboundConfig(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# Any change of inbound configs: API processes drop their cached copy (app.services.inbound_config_cache)
+INBOUND_CONFIG_CHANNEL = "inbound_config"
+
+INBOUND_CONFIG_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_inbound_config_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{INBOUND_CONFIG_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inbound_configs_notify_change
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON inbound_configs
+FOR EACH STATEMENT EXECUTE FUNCTION notify_inbound_config_change();
+"""
+
+event.listen(InboundConfig.__table__, "after_create", DDL(INBOUND_CONFIG_TRIGGER_SQL))
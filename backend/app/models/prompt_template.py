@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, select
+from sqlalchemy.orm import column_property
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PromptTemplate(Base):
+    """Реестр текстов промптов, приветствий и целей воронки: одна строка на уникальный текст, ключ = sha256"""
+    __tablename__ = "prompt_templates"
+
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String(64), nullable=False, unique=True)
+    content = Column(Text, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+def template_text(template_id: Column, deferred: bool = False, group: str = None):
+    """Read-only text of the template referenced by `template_id`, for the referencing model"""
+    return column_property(
+        select(PromptTemplate.content)
+        .where(PromptTemplate.id == template_id)
+        .correlate_except(PromptTemplate)
+        .scalar_subquery(),
+        deferred=deferred,
+        group=group,
+    )
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Enum
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.call import DispositionType
+import enum
+
+
+class ReanalysisStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    PAUSED = "paused"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+
+
+class ReanalysisMode(str, enum.Enum):
+    ONLINE = "online"  # воркеры анализа, ограниченная параллельность
+    BATCH = "batch"  # JSONL для OpenAI Batch API (export -> ingest)
+
+
+class ReanalysisRun(Base):
+    """Повторный анализ завершённых звонков по фильтру; прогресс сохраняется (last_call_id), запуск можно продолжить"""
+    __tablename__ = "reanalysis_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    mode = Column(Enum(ReanalysisMode), nullable=False, default=ReanalysisMode.ONLINE)
+    status = Column(Enum(ReanalysisStatus), nullable=False, default=ReanalysisStatus.PENDING)
+
+    # Filter (calls in COMPLETED with a transcript, created in [date_from, date_to] UTC)
+    date_from = Column(Date, nullable=True)
+    date_to = Column(Date, nullable=True)
+    disposition = Column(Enum(DispositionType), nullable=True)
+    language = Column(String, nullable=True)
+
+    concurrency = Column(Integer, nullable=False, default=2)
+
+    # Progress; calls are processed by ascending id, everything <= last_call_id is done
+    total_calls = Column(Integer, nullable=False, default=0)
+    processed_calls = Column(Integer, nullable=False, default=0)
+    changed_calls = Column(Integer, nullable=False, default=0)  # disposition changed
+    failed_calls = Column(Integer, nullable=False, default=0)
+    last_call_id = Column(Integer, nullable=False, default=0)
+
+    # Worker lease (online mode)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
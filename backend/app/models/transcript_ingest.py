@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class TranscriptIngestEntry(Base):
+    """Журнал входящих вебхуков с транскриптом: сырой payload + ключ идемпотентности"""
+    __tablename__ = "transcript_ingest_log"
+    __table_args__ = (
+        # Replay of unprocessed deliveries: fewest attempts first, then oldest
+        Index("ix_transcript_ingest_log_pending", "attempts", "id", postgresql_where=text("processed_at IS NULL")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, nullable=False, unique=True)
+
+    # Voximplant call_id from the payload, and the call it was applied to
+    external_call_id = Column(String, nullable=True)
+    call_ref_id = Column(Integer, nullable=True)  # calls.id, reset when the call is archived
+
+    payload = Column(Text, nullable=False)  # request body as received
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    error = Column(Text, nullable=True)
+    # Failed processing attempts; at TRANSCRIPT_MAX_ATTEMPTS the replay leaves the delivery alone
+    attempts = Column(Integer, nullable=False, default=0)
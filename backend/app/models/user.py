@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, String, Boolean, DDL, event
 from app.core.database import Base
 
 
@@ -9,3 +9,23 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
+
+
+# Deactivation, password change, rename or delete of a user, from any process or psql:
+# API processes drop the user's cached tokens (app.core.auth_cache)
+USER_EVENTS_CHANNEL = "user_events"
+
+USER_EVENTS_TRIGGER_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_user_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{USER_EVENTS_CHANNEL}', OLD.username);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_notify_change
+AFTER UPDATE OF is_active, hashed_password, username OR DELETE ON users
+FOR EACH ROW EXECUTE FUNCTION notify_user_change();
+"""
+
+event.listen(User.__table__, "after_create", DDL(USER_EVENTS_TRIGGER_SQL))
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import Optional
+from app.models.call import DispositionType, CRMStatus
+
+
+class CallAnalysis(BaseModel):
+    """LLM analysis of a call; also the strict JSON schema of the OpenAI request"""
+    disposition: DispositionType
+    summary: str
+    followup_message: str
+    customer_interest: str
+    crm_status: CRMStatus
+    funnel_achieved: Optional[bool]  # null when the call has no funnel goal
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import Optional
+from typing import Any, List, Optional
 from app.models.call import CallStatus, DispositionType, CRMStatus
 
 
@@ -42,12 +42,23 @@ class CallResponse(BaseModel):
     followup_message: Optional[str] = None
     customer_interest: Optional[str] = None
     funnel_achieved: Optional[bool] = None
+    analysis_input_tokens: Optional[int] = None
+    analysis_cached_tokens: Optional[int] = None
+    analysis_output_tokens: Optional[int] = None
     crm_status: CRMStatus
     telegram_link_sent: bool
     created_at: datetime
     updated_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
 
+    # Stage timestamps
+    calling_at: Optional[datetime] = None
+    analyzing_at: Optional[datetime] = None
+    preparing_followup_at: Optional[datetime] = None
+    sending_sms_at: Optional[datetime] = None
+    adding_to_crm_at: Optional[datetime] = None
+    failed_at: Optional[datetime] = None
+
     class Config:
         from_attributes = True
 
@@ -65,9 +76,42 @@ class CallListItem(BaseModel):
         from_attributes = True
 
 
+class CallTurnResponse(BaseModel):
+    position: int
+    speaker: str  # agent, customer or the raw label
+    text: str
+    offset_seconds: Optional[float] = None  # seconds from the start of the call
+
+    class Config:
+        from_attributes = True
+
+
+class CallSearchResult(CallListItem):
+    summary: Optional[str] = None
+    customer_interest: Optional[str] = None
+    matched_turns: List[CallTurnResponse] = []  # first turns that match the query
+
+
 class CallAnalytics(BaseModel):
     total_calls: int
     talk_rate: float  # percentage
     interest_rate: float  # percentage
     avg_duration: float  # seconds
     funnel: dict  # {called: int, talked: int, interested: int, lead: int}
+
+
+class TranscriptWebhook(BaseModel):
+    """Payload of POST /call-transcript sent by the Voximplant scenario"""
+    call_id: Optional[str] = None
+    phone: Optional[str] = None
+    duration_seconds: Optional[float] = 0
+    transcript: List[Any] = []  # {speaker, text, offset} turns or "Агент: ..." lines
+    raw_text: Optional[str] = ""
+
+    @field_validator("raw_text", mode="before")
+    @classmethod
+    def join_lines(cls, value):
+        # Older scenarios send raw_text as the same list of lines
+        if isinstance(value, list):
+            return "\n".join(str(line) for line in value)
+        return value
@@ -0,0 +1,70 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional
+from app.models.campaign import CampaignStatus
+
+
+class CampaignCreate(BaseModel):
+    name: str
+    language: str  # ru, uz, tj, auto
+    tts_provider: str = "elevenlabs"  # elevenlabs, openai, yandex
+    voice: str
+    greeting_message: str
+    prompt: str
+    funnel_goal: str
+    # Voice settings
+    stability: Optional[float] = 0.5
+    speed: Optional[float] = 1.0
+    similarity_boost: Optional[float] = 0.75
+    # Dialer settings
+    max_concurrent_calls: int = Field(default=5, ge=1)
+
+
+class CampaignResponse(BaseModel):
+    id: int
+    name: str
+    language: str
+    tts_provider: str
+    voice: str
+    greeting_message: str
+    prompt: str
+    funnel_goal: str
+    stability: Optional[float] = None
+    speed: Optional[float] = None
+    similarity_boost: Optional[float] = None
+    max_concurrent_calls: int
+    status: CampaignStatus
+    total_calls: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class CampaignListItem(BaseModel):
+    id: int
+    name: str
+    status: CampaignStatus
+    total_calls: int
+    max_concurrent_calls: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class CampaignUploadResult(BaseModel):
+    campaign_id: int
+    inserted: int
+    skipped: int  # empty, malformed or duplicate numbers
+    total_calls: int
+
+
+class CampaignProgress(BaseModel):
+    campaign_id: int
+    status: CampaignStatus
+    total_calls: int
+    by_status: dict  # {call_status: count}
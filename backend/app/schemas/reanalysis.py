@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Optional
+from app.models.call import DispositionType
+from app.models.reanalysis_run import ReanalysisMode, ReanalysisStatus
+
+
+class ReanalysisCreate(BaseModel):
+    mode: ReanalysisMode = ReanalysisMode.ONLINE
+    # Filter
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    disposition: Optional[DispositionType] = None
+    language: Optional[str] = None
+    concurrency: Optional[int] = Field(default=None, ge=1, le=32)
+
+
+class ReanalysisRunResponse(BaseModel):
+    id: int
+    mode: ReanalysisMode
+    status: ReanalysisStatus
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    disposition: Optional[DispositionType] = None
+    language: Optional[str] = None
+    concurrency: int
+    total_calls: int
+    processed_calls: int
+    changed_calls: int
+    failed_calls: int
+    last_call_id: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
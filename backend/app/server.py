@@ -0,0 +1,55 @@
+"""
+Production API server: WEB_CONCURRENCY uvicorn worker processes on one port.
+
+    python -m app.core.schema          # once per deploy
+    python -m app.server               # WEB_CONCURRENCY workers
+    python -m app.server --workers 4
+
+Every worker has its own DB pools (DB_* settings), call event LISTEN
+connection, caches and campaign dialer; the dialer claims calls with row
+locks, and cache invalidations go through Postgres NOTIFY, so workers need no
+other coordination.
+
+SIGTERM/SIGINT: the supervisor stops accepting connections and forwards the
+signal; each worker finishes in-flight requests and their background tasks
+(transcript ingestion, call start) for up to SHUTDOWN_GRACE_SECONDS, then
+runs the lifespan shutdown (dialer drains its StartScenarios requests).
+Deliveries cut off after that are replayed from transcript_ingest_log by
+app.worker.
+
+With several workers, metrics are written under METRICS_MULTIPROC_DIR/api and
+GET /metrics (answered by any worker) reports all of them.
+"""
+import argparse
+import os
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.metrics import setup_multiprocess
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HALO AI API server")
+    parser.add_argument("--host", default=settings.WEB_HOST)
+    parser.add_argument("--port", type=int, default=settings.WEB_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Before the worker processes import the metrics
+        setup_multiprocess(os.path.join(settings.METRICS_MULTIPROC_DIR, "api"))
+
+    print(f"[Server] {args.workers} worker(s) on {args.host}:{args.port}")
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Transcript analysis pipeline: OpenAI analysis, follow-up, SMS flag and CRM status.
+Executed by the analysis worker (app.worker) for each queued AnalysisJob.
+Trivial calls (no answer, voicemail, busy, wrong number) are settled by the
+local pre-classifier (app.services.call_classifier) without OpenAI.
+
+The only slow step is the OpenAI request. Everything after it is applied in
+memory through the call state machine and written in a single commit, so a
+call goes ANALYZING -> COMPLETED in one transaction with every stage stamped.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import undefer, undefer_group
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.call import Call, CallStatus, DispositionType, CRMStatus, PROMPT_TEXTS
+from app.services.openai_service import openai_service
+from app.services.call_classifier import call_classifier, verdict_analysis
+from app.services.call_stats import record_completed_call
+from app.services.call_events import publish_call_status
+from app.services.call_state import transition
+
+
+def crm_status_for(disposition: DispositionType, analysis: dict) -> CRMStatus:
+    """Auto-determine CRM status based on disposition"""
+    crm_status_value = analysis.get("crm_status", "pending")
+
+    # Override: if interested, always add to CRM
+    if disposition == DispositionType.INTERESTED:
+        crm_status_value = "added"
+    # If no answer/busy/wrong number, don't create CRM entry
+    elif disposition in [DispositionType.NO_ANSWER, DispositionType.BUSY, DispositionType.WRONG_NUMBER]:
+        crm_status_value = "not_created"
+
+    return CRMStatus(crm_status_value)
+
+
+def apply_analysis_fields(call: Call, analysis: dict):
+    """Stores the model's verdict on the call (no status change)"""
+    call.summary = analysis.get("summary", "")
+    call.disposition = DispositionType(analysis.get("disposition", "no_answer"))
+    call.customer_interest = analysis.get("customer_interest", "")
+    call.funnel_achieved = analysis.get("funnel_achieved", None)
+    call.followup_message = analysis.get("followup_message", "")
+    call.crm_status = crm_status_for(call.disposition, analysis)
+
+
+def apply_usage(call: Call, usage: Optional[dict]):
+    """Stores the OpenAI token usage of the analysis (cleared for cached results)"""
+    usage = usage or {}
+    call.analysis_input_tokens = usage.get("input_tokens")
+    call.analysis_cached_tokens = usage.get("cached_tokens")
+    call.analysis_output_tokens = usage.get("output_tokens")
+
+
+def usage_summary(usage: Optional[dict]) -> str:
+    if not usage:
+        return "none"
+    uncached = usage["input_tokens"] - usage["cached_tokens"]
+    return f"in {usage['input_tokens']} (cached {usage['cached_tokens']}, uncached {uncached}), out {usage['output_tokens']}"
+
+
+def apply_analysis(call: Call, analysis: dict):
+    """Applies the analysis result and walks the call through the remaining stages to COMPLETED"""
+    now = datetime.utcnow()
+    apply_analysis_fields(call, analysis)
+
+    transition(call, CallStatus.PREPARING_FOLLOWUP, now)
+
+    # Sending SMS (if interested)
+    transition(call, CallStatus.SENDING_SMS, now)
+    if call.disposition == DispositionType.INTERESTED:
+        call.telegram_link_sent = True
+
+    transition(call, CallStatus.ADDING_TO_CRM, now)
+    transition(call, CallStatus.COMPLETED, now)
+
+
+async def process_transcript_analysis(call_id: int):
+    """
+    Process transcript analysis after receiving it from webhook.
+    Runs inside the analysis worker; errors are re-raised so the job is retried.
+
+    The inputs are read, the transaction ends, the call is analyzed, and the
+    result is applied under the call's row lock after re-checking it: a
+    redelivered transcript can queue a second job for the same call, and
+    only one of them may complete it.
+    """
+    async with AsyncSessionLocal() as bg_db:
+        call = await bg_db.get(Call, call_id, options=[undefer(Call.transcript), undefer_group(PROMPT_TEXTS)])
+        if not call:
+            return
+        if call.status == CallStatus.COMPLETED:
+            # Job re-delivered after the call was already finished (e.g. worker crash before ack)
+            print(f"[Analysis] Call {call_id} already completed, skipping")
+            return
+        transcript, duration = call.transcript, call.duration
+        prompt, funnel_goal = call.prompt, call.funnel_goal
+
+    print(f"[Analysis] Starting analysis for call {call_id}")
+
+    # No connection is held during the OpenAI request.
+    # No answer, voicemail, busy, wrong number: settled locally without an OpenAI request
+    verdict = call_classifier.settle(transcript, duration) if settings.PRECLASSIFIER_ENABLED else None
+    if verdict is not None:
+        print(f"[Analysis] Call {call_id} settled locally: {verdict['rule']} ({verdict['confidence']:.2f})")
+        analysis, usage = verdict_analysis(verdict, funnel_goal), None
+    else:
+        analysis, usage = await openai_service.analyze_conversation_with_usage(
+            transcript=transcript,
+            prompt=prompt,
+            funnel_goal=funnel_goal
+        )
+
+    async with AsyncSessionLocal() as bg_db:
+        try:
+            call = await bg_db.get(Call, call_id, options=[undefer(Call.transcript)], with_for_update=True)
+            if not call:
+                return
+            if call.status == CallStatus.COMPLETED:
+                print(f"[Analysis] Call {call_id} was completed by another job, result dropped")
+                return
+            if call.transcript != transcript:
+                # A newer transcript arrived meanwhile; its own job analyzes it
+                print(f"[Analysis] Call {call_id} transcript replaced during analysis, result dropped")
+                return
+
+            # Retry of a call that failed or was stored mid-pipeline: back to ANALYZING
+            if call.status != CallStatus.ANALYZING:
+                transition(call, CallStatus.ANALYZING)
+
+            apply_analysis(call, analysis)
+            apply_usage(call, usage)
+            await record_completed_call(bg_db, call)
+            await publish_call_status(bg_db, call)
+            await bg_db.commit()
+        except Exception as e:
+            print(f"[Analysis] Error for call {call_id}: {e}")
+            await bg_db.rollback()
+            raise
+
+    print(
+        f"[Analysis] Call {call_id} completed: {call.disposition}, CRM {call.crm_status}, "
+        f"tokens {usage_summary(usage)}"
+    )
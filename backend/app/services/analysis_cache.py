@@ -0,0 +1,115 @@
+"""
+Content-addressed cache of LLM conversation analyses.
+
+The key is sha256 over (model, prompt, funnel goal, normalized transcript,
+analysis version - a hash of the rubric and the result schema), so webhook redeliveries, manual re-runs and identical short
+transcripts ("no answer") reuse the stored result instead of calling OpenAI.
+
+Two tiers: a bounded in-process LRU and the analysis_cache table shared by all
+API and worker processes. Cache failures never fail an analysis - they count
+as a miss.
+"""
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analysis_cache import AnalysisCacheEntry
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_transcript(transcript: Optional[str]) -> str:
+    """Whitespace differences between deliveries must not change the key"""
+    return _WHITESPACE.sub(" ", transcript or "").strip()
+
+
+def analysis_cache_key(
+    model: str,
+    prompt: Optional[str],
+    funnel_goal: Optional[str],
+    transcript: Optional[str],
+    analysis_version: str
+) -> str:
+    material = json.dumps(
+        [model, prompt or "", funnel_goal or "", normalize_transcript(transcript), analysis_version],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self.counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+
+    def stats(self) -> dict:
+        lookups = self.counters["memory_hits"] + self.counters["db_hits"] + self.counters["misses"]
+        hits = self.counters["memory_hits"] + self.counters["db_hits"]
+        return {
+            **self.counters,
+            "memory_entries": len(self._memory),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    async def get(self, key: str) -> Optional[dict]:
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.counters["memory_hits"] += 1
+            return dict(result)
+
+        try:
+            async with AsyncSessionLocal() as db:
+                entry = await db.get(AnalysisCacheEntry, key)
+                if entry is not None:
+                    result = entry.result
+                    await db.execute(
+                        update(AnalysisCacheEntry).filter(AnalysisCacheEntry.key == key).values(
+                            hits=AnalysisCacheEntry.hits + 1, last_hit_at=datetime.utcnow()
+                        )
+                    )
+                    await db.commit()
+        except Exception as e:
+            print(f"[AnalysisCache] Read error: {e}")
+            self.counters["errors"] += 1
+
+        if result is None:
+            self.counters["misses"] += 1
+            return None
+
+        self.counters["db_hits"] += 1
+        self._remember(key, result)
+        return dict(result)
+
+    async def set(self, key: str, model: str, result: dict):
+        self._remember(key, result)
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    pg_insert(AnalysisCacheEntry)
+                    .values(key=key, model=model, result=result, hits=0)
+                    .on_conflict_do_nothing(index_elements=[AnalysisCacheEntry.key])
+                )
+                await db.commit()
+            self.counters["stores"] += 1
+        except Exception as e:
+            print(f"[AnalysisCache] Write error: {e}")
+            self.counters["errors"] += 1
+
+    def _remember(self, key: str, result: dict):
+        self._memory[key] = dict(result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+analysis_cache = AnalysisCache(settings.ANALYSIS_CACHE_MEMORY_SIZE)
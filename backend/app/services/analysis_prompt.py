@@ -0,0 +1,231 @@
+"""
+Analysis prompt builder.
+
+OpenAI reuses the longest prefix a request shares with recent ones (prompt
+caching, from 1024 tokens; cached input is cheaper and faster), so the messages
+go from the most to the least shared part:
+
+    system: role + rubric + output format   - identical for every call
+    user:   campaign prompt + funnel goal    - identical within a campaign
+            transcript                       - different for every call
+
+Oversized campaign prompts and transcripts are compacted (whitespace) and cut
+to ANALYSIS_PROMPT_MAX_TOKENS / ANALYSIS_TRANSCRIPT_MAX_TOKENS.
+"""
+import math
+import re
+from typing import Optional
+
+from app.core.config import settings
+
+ANALYSIS_RUBRIC = """Ты аналитик телефонных звонков продаж. Ты анализируешь запись телефонного звонка продаж: в сообщении даны оригинальный промпт звонка, цель воронки (если есть) и транскрипция. На их основе предоставь детальный анализ.
+
+Пожалуйста, проанализируй и предоставь следующее в формате JSON (ВСЕ ТЕКСТОВЫЕ ПОЛЯ ДОЛЖНЫ БЫТЬ НА РУССКОМ ЯЗЫКЕ):
+
+1. **disposition**: ВНИМАТЕЛЬНО определи статус по следующим критериям:
+
+"interested" — Клиент ПРОЯВИЛ ОСОЗНАННЫЙ ИНТЕРЕС
+
+Используется ТОЛЬКО ЕСЛИ выполнено хотя бы одно из условий ниже:
+
+• Клиент обсуждает продукт, услугу или свою задачу
+• Клиент отвечает на вопросы о бизнесе / потребностях
+• Клиент задаёт уточняющие вопросы  о цене, сроках, формате
+•  Клиент выражает сомнения или возражения (в т.ч. «дорого», «подумаю»)
+• Клиент согласился получить информацию о продукте
+• Клиент договорился о встрече / звонке / продолжении общения
+• Клиент явно подтвердил, что ему это может быть полезно
+
+ВАЖНО:
+Сомнение, возражение по цене или фраза «я подумаю» —
+ЭТО НЕ ОТКАЗ.
+
+НЕ СЧИТАЕТСЯ "interested":
+«да»
+«удобно»
+«можно»
+«слушаю»
+«говорите»
+
+И любые ответы, которые только подтверждают начало разговора
+
+"rejected" — ИНТЕРЕС НЕ ПРОЯВЛЕН или ДИАЛОГ ОБОРВАН
+Используется, если разговор завершён или оборвался, и при этом:
+• Клиент не проявил интереса к продукту
+• Клиент не обсуждал свою задачу или бизнес
+• Клиент не дал согласия на получение информации
+• Клиент не было договорённостей о продолжении контакта
+
+В том числе:
+• Разговор закончился на этапе приветствия / установления контакта
+• Клиент дал только формальные ответы без вовлечения
+• Диалог прервался до выявления потребности или проявления интереса
+• Клиент отвечал, но прекратил диалог без объяснений
+• Клиент давал короткие ответы без вовлечения и исчез
+
+ Даже если клиент сказал «удобно», но дальше разговор не развился — это rejected.
+
+"continue_in_chat" — Договорились продолжить общение в чате / мессенджере, по почте
+• Когда обе стороны согласились общаться через чат, Telegram, WhatsApp и т.д.
+• Когда оператор предложил перенести разговор в текстовый формат и клиент согласился
+• Когда договорились обмениваться информацией через мессенджер
+
+"busy" — Клиент говорит, что сейчас занят и отключается
+• Когда человек в диалоге говорит "Я занят", "Мне некогда", "Позвоните позже"
+• Когда клиент просит перезвонить в другое время
+• Когда клиент говорит "У меня нет времени" и вешает трубку
+• Когда договорились о перезвоне в конкретное время
+
+"wrong_number" — Оператор попал не туда
+• Когда человек говорит "Вы ошиблись", "Не туда попали", "Это не моё"
+• Когда клиент говорит, что это не его номер или не его компания
+• Когда номер недействителен или принадлежит другому лицу
+
+"no_answer" — ДИАЛОГА НЕ БЫЛО
+Используется ТОЛЬКО ЕСЛИ:
+• Клиент вообще не вступал в диалог
+• Нет ни одного осмысленного ответа клиента
+• Только гудки, тишина, автоответчик
+• Звонок не состоялся или сразу завершился
+
+НЕ ИСПОЛЬЗОВАТЬ "no_answer", если:
+клиент отвечал по существу
+клиент сообщил информацию о себе и своей ситуации
+диалог прервался после начала разговора
+диалог длился
+клиент задал хотя бы один вопрос
+
+2. **summary**: Краткое резюме разговора (1-3 предложения) НА РУССКОМ ЯЗЫКЕ
+3. **followup_message**: Короткое последующее сообщение (1-3 предложения + призыв к действию) для отправки клиенту НА РУССКОМ ЯЗЫКЕ
+4. **customer_interest**: Краткое описание того, что именно заинтересовало клиента (или "Не заинтересован" если отказался) НА РУССКОМ ЯЗЫКЕ
+5. **crm_status**: Одно из: "added" (если заинтересован), "not_created" (если не ответил/занят/неправильный номер), "pending" (другие случаи)
+6. **funnel_achieved**: Boolean (true/false) или null - Была ли достигнута цель воронки во время этого звонка? Проанализируй, была ли выполнена указанная цель. Поле присутствует всегда; null, если в сообщении нет раздела ЦЕЛЬ ЗВОНКА (ВОРОНКА).
+
+Всегда отвечай только валидным JSON, без дополнительного текста или форматирования. Все текстовые поля должны быть на русском языке."""
+
+PROMPT_TRUNCATED_MARK = "\n[... промпт сокращён ...]"
+TRANSCRIPT_GAP_MARK = "[... пропущено строк: {lines} ...]"
+
+# Share of the transcript budget kept from its start; the rest is kept from
+# the end, where the outcome of the call is
+TRANSCRIPT_HEAD_SHARE = 1 / 3
+
+# Without the tiktoken encoding (e.g. no network to download it): a
+# conservative estimate for Cyrillic text
+CHARS_PER_TOKEN_ESTIMATE = 3
+
+_encoding = None
+_encoding_failed = False
+
+_SPACES = re.compile(r"[ \t]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def token_encoding():
+    """tiktoken encoding of the analysis model, or None (then token counts are estimated)"""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model(settings.OPENAI_ANALYSIS_MODEL)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            _encoding_failed = True
+            print(f"[Prompt] tiktoken unavailable, estimating tokens from length: {e}")
+    return _encoding
+
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = token_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN_ESTIMATE)
+    return len(encoding.encode(text))
+
+
+def compact(text: Optional[str]) -> str:
+    """Collapses runs of spaces and blank lines (the model does not need them)"""
+    text = _SPACES.sub(" ", text or "")
+    return _BLANK_LINES.sub("\n\n", text).strip()
+
+
+def _head(text: str, max_tokens: int) -> str:
+    encoding = token_encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN_ESTIMATE]
+    return encoding.decode(encoding.encode(text)[:max_tokens])
+
+
+def _tail(text: str, max_tokens: int) -> str:
+    encoding = token_encoding()
+    if encoding is None:
+        return text[-max_tokens * CHARS_PER_TOKEN_ESTIMATE:]
+    return encoding.decode(encoding.encode(text)[-max_tokens:])
+
+
+def truncate_prompt(prompt: str, max_tokens: int) -> tuple[str, bool]:
+    """Keeps the start of the campaign prompt (identity and main instructions come first)"""
+    if count_tokens(prompt) <= max_tokens:
+        return prompt, False
+    return _head(prompt, max_tokens) + PROMPT_TRUNCATED_MARK, True
+
+
+def truncate_transcript(transcript: str, max_tokens: int) -> tuple[str, bool]:
+    """Keeps whole lines from the start and the end, dropping the middle of the call"""
+    if count_tokens(transcript) <= max_tokens:
+        return transcript, False
+
+    lines = transcript.split("\n")
+    head_budget = int(max_tokens * TRANSCRIPT_HEAD_SHARE)
+    tail_budget = max_tokens - head_budget
+
+    head, used = [], 0
+    for line in lines:
+        tokens = count_tokens(line) + 1
+        if used + tokens > head_budget:
+            break
+        head.append(line)
+        used += tokens
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        tokens = count_tokens(line) + 1
+        if used + tokens > tail_budget:
+            break
+        tail.append(line)
+        used += tokens
+    tail.reverse()
+
+    if not head and not tail:
+        # A single huge line: keep its end
+        return _tail(transcript, max_tokens), True
+
+    skipped = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [TRANSCRIPT_GAP_MARK.format(lines=skipped)] + tail), True
+
+
+def build_analysis_prompt(transcript: str, prompt: str, funnel_goal: Optional[str] = None) -> tuple[list[dict], dict]:
+    """Chat messages of the analysis request and their token stats"""
+    campaign_prompt, prompt_truncated = truncate_prompt(compact(prompt), settings.ANALYSIS_PROMPT_MAX_TOKENS)
+    transcript_text, transcript_truncated = truncate_transcript(
+        compact(transcript), settings.ANALYSIS_TRANSCRIPT_MAX_TOKENS
+    )
+
+    user_content = f"ОРИГИНАЛЬНЫЙ ПРОМПТ:\n{campaign_prompt}\n\n"
+    if funnel_goal:
+        user_content += f"ЦЕЛЬ ЗВОНКА (ВОРОНКА):\n{compact(funnel_goal)}\n\n"
+    user_content += f"ТРАНСКРИПЦИЯ:\n{transcript_text}"
+
+    messages = [
+        {"role": "system", "content": ANALYSIS_RUBRIC},
+        {"role": "user", "content": user_content},
+    ]
+    stats = {
+        "input_tokens": count_tokens(ANALYSIS_RUBRIC) + count_tokens(user_content),
+        "prompt_truncated": prompt_truncated,
+        "transcript_truncated": transcript_truncated,
+    }
+    return messages, stats
@@ -0,0 +1,256 @@
+"""
+Local pre-classifier for trivial calls.
+
+No answer, voicemail / operator messages, busy, wrong number and hang-ups
+after "алло" are a large share of outbound calls and need no LLM. Before the
+OpenAI request the analysis worker runs `classify_call` on the transcript and
+the duration: turn counts, whether the customer said anything, and Russian /
+Uzbek / Tajik (and English) keyword rules. A verdict with confidence of at
+least PRECLASSIFIER_MIN_CONFIDENCE is stored as the analysis; everything else
+goes to OpenAI.
+
+Evaluation on the labelled mock transcripts (app.services.mock_transcript):
+    python -m app.services.call_classifier eval
+    python -m app.services.call_classifier eval --threshold 0.8
+"""
+import argparse
+import re
+import sys
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.models.call import DispositionType, CRMStatus
+from app.schemas.analysis import CallAnalysis
+from app.services.call_turns import parse_lines
+
+# A customer who only said "алло" and hung up within this time
+HANGUP_MAX_SECONDS = 30
+
+# More customer turns than this is a conversation, left to the LLM
+MAX_CUSTOMER_TURNS = 2
+MAX_WRONG_NUMBER_TURNS = 3
+
+# Transcript rendering of the telephony layer: "[No response - voicemail]", "[тишина]"
+_MARKER = re.compile(r"^\[[^\]]*\]$")
+_WORD = re.compile(r"[\w']+")
+
+# Tajik / Uzbek Cyrillic letters folded to Russian ones, Uzbek Latin apostrophes unified,
+# so "қўнғироқ" / "кунгирок" and "qo‘ng‘iroq" / "qo'ng'iroq" match the same rule
+_FOLD = str.maketrans({
+    "ё": "е", "ӣ": "и", "ӯ": "у", "ў": "у", "ҳ": "х", "қ": "к", "ғ": "г", "ҷ": "ч",
+    "‘": "'", "’": "'", "ʻ": "'", "ʼ": "'", "`": "'",
+})
+
+
+def _normalize(text: str) -> str:
+    return text.lower().translate(_FOLD)
+
+
+def _phrases(*phrases: str) -> re.Pattern:
+    return re.compile("|".join(re.escape(_normalize(phrase)) for phrase in phrases))
+
+
+# Operator announcement that the line is busy
+OPERATOR_BUSY = _phrases(
+    "абонент занят", "линия занята", "номер занят", "line is busy",
+    "abonent band", "liniya band", "муштари банд", "хат банд",
+)
+
+# Voicemail greeting, "subscriber unavailable" announcements
+VOICEMAIL = _phrases(
+    "автоответчик", "голосовая почта", "голосовой почт", "оставьте сообщение", "оставьте ваше сообщение",
+    "после звукового сигнала", "после сигнала", "абонент недоступен", "абонент не отвечает",
+    "абонент временно", "аппарат абонента", "вне зоны действия", "не может ответить",
+    "voicemail", "voice mail", "leave a message", "after the tone", "after the beep", "no response",
+    "is not available", "is unavailable",
+    "ovozli pochta", "xabar qoldiring", "signaldan keyin", "abonent vaqtincha", "abonent javob",
+    "aloqa doirasidan tashqarida", "абонент вактинча", "хабар колдиринг",
+    "паёми овози", "паём гузоред", "баъд аз сигнал", "муштарии мавриди назар", "дастнорас",
+)
+
+WRONG_NUMBER = _phrases(
+    "ошиблись номером", "не туда попали", "неправильный номер", "не тот номер", "номер не существует",
+    "неправильно набран", "здесь таких нет", "такой здесь не",
+    "wrong number", "no one by that name", "nobody by that name",
+    "noto'g'ri raqam", "raqamni adashtirdingiz", "adashdingiz", "нотугри ракам", "адашдингиз",
+    "раками нодуруст", "хато занг", "хато рафтед", "чунин одам нест",
+)
+
+BUSY = _phrases(
+    "я занят", "я занята", "сейчас занят", "сейчас занята", "неудобно говорить", "не могу говорить",
+    "перезвоните позже", "перезвоните попозже", "позвоните позже", "на совещании", "за рулем",
+    "i'm busy", "i am busy", "call back later", "call me later", "can't talk", "cannot talk",
+    "bandman", "keyinroq qo'ng'iroq", "gaplasha olmayman", "бандман", "кейинрок",
+    "ман банд", "банд хастам", "дертар занг", "баъдтар занг", "гап зада наметавонам",
+)
+
+# A refusal or interest is a conversation the LLM has to read (rejected, interested)
+ENGAGED = _phrases(
+    "не интерес", "не надо", "не нужно", "не звоните", "интерес", "расскажите", "сколько стоит",
+    "not interested", "no thanks", "don't call", "interested", "tell me",
+    "kerak emas", "qiziq emas", "qo'ng'iroq qilmang", "qiziq", "керак эмас",
+    "лозим нест", "даркор нест", "чолиб нест", "занг назанед", "чолиб",
+)
+
+# Everything a customer says before hanging up on the greeting
+FILLERS = frozenset(_normalize(word) for word in (
+    "алло", "ало", "алё", "да", "слушаю", "кто", "это", "здравствуйте", "привет", "а", "что", "говорите",
+    "hello", "hi", "yes", "yeah", "who", "is", "this", "what",
+    "allo", "ha", "labbay", "eshitaman", "kim", "bu", "salom", "assalomu", "alaykum", "лаббай",
+    "ҳа", "бале", "кӣ", "салом",
+))
+
+SUMMARIES = {
+    "empty_transcript": "Пустой транскрипт: звонок не состоялся",
+    "operator_busy": "Линия занята (сообщение оператора)",
+    "voicemail": "Автоответчик или абонент недоступен",
+    "customer_silent": "Клиент не ответил",
+    "wrong_number": "Ошиблись номером",
+    "busy": "Клиент занят, просит перезвонить позже",
+    "hang_up": "Клиент положил трубку после приветствия",
+}
+
+
+def _verdict(rule: str, disposition: DispositionType, confidence: float) -> dict:
+    return {"rule": rule, "disposition": disposition, "confidence": confidence, "summary": SUMMARIES[rule]}
+
+
+def classify_call(transcript: Optional[str], duration: Optional[float] = None) -> Optional[dict]:
+    """
+    Verdict of the first matching rule: {rule, disposition, confidence, summary};
+    None for a real conversation. The confidence threshold is applied by the caller.
+    """
+    turns = parse_lines(transcript)
+    if not turns:
+        return _verdict("empty_transcript", DispositionType.NO_ANSWER, 0.99)
+
+    # Everything not said by the agent: the customer, an operator announcement, a voicemail greeting
+    other = [_normalize(turn["text"]) for turn in turns if turn["speaker"] != "agent"]
+    speech = [text for text in other if not _MARKER.match(text)]
+    other_text = "\n".join(other)
+    speech_text = "\n".join(speech)
+
+    if len(other) <= MAX_CUSTOMER_TURNS:
+        if OPERATOR_BUSY.search(other_text):
+            return _verdict("operator_busy", DispositionType.BUSY, 0.97)
+        if VOICEMAIL.search(other_text):
+            return _verdict("voicemail", DispositionType.NO_ANSWER, 0.97)
+
+    if not speech:
+        return _verdict("customer_silent", DispositionType.NO_ANSWER, 0.95)
+
+    if len(speech) <= MAX_WRONG_NUMBER_TURNS and WRONG_NUMBER.search(speech_text):
+        return _verdict("wrong_number", DispositionType.WRONG_NUMBER, 0.92)
+
+    if len(speech) > MAX_CUSTOMER_TURNS or ENGAGED.search(speech_text):
+        return None
+
+    if BUSY.search(speech_text):
+        return _verdict("busy", DispositionType.BUSY, 0.9)
+
+    if all(word in FILLERS for word in _WORD.findall(speech_text)):
+        # Without a short duration it may be a dropped line or a bad transcription
+        short = duration is not None and 0 < duration <= HANGUP_MAX_SECONDS
+        return _verdict("hang_up", DispositionType.NO_ANSWER, 0.92 if short else 0.8)
+
+    return None
+
+
+def verdict_analysis(verdict: dict, funnel_goal: Optional[str] = None) -> dict:
+    """The verdict in the shape of the LLM analysis (CallAnalysis)"""
+    return CallAnalysis(
+        disposition=verdict["disposition"],
+        summary=verdict["summary"],
+        followup_message="",
+        customer_interest="",
+        crm_status=CRMStatus.NOT_CREATED,
+        funnel_achieved=False if funnel_goal else None,
+    ).model_dump(mode="json")
+
+
+class CallClassifier:
+    def __init__(self):
+        self.counters = {"settled": 0, "below_threshold": 0, "passed": 0}
+
+    def settle(self, transcript: Optional[str], duration: Optional[float]) -> Optional[dict]:
+        """Verdict for a trivial call above the confidence threshold, None if the call needs the LLM"""
+        verdict = classify_call(transcript, duration)
+        if verdict is None:
+            self.counters["passed"] += 1
+            return None
+        if verdict["confidence"] < settings.PRECLASSIFIER_MIN_CONFIDENCE:
+            self.counters["below_threshold"] += 1
+            return None
+
+        self.counters["settled"] += 1
+        self.counters[verdict["rule"]] = self.counters.get(verdict["rule"], 0) + 1
+        return verdict
+
+    def stats(self) -> dict:
+        total = self.counters["settled"] + self.counters["below_threshold"] + self.counters["passed"]
+        return {
+            **self.counters,
+            "settled_ratio": round(self.counters["settled"] / total, 4) if total else 0.0,
+        }
+
+
+call_classifier = CallClassifier()
+
+
+def evaluate(threshold: float, repeat: int = 1000) -> bool:
+    """Prints each labelled call's verdict, coverage and latency; False if a call was settled wrongly"""
+    from app.services.mock_transcript import labelled_mock_calls
+
+    calls = labelled_mock_calls()
+    settled, wrong, trivial, trivial_settled = 0, 0, 0, 0
+    for transcript, duration, expected in calls:
+        verdict = classify_call(transcript, duration)
+        is_settled = verdict is not None and verdict["confidence"] >= threshold
+        is_trivial = expected in (DispositionType.NO_ANSWER, DispositionType.BUSY, DispositionType.WRONG_NUMBER)
+        trivial += is_trivial
+        if is_settled:
+            settled += 1
+            trivial_settled += is_trivial
+            wrong += verdict["disposition"] != expected
+
+        if verdict is None:
+            outcome = "llm"
+        else:
+            outcome = f"{verdict['disposition'].value} ({verdict['rule']}, {verdict['confidence']:.2f})"
+            if not is_settled:
+                outcome = f"llm, below threshold: {outcome}"
+            elif verdict["disposition"] != expected:
+                outcome = f"WRONG {outcome}"
+        first_line = (transcript.strip().splitlines() or [""])[0][:50]
+        print(f"{expected.value:<17} {duration:>6.1f}s  {outcome:<55} {first_line}")
+
+    transcripts = [(transcript, duration) for transcript, duration, _ in calls]
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for transcript, duration in transcripts:
+            classify_call(transcript, duration)
+    per_call_us = (time.perf_counter() - started) / (repeat * len(transcripts)) * 1e6
+
+    print(
+        f"\nCalls: {len(calls)}, settled locally: {settled} ({settled / len(calls):.0%}), wrong: {wrong}\n"
+        f"Trivial calls settled: {trivial_settled}/{trivial}, threshold {threshold}\n"
+        f"Latency: {per_call_us:.1f} us per call"
+    )
+    return wrong == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local pre-classifier for trivial calls")
+    commands = parser.add_subparsers(dest="command", required=True)
+    evaluation = commands.add_parser("eval", help="Accuracy, coverage and latency on the labelled mock transcripts")
+    evaluation.add_argument("--threshold", type=float, default=settings.PRECLASSIFIER_MIN_CONFIDENCE)
+    evaluation.add_argument("--repeat", type=int, default=1000, help="Timing rounds over all calls")
+    args = parser.parse_args()
+
+    if args.command == "eval":
+        sys.exit(0 if evaluate(args.threshold, args.repeat) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Per-call context of outbound calls, fetched by the Voximplant scenario.
+
+StartScenarios only carries {call_id, token, webhook_url}; the scenario then
+asks GET /call-context/{call_id} (X-Call-Token header) for everything else:
+phone, voice settings, prompt texts and the provider keys. The token is an
+HMAC of the call_id, so nothing extra is stored and no one can read another
+call's context; contexts are served only while the call is starting or in
+progress.
+
+The prompt texts come from the prompt registry by id, so a campaign's
+prompt is read from Postgres once per process, not once per dial.
+"""
+import hashlib
+import hmac
+import json
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.call import Call, CallStatus
+from app.services.prompt_registry import TEMPLATE_COLUMNS, prompt_registry
+
+# The scenario fetches its context right after StartScenarios
+CONTEXT_STATUSES = (CallStatus.INITIATING, CallStatus.CALLING)
+
+
+def call_context_token(call_id: str) -> str:
+    digest = hmac.new(settings.SECRET_KEY.encode("utf-8"), f"call-context:{call_id}".encode("utf-8"), hashlib.sha256)
+    return digest.hexdigest()[:32]
+
+
+def token_matches(call_id: str, token: Optional[str]) -> bool:
+    return bool(token) and hmac.compare_digest(call_context_token(call_id), token)
+
+
+def start_payload(call_id: str) -> dict:
+    """script_custom_data of StartScenarios"""
+    return {"call_id": call_id, "token": call_context_token(call_id), "webhook_url": settings.WEBHOOK_URL}
+
+
+async def load_call_context(db: AsyncSession, call_id: str) -> Optional[bytes]:
+    """Context JSON of a starting call, or None"""
+    row = (await db.execute(
+        select(
+            Call.phone_number, Call.language, Call.tts_provider, Call.voice,
+            Call.stability, Call.speed, Call.similarity_boost,
+            Call.prompt_template_id, Call.greeting_template_id, Call.funnel_goal_template_id,
+        ).filter(Call.call_id == call_id, Call.status.in_(CONTEXT_STATUSES))
+    )).first()
+    if row is None:
+        return None
+
+    template_ids = {field: getattr(row, column) for field, column in TEMPLATE_COLUMNS.items()}
+    texts = await prompt_registry.texts(db, template_ids.values())
+    context_texts = {field: texts[template_id] for field, template_id in template_ids.items()}
+
+    return json.dumps({
+        "call_id": call_id,
+        "phone": row.phone_number,
+        "caller_id": settings.VOXIMPLANT_CALLER_ID,
+        "language": row.language,
+        "tts_provider": row.tts_provider,
+        "voice": row.voice,
+        **context_texts,
+        "openai_api_key": settings.OPENAI_API_KEY,
+        "elevenlabs_api_key": settings.ELEVENLABS_API_KEY,
+        "elevenlabs_agent_id": settings.ELEVENLABS_AGENT_ID,
+        "yandex_api_key": settings.YANDEX_API_KEY,
+        "yandex_folder_id": settings.YANDEX_FOLDER_ID,
+        "qwen_api_key": settings.QWEN_API_KEY,
+        "stability": row.stability,
+        "speed": row.speed,
+        "similarity_boost": row.similarity_boost,
+    }, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,165 @@
+"""
+Call status push (Postgres LISTEN/NOTIFY).
+
+Whoever changes a call's status publishes a small event with pg_notify in the
+same transaction, so it is delivered on commit and dropped on rollback. This
+works from any process (API workers, dialer, app.worker).
+
+Every API process keeps one dedicated LISTEN connection (CallEventBroker) and
+fans events out to its SSE clients (GET /calls/events), so the frontend no
+longer polls GET /calls/{id}.
+
+The same connection carries other processes' cache invalidations
+(`listen`, e.g. user_events for app.core.auth_cache).
+
+NOTIFY payloads are limited to 8000 bytes, so events carry only the status and
+a few short fields; clients load the full call once it reaches a final status.
+"""
+import asyncio
+import json
+from typing import Callable, Optional
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.call import Call, CallStatus
+
+CALL_EVENTS_CHANNEL = "call_events"
+
+FINAL_STATUSES = (CallStatus.COMPLETED, CallStatus.FAILED)
+
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+
+def call_event(call: Call) -> dict:
+    """Event for the current state of a call"""
+    return {
+        "id": call.id,
+        "status": _enum_value(call.status),
+        "campaign_id": call.campaign_id,
+        "disposition": _enum_value(call.disposition),
+        "crm_status": _enum_value(call.crm_status),
+    }
+
+
+async def publish_call_event(db: AsyncSession, event: dict):
+    """Queues the event on the session's transaction; it is sent when the caller commits"""
+    await db.execute(select(func.pg_notify(CALL_EVENTS_CHANNEL, json.dumps(event))))
+
+
+async def publish_call_status(db: AsyncSession, call: Call):
+    await publish_call_event(db, call_event(call))
+
+
+async def publish_status_change(db: AsyncSession, call_ids, status: CallStatus):
+    """For bulk UPDATEs where only the ids are known"""
+    for call_id in call_ids:
+        await publish_call_event(db, {"id": call_id, "status": status.value})
+
+
+def listen_dsn() -> str:
+    """Plain libpq DSN for asyncpg, derived from the SQLAlchemy database URL"""
+    url = make_url(settings.ASYNC_DATABASE_URL or settings.DATABASE_URL)
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class CallEventBroker:
+    """One LISTEN connection per process, fanned out to in-process subscribers"""
+
+    # Slow SSE clients lose their oldest events instead of growing memory
+    QUEUE_SIZE = 100
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self):
+        self._subscribers: dict[asyncio.Queue, Optional[int]] = {}
+        self._channels: dict[str, tuple[Callable[[str], None], Optional[Callable[[], None]]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def listen(self, channel: str, on_notify: Callable[[str], None], on_connect: Optional[Callable[[], None]] = None):
+        """
+        Another channel on the LISTEN connection; register before start().
+        on_connect runs on every (re)connect: notifications sent while the
+        connection was down are lost, so caches should start over.
+        """
+        self._channels[channel] = (on_notify, on_connect)
+
+    def subscribe(self, call_id: Optional[int] = None) -> asyncio.Queue:
+        """Queue of events for one call, or for all calls if call_id is None"""
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers[queue] = call_id
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    async def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+            print("[Events] Call event broker started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print("[Events] Call event broker stopped")
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = await asyncpg.connect(listen_dsn())
+                await conn.add_listener(CALL_EVENTS_CHANNEL, self._on_notify)
+                for channel, (_, on_connect) in self._channels.items():
+                    await conn.add_listener(channel, self._on_channel_notify)
+                    if on_connect is not None:
+                        on_connect()
+                # asyncpg delivers notifications on its own; just watch the connection
+                while not conn.is_closed():
+                    await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+                print("[Events] LISTEN connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Events] LISTEN error: {e}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        self.dispatch(event)
+
+    def _on_channel_notify(self, connection, pid, channel, payload):
+        on_notify, _ = self._channels[channel]
+        try:
+            on_notify(payload)
+        except Exception as e:
+            print(f"[Events] {channel} handler error: {e}")
+
+    def dispatch(self, event: dict):
+        for queue, call_id in list(self._subscribers.items()):
+            if call_id is not None and call_id != event.get("id"):
+                continue
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+call_event_broker = CallEventBroker()
@@ -0,0 +1,259 @@
+"""
+Bulk export of calls for analysts (GET /calls/export and the CLI below).
+
+Rows are read through a server-side cursor (yield_per EXPORT_BATCH_SIZE) in
+one transaction, so the export is a consistent snapshot and the process
+holds one batch at a time however many calls match. Output is streamed:
+- ndjson / csv: chunks of about EXPORT_CHUNK_BYTES, optionally compressed as
+  a whole with gzip or zstd
+- parquet: one row group per batch; gzip / zstd compress the column chunks
+  inside the file (snappy by default)
+
+CLI:
+    python -m app.services.call_export calls.ndjson.gz --compression gzip --status completed
+    python -m app.services.call_export calls.parquet --format parquet --date-from 2026-09-01
+    python -m app.services.call_export - --format csv --campaign-id 3 > calls.csv
+"""
+import argparse
+import csv
+import enum
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from typing import Iterator, Literal, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.call import Call, CallStatus, DispositionType
+
+ExportFormat = Literal["ndjson", "csv", "parquet"]
+Compression = Literal["gzip", "zstd"]
+
+EXPORT_COLUMNS = (
+    Call.id, Call.campaign_id, Call.phone_number, Call.language, Call.tts_provider,
+    Call.status, Call.disposition, Call.duration, Call.funnel_achieved, Call.crm_status,
+    Call.customer_interest, Call.summary, Call.followup_message, Call.transcript,
+    Call.created_at, Call.completed_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+COMPRESSED_MEDIA_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def _plain(value):
+    """JSON/CSV value of a column"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _arrow_value(value):
+    """Parquet value of a column: timestamps stay timestamps"""
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    text, timestamp = pa.string(), pa.timestamp("us", tz="UTC")
+    types = {
+        "id": pa.int64(), "campaign_id": pa.int64(), "duration": pa.float64(),
+        "funnel_achieved": pa.bool_(), "created_at": timestamp, "completed_at": timestamp,
+    }
+    return pa.schema([(name, types.get(name, text)) for name in EXPORT_FIELDS])
+
+
+class _Buffer(io.RawIOBase):
+    """Write-only file whose contents are taken out as they are written (Parquet sink)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class CallExport:
+    def __init__(
+        self,
+        export_format: ExportFormat = "ndjson",
+        compression: Optional[Compression] = None,
+        status: Optional[CallStatus] = None,
+        disposition: Optional[DispositionType] = None,
+        language: Optional[str] = None,
+        tts_provider: Optional[str] = None,
+        campaign_id: Optional[int] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+    ):
+        self.export_format = export_format
+        self.compression = compression
+        self.filters = {
+            Call.status: status, Call.disposition: disposition, Call.language: language,
+            Call.tts_provider: tts_provider, Call.campaign_id: campaign_id,
+        }
+        self.date_from = date_from
+        self.date_to = date_to
+        self.counters = {"rows": 0, "bytes": 0}
+
+    @property
+    def filename(self) -> str:
+        name = f"calls.{self.export_format}"
+        if self.compression and self.export_format != "parquet":
+            name += COMPRESSION_SUFFIXES[self.compression]
+        return name
+
+    @property
+    def media_type(self) -> str:
+        if self.compression and self.export_format != "parquet":
+            return COMPRESSED_MEDIA_TYPES[self.compression]
+        return MEDIA_TYPES[self.export_format]
+
+    def query(self):
+        query = select(*EXPORT_COLUMNS)
+        for column, value in self.filters.items():
+            if value is not None:
+                query = query.filter(column == value)
+        if self.date_from is not None:
+            query = query.filter(Call.created_at >= self.date_from)
+        if self.date_to is not None:
+            query = query.filter(Call.created_at < self.date_to)
+        return query.order_by(Call.id)
+
+    def chunks(self, db: Session) -> Iterator[bytes]:
+        """The export file, piece by piece"""
+        if self.export_format == "parquet":
+            chunks = self._parquet_chunks(db)
+        else:
+            chunks = self._compressed(self._text_chunks(db))
+        for chunk in chunks:
+            if chunk:
+                self.counters["bytes"] += len(chunk)
+                yield chunk
+
+    def _batches(self, db: Session) -> Iterator[list]:
+        result = db.execute(self.query().execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            self.counters["rows"] += len(rows)
+            yield rows
+
+    def _text_chunks(self, db: Session) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if self.export_format == "csv" else None
+        if writer is not None:
+            writer.writerow(EXPORT_FIELDS)
+
+        for rows in self._batches(db):
+            for row in rows:
+                values = [_plain(value) for value in row]
+                if writer is not None:
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False) + "\n")
+                if buffer.tell() >= settings.EXPORT_CHUNK_BYTES:
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue().encode("utf-8")
+
+    def _compressed(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        if self.compression is None:
+            yield from chunks
+            return
+        if self.compression == "gzip":
+            compressor = zlib.compressobj(wbits=31)  # gzip container
+        else:
+            import zstandard
+            compressor = zstandard.ZstdCompressor().compressobj()
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.flush()
+
+    def _parquet_chunks(self, db: Session) -> Iterator[bytes]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = _parquet_schema()
+        sink = _Buffer()
+        with pq.ParquetWriter(sink, schema, compression=self.compression or "snappy") as writer:
+            for rows in self._batches(db):
+                arrays = [
+                    pa.array([_arrow_value(value) for value in column], type=field.type)
+                    for column, field in zip(zip(*rows), schema)
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                yield sink.take()
+        yield sink.take()
+
+
+def main():
+    from app.core.database import SessionLocal
+    from app.models.campaign import Campaign  # noqa: F401 - referenced by calls.campaign_id
+
+    parser = argparse.ArgumentParser(description="Export calls as NDJSON, CSV or Parquet")
+    parser.add_argument("output", help="file path, - for stdout")
+    parser.add_argument("--format", choices=["ndjson", "csv", "parquet"], default="ndjson")
+    parser.add_argument("--compression", choices=["gzip", "zstd"])
+    parser.add_argument("--status", choices=[s.value for s in CallStatus])
+    parser.add_argument("--disposition", choices=[d.value for d in DispositionType])
+    parser.add_argument("--language")
+    parser.add_argument("--tts-provider")
+    parser.add_argument("--campaign-id", type=int)
+    parser.add_argument("--date-from", type=datetime.fromisoformat)
+    parser.add_argument("--date-to", type=datetime.fromisoformat)
+    args = parser.parse_args()
+
+    export = CallExport(
+        args.format,
+        args.compression,
+        status=CallStatus(args.status) if args.status else None,
+        disposition=DispositionType(args.disposition) if args.disposition else None,
+        language=args.language,
+        tts_provider=args.tts_provider,
+        campaign_id=args.campaign_id,
+        date_from=args.date_from,
+        date_to=args.date_to,
+    )
+    db = SessionLocal()
+    try:
+        out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        try:
+            for chunk in export.chunks(db):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+    finally:
+        db.close()
+    print(f"[Export] {export.counters['rows']} calls, {export.counters['bytes']} bytes -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
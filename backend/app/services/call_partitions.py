@@ -0,0 +1,298 @@
+"""
+Monthly partitions of the calls table (PARTITION BY RANGE (created_at)).
+
+Every calendar month (UTC) is a partition named calls_YYYY_MM. Queries with a
+created_at condition (GET /calls date filters, exports, re-analysis runs) read
+only the matching partitions, and the newest-first GET /calls page reads the
+newest partitions and stops.
+
+- ensure: creates the partitions of the current month and of
+  CALL_PARTITIONS_AHEAD_MONTHS ahead; an insert into a month without a
+  partition fails. Run by the schema setup on every deploy and by app.worker
+  every CALL_PARTITION_MAINTENANCE_SECONDS.
+- archive: partitions that ended more than CALL_RETENTION_MONTHS full months
+  ago are detached (CONCURRENTLY, writes to calls go on), written to
+  CALL_ARCHIVE_DIR as compressed CSV - the calls with their prompt texts, and
+  their call_turns - and dropped together with their turns and analysis jobs.
+  With --detach-only they are kept as standalone tables; a later archive run
+  archives them as well.
+
+call_turns, analysis_jobs and transcript_ingest_log have no foreign keys to
+calls (a referenced unique key of a partitioned table must include created_at),
+so archival does what ON DELETE used to do. Daily stats (call_stats_daily)
+keep the archived months.
+
+CLI:
+    python -m app.services.call_partitions list
+    python -m app.services.call_partitions ensure --ahead 6
+    python -m app.services.call_partitions archive --retention-months 12 --compression gzip
+    python -m app.services.call_partitions archive --retention-months 12 --detach-only
+"""
+import argparse
+import gzip
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+PARTITION_NAME = re.compile(r"^calls_(\d{4})_(\d{2})$")
+
+# pg_try_advisory_lock key of partition maintenance: one app.worker process at a time
+MAINTENANCE_LOCK_ID = 4_186_002
+
+# Creating a partition locks calls briefly; do not queue behind long queries, retry next time
+LOCK_TIMEOUT = "5s"
+
+ARCHIVE_SUFFIXES = {"gzip": ".csv.gz", "zstd": ".csv.zst"}
+
+# Prompt texts of archived calls, by template id column
+ARCHIVE_TEXTS = {
+    "greeting_message": "greeting_template_id",
+    "prompt": "prompt_template_id",
+    "funnel_goal": "funnel_goal_template_id",
+}
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+def partition_name(month: date) -> str:
+    return f"calls_{month:%Y_%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def attached_partitions(conn: Connection) -> dict[str, bool]:
+    """Partitions of calls -> detach pending (an interrupted DETACH ... CONCURRENTLY)"""
+    rows = conn.execute(text(
+        "SELECT c.relname, i.inhdetachpending FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid"
+        " WHERE i.inhparent = 'calls'::regclass ORDER BY c.relname"
+    ))
+    return {name: pending for name, pending in rows}
+
+
+def detached_partitions(conn: Connection) -> list[str]:
+    """Former partitions left as standalone tables (--detach-only or an interrupted archive)"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_class c"
+        " WHERE c.relkind = 'r' AND c.relnamespace = 'public'::regnamespace AND NOT c.relispartition"
+    ))
+    return sorted(name for (name,) in rows if partition_month(name))
+
+
+def ensure_partitions(conn: Connection, months_ahead: Optional[int] = None) -> list[str]:
+    """Creates the missing partitions from the current month on; the caller commits. Returns their names."""
+    months_ahead = settings.CALL_PARTITIONS_AHEAD_MONTHS if months_ahead is None else months_ahead
+    attached = attached_partitions(conn)
+    month = current_month()
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(month, offset)
+        name = partition_name(start)
+        if name in attached:
+            continue
+        conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF calls"
+            f" FOR VALUES FROM ('{start} 00:00+00') TO ('{add_months(start, 1)} 00:00+00')"
+        ))
+        created.append(name)
+    return created
+
+
+def expired_partitions(conn: Connection, retention_months: int) -> list[str]:
+    """Attached and detached partitions of months before the retention window"""
+    cutoff = add_months(current_month(), -retention_months)
+    names = [*attached_partitions(conn), *detached_partitions(conn)]
+    return sorted(name for name in names if partition_month(name) < cutoff)
+
+
+def _plain_columns(conn: Connection, table: str) -> list[str]:
+    """Columns of a table without generated ones (search vectors)"""
+    rows = conn.execute(text(
+        "SELECT column_name FROM information_schema.columns"
+        " WHERE table_schema = 'public' AND table_name = :table AND is_generated = 'NEVER'"
+        " ORDER BY ordinal_position"
+    ), {"table": table})
+    return [name for (name,) in rows]
+
+
+@contextmanager
+def _archive_file(path: str, compression: str):
+    """Compressed file that appears under its name only once it is complete and synced"""
+    partial = path + ".partial"
+    with open(partial, "wb") as raw:
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb") as out:
+                yield out
+        else:
+            import zstandard
+            with zstandard.ZstdCompressor().stream_writer(raw, closefd=False) as out:
+                yield out
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, path)
+
+
+def _copy_out(engine: Engine, query: str, path: str, compression: str):
+    raw = engine.raw_connection()
+    try:
+        with _archive_file(path, compression) as out:
+            raw.cursor().copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", out)
+        raw.rollback()
+    finally:
+        raw.close()
+
+
+def detach_partition(engine: Engine, name: str):
+    """DETACH ... CONCURRENTLY runs outside a transaction; FINALIZE completes an interrupted one"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        pending = attached_partitions(conn).get(name)
+        if pending is None:
+            return
+        mode = "FINALIZE" if pending else "CONCURRENTLY"
+        conn.execute(text(f"ALTER TABLE calls DETACH PARTITION {name} {mode}"))
+
+
+def archive_partition(
+    engine: Engine,
+    name: str,
+    archive_dir: Optional[str] = None,
+    compression: Optional[str] = None,
+    detach_only: bool = False,
+) -> Optional[dict]:
+    """
+    Detaches a partition and, unless detach_only, writes it to archive_dir and
+    drops it with the rows of its calls in the child tables.
+    Returns the archived file paths and row counts.
+    """
+    archive_dir = archive_dir or settings.CALL_ARCHIVE_DIR
+    compression = compression or settings.CALL_ARCHIVE_COMPRESSION
+    detach_partition(engine, name)
+    if detach_only:
+        print(f"[Partitions] {name} detached")
+        return None
+
+    os.makedirs(archive_dir, exist_ok=True)
+    suffix = ARCHIVE_SUFFIXES[compression]
+    calls_path = os.path.join(archive_dir, name + suffix)
+    turns_path = os.path.join(archive_dir, f"{name}_turns{suffix}")
+
+    with engine.connect() as conn:
+        call_columns = ", ".join(f"c.{column}" for column in _plain_columns(conn, name))
+        turn_columns = ", ".join(f"t.{column}" for column in _plain_columns(conn, "call_turns"))
+        calls = conn.scalar(select(func.count()).select_from(text(name)))
+    texts = "".join(
+        f", (SELECT content FROM prompt_templates WHERE id = c.{id_column}) AS {text_name}"
+        for text_name, id_column in ARCHIVE_TEXTS.items()
+    )
+    _copy_out(engine, f"SELECT {call_columns}{texts} FROM {name} c ORDER BY c.id", calls_path, compression)
+    _copy_out(
+        engine,
+        f"SELECT {turn_columns} FROM call_turns t JOIN {name} c ON c.id = t.call_id ORDER BY t.call_id, t.position",
+        turns_path, compression,
+    )
+
+    # What the foreign keys' ON DELETE did, then the partition itself
+    ids = f"SELECT id FROM {name}"
+    with engine.begin() as conn:
+        turns = conn.execute(text(f"DELETE FROM call_turns WHERE call_id IN ({ids})")).rowcount
+        conn.execute(text(f"DELETE FROM analysis_jobs WHERE call_id IN ({ids})"))
+        conn.execute(text(f"UPDATE transcript_ingest_log SET call_ref_id = NULL WHERE call_ref_id IN ({ids})"))
+        conn.execute(text(f"DROP TABLE {name}"))
+
+    print(f"[Partitions] {name} archived: {calls} calls, {turns} turns -> {calls_path}, {turns_path}")
+    return {"calls": calls, "turns": turns, "files": [calls_path, turns_path]}
+
+
+def archive_partitions(
+    engine: Engine,
+    retention_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    compression: Optional[str] = None,
+    detach_only: bool = False,
+) -> list[str]:
+    """Archives every partition before the retention window; returns their names"""
+    retention_months = settings.CALL_RETENTION_MONTHS if retention_months is None else retention_months
+    with engine.connect() as conn:
+        names = expired_partitions(conn, retention_months)
+    if detach_only:
+        with engine.connect() as conn:
+            attached = attached_partitions(conn)
+        names = [name for name in names if name in attached]
+    for name in names:
+        archive_partition(engine, name, archive_dir, compression, detach_only)
+    return names
+
+
+def maintain_partitions(engine: Engine) -> Optional[dict]:
+    """
+    Scheduled maintenance (app.worker): ensure, then archive when
+    CALL_RETENTION_MONTHS is set. Returns None if another process holds the lock.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if not lock_conn.scalar(select(func.pg_try_advisory_lock(MAINTENANCE_LOCK_ID))):
+            return None
+        try:
+            with engine.begin() as conn:
+                created = ensure_partitions(conn)
+            archived = archive_partitions(engine) if settings.CALL_RETENTION_MONTHS > 0 else []
+        finally:
+            lock_conn.execute(select(func.pg_advisory_unlock(MAINTENANCE_LOCK_ID)))
+    if created:
+        print(f"[Partitions] Created {', '.join(created)}")
+    return {"created": created, "archived": archived}
+
+
+def main():
+    from app.core.database import engine
+
+    parser = argparse.ArgumentParser(description="Monthly partitions of the calls table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="partitions with their row estimates, and detached ones")
+    ensure = commands.add_parser("ensure", help="create the current and upcoming months")
+    ensure.add_argument("--ahead", type=int, default=settings.CALL_PARTITIONS_AHEAD_MONTHS)
+    archive = commands.add_parser("archive", help="archive and drop months before the retention window")
+    archive.add_argument("--retention-months", type=int, default=settings.CALL_RETENTION_MONTHS)
+    archive.add_argument("--dir", default=settings.CALL_ARCHIVE_DIR)
+    archive.add_argument("--compression", choices=["gzip", "zstd"], default=settings.CALL_ARCHIVE_COMPRESSION)
+    archive.add_argument("--detach-only", action="store_true", help="detach, keep the tables")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        with engine.connect() as conn:
+            attached = attached_partitions(conn)
+            for name in attached:
+                rows = conn.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name"), {"name": name})
+                print(f"{name}\t~{max(rows, 0)} calls{' (detach pending)' if attached[name] else ''}")
+            for name in detached_partitions(conn):
+                print(f"{name}\tdetached")
+    elif args.command == "ensure":
+        with engine.begin() as conn:
+            created = ensure_partitions(conn, args.ahead)
+        print(f"[Partitions] Created {', '.join(created) or 'nothing'}")
+    else:
+        if args.retention_months <= 0:
+            parser.error("--retention-months must be positive")
+        names = archive_partitions(engine, args.retention_months, args.dir, args.compression, args.detach_only)
+        print(f"[Partitions] {len(names)} partitions {'detached' if args.detach_only else 'archived'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Column projections of calls for the read paths.
+
+Transcripts, analysis texts and prompts are most of a calls row, and most
+reads need none of them:
+- list endpoints select only the columns of their response schema, as rows
+  rather than Call objects;
+- on Call those texts are deferred (PROMPT_TEXTS, CALL_TEXTS groups), so
+  loading a call for a status change does not read them;
+- GET /calls/{id}?fields=status,summary selects just the requested fields.
+"""
+from typing import Iterable
+
+from pydantic import BaseModel
+from sqlalchemy.orm import undefer_group
+
+from app.models.call import Call, PROMPT_TEXTS, CALL_TEXTS
+from app.schemas.call import CallResponse, CallListItem, CallSearchResult
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def schema_columns(schema: type[BaseModel], exclude: Iterable[str] = ()) -> list:
+    """Call columns of the fields of a response schema"""
+    return [getattr(Call, name) for name in schema.model_fields if name not in exclude]
+
+
+LIST_COLUMNS = schema_columns(CallListItem)
+SEARCH_COLUMNS = schema_columns(CallSearchResult, exclude=("matched_turns",))
+
+# Full GET /calls/{id}: every deferred text
+DETAIL_OPTIONS = (undefer_group(PROMPT_TEXTS), undefer_group(CALL_TEXTS))
+DETAIL_TEXTS = [
+    name for name in CallResponse.model_fields
+    if Call.__mapper__.attrs[name].deferred
+]
+
+
+def parse_fields(fields: str) -> list[str]:
+    """CallResponse field names of a fields= parameter ("status,summary"); id is always included"""
+    names = ["id"]
+    for name in (part.strip() for part in fields.split(",")):
+        if name and name not in names:
+            names.append(name)
+    unknown = [name for name in names if name not in CallResponse.model_fields]
+    if unknown:
+        raise InvalidFields(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def partial_call(row, names: list[str]) -> dict:
+    """JSON of the selected CallResponse fields"""
+    return CallResponse.model_construct(**row._mapping).model_dump(mode="json", include=set(names))
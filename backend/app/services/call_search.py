@@ -0,0 +1,74 @@
+"""
+Search over call transcripts, summaries and customer_interest (GET /calls/search).
+
+- text: Russian full-text search (websearch syntax: words, "phrase", -word, or)
+  on the stored calls.search_vector / call_turns.search_vector GIN indexes
+- substring: case-insensitive substring match on the pg_trgm GIN indexes, for
+  names, numbers, e-mails and uz/tj words the Russian stemmer does not know
+"""
+from typing import Dict, List, Literal, Optional
+
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.models.call import Call
+from app.models.call_turn import CallTurn
+
+SearchMode = Literal["text", "substring"]
+
+# Same configuration as the stored search vectors (app.models.call.SEARCH_VECTOR_SQL)
+SEARCH_CONFIG = text("'russian'::regconfig")
+
+# Trigram indexes are only used for patterns of 3+ characters
+MIN_SUBSTRING_LENGTH = 3
+
+MATCHED_TURNS_PER_CALL = 3
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _tsquery(q: str):
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+def call_condition(q: str, mode: SearchMode):
+    if mode == "substring":
+        pattern = _like_pattern(q)
+        return or_(
+            Call.transcript.ilike(pattern, escape="\\"),
+            Call.summary.ilike(pattern, escape="\\"),
+            Call.customer_interest.ilike(pattern, escape="\\"),
+        )
+    return Call.search_vector.op("@@")(_tsquery(q))
+
+
+def turn_condition(q: str, mode: SearchMode):
+    if mode == "substring":
+        return CallTurn.text.ilike(_like_pattern(q), escape="\\")
+    return CallTurn.search_vector.op("@@")(_tsquery(q))
+
+
+def matched_turns(
+    db: Session,
+    call_ids: List[int],
+    q: str,
+    mode: SearchMode,
+    speaker: Optional[str] = None
+) -> Dict[int, List[CallTurn]]:
+    """First matching turns of each call on a result page"""
+    if not call_ids:
+        return {}
+    query = select(CallTurn).filter(CallTurn.call_id.in_(call_ids), turn_condition(q, mode))
+    if speaker:
+        query = query.filter(CallTurn.speaker == speaker)
+    turns = db.execute(query.order_by(CallTurn.call_id, CallTurn.position)).scalars().all()
+
+    by_call: Dict[int, List[CallTurn]] = {}
+    for turn in turns:
+        call_turns = by_call.setdefault(turn.call_id, [])
+        if len(call_turns) < MATCHED_TURNS_PER_CALL:
+            call_turns.append(turn)
+    return by_call
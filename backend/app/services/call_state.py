@@ -0,0 +1,91 @@
+"""
+Call status state machine.
+
+All status changes of a loaded Call go through `transition`, which checks the
+move against ALLOWED_TRANSITIONS and stamps the stage timestamp column. The
+pipeline stages after ANALYZING are applied in memory and committed once, so
+their timestamps (not intermediate commits) tell the UI how the call progressed.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.metrics import CALL_STAGE_SECONDS
+from app.models.call import Call, CallStatus
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+ALLOWED_TRANSITIONS = {
+    CallStatus.QUEUED: {CallStatus.INITIATING, CallStatus.FAILED},
+    # The transcript webhook may come before the background task marks the call CALLING
+    # Back to QUEUED: StartScenarios never reached Voximplant (open circuit), the dialer retries later
+    CallStatus.INITIATING: {CallStatus.CALLING, CallStatus.ANALYZING, CallStatus.QUEUED, CallStatus.FAILED},
+    CallStatus.CALLING: {CallStatus.ANALYZING, CallStatus.FAILED},
+    CallStatus.ANALYZING: {CallStatus.PREPARING_FOLLOWUP, CallStatus.FAILED},
+    # Back to ANALYZING: retry of calls stored mid-pipeline by older releases
+    CallStatus.PREPARING_FOLLOWUP: {CallStatus.SENDING_SMS, CallStatus.ANALYZING, CallStatus.FAILED},
+    CallStatus.SENDING_SMS: {CallStatus.ADDING_TO_CRM, CallStatus.ANALYZING, CallStatus.FAILED},
+    CallStatus.ADDING_TO_CRM: {CallStatus.COMPLETED, CallStatus.ANALYZING, CallStatus.FAILED},
+    CallStatus.COMPLETED: set(),
+    # Late transcript of a call that timed out or failed to start
+    CallStatus.FAILED: {CallStatus.ANALYZING},
+}
+
+# Column stamped when a call enters the status (QUEUED/INITIATING use created_at)
+STAGE_TIMESTAMPS = {
+    CallStatus.CALLING: "calling_at",
+    CallStatus.ANALYZING: "analyzing_at",
+    CallStatus.PREPARING_FOLLOWUP: "preparing_followup_at",
+    CallStatus.SENDING_SMS: "sending_sms_at",
+    CallStatus.ADDING_TO_CRM: "adding_to_crm_at",
+    CallStatus.COMPLETED: "completed_at",
+    CallStatus.FAILED: "failed_at",
+}
+
+
+def can_transition(current: Optional[CallStatus], target: CallStatus) -> bool:
+    if current is None:
+        return True
+    return target in ALLOWED_TRANSITIONS.get(current, set())
+
+
+def transition(call: Call, target: CallStatus, at: Optional[datetime] = None):
+    """Moves the call to `target` and stamps the stage; the caller commits"""
+    if not can_transition(call.status, target):
+        raise InvalidTransition(f"Call {call.id}: {call.status.value} -> {target.value} is not allowed")
+
+    at = at or datetime.utcnow()
+    _observe_stage(call, at)
+    call.status = target
+    column = STAGE_TIMESTAMPS.get(target)
+    if column:
+        setattr(call, column, at)
+
+
+def _observe_stage(call: Call, left_at: datetime):
+    """Time spent in the status the call is leaving"""
+    if call.status is None:
+        return
+    # __dict__: only loaded values - an expired attribute would be a lazy load (not allowed on async sessions)
+    entered_at = call.__dict__.get(STAGE_TIMESTAMPS.get(call.status, "created_at"))
+    if entered_at is not None:
+        seconds = (_naive_utc(left_at) - _naive_utc(entered_at)).total_seconds()
+        CALL_STAGE_SECONDS.labels(call.status.value).observe(max(seconds, 0.0))
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Loaded columns are timezone-aware, stamps set in this process are naive UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def stage_values(target: CallStatus) -> dict:
+    """Column values for bulk UPDATEs that move calls to `target`"""
+    values = {"status": target}
+    column = STAGE_TIMESTAMPS.get(target)
+    if column:
+        values[column] = datetime.utcnow()
+    return values
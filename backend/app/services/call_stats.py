@@ -0,0 +1,116 @@
+"""
+Daily funnel rollup (call_stats_daily).
+
+A call is added to its day's row when it reaches COMPLETED, in the same
+transaction as the status change, so /analytics reads a handful of
+pre-aggregated rows instead of scanning calls.
+
+Rebuild the table from raw calls (one aggregated pass):
+    python -m app.services.call_stats
+"""
+from datetime import date, timezone
+from typing import Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.call import Call, CallStatus, DispositionType, CRMStatus
+from app.models.call_stats import CallStatsDaily
+
+# Dispositions where a conversation actually took place
+TALKED_DISPOSITIONS = (
+    DispositionType.INTERESTED,
+    DispositionType.REJECTED,
+    DispositionType.CONTINUE_IN_CHAT,
+)
+
+COUNTER_COLUMNS = ("called", "talked", "interested", "lead", "duration_sum", "duration_count")
+
+
+def call_stats_day(call: Call) -> date:
+    created_at = call.created_at
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def call_stats_delta(call: Call, sign: int = 1) -> dict:
+    """Counter increments contributed by one completed call (sign=-1 removes them)"""
+    return {
+        "called": sign,
+        "talked": sign if call.disposition in TALKED_DISPOSITIONS else 0,
+        "interested": sign if call.disposition == DispositionType.INTERESTED else 0,
+        "lead": sign if call.crm_status == CRMStatus.ADDED else 0,
+        "duration_sum": sign * call.duration if call.duration is not None else 0.0,
+        "duration_count": sign if call.duration is not None else 0,
+    }
+
+
+async def record_completed_call(db: AsyncSession, call: Call, sign: int = 1):
+    """Upserts the call into its day's row; the caller commits with the call itself"""
+    delta = call_stats_delta(call, sign)
+    stmt = pg_insert(CallStatsDaily).values(day=call_stats_day(call), **delta)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CallStatsDaily.day],
+        set_={
+            **{name: getattr(CallStatsDaily, name) + getattr(stmt.excluded, name) for name in COUNTER_COLUMNS},
+            "updated_at": func.now(),
+        }
+    )
+    await db.execute(stmt)
+
+
+def funnel_columns():
+    """Funnel counters over Call rows as one COUNT(*) FILTER (...) pass"""
+    return (
+        func.count(Call.id).label("called"),
+        func.count(Call.id).filter(Call.disposition.in_(TALKED_DISPOSITIONS)).label("talked"),
+        func.count(Call.id).filter(Call.disposition == DispositionType.INTERESTED).label("interested"),
+        func.count(Call.id).filter(Call.crm_status == CRMStatus.ADDED).label("lead"),
+        func.coalesce(func.sum(Call.duration), 0.0).label("duration_sum"),
+        func.count(Call.duration).label("duration_count"),
+    )
+
+
+def rebuild_daily_stats(db: Session) -> int:
+    """
+    Recomputes call_stats_daily from completed calls; returns the number of days.
+    Days before the oldest stored call (archived partitions) keep their rows.
+    """
+    day = cast(func.timezone("UTC", Call.created_at), Date).label("day")
+    source = (
+        select(day, *funnel_columns())
+        .filter(Call.status == CallStatus.COMPLETED)
+        .group_by(day)
+    )
+    oldest = db.scalar(select(func.min(Call.created_at)))
+    stale = delete(CallStatsDaily)
+    if oldest is not None:
+        stale = stale.filter(CallStatsDaily.day >= oldest.astimezone(timezone.utc).date())
+    db.execute(stale)
+    db.execute(insert(CallStatsDaily).from_select(["day", *COUNTER_COLUMNS], source))
+    db.commit()
+    return db.query(func.count(CallStatsDaily.day)).scalar()
+
+
+def read_daily_totals(db: Session, date_from: Optional[date] = None, date_to: Optional[date] = None) -> dict:
+    """Sums the rollup rows for [date_from, date_to] (inclusive, either side optional)"""
+    query = select(*(func.coalesce(func.sum(getattr(CallStatsDaily, name)), 0).label(name) for name in COUNTER_COLUMNS))
+    if date_from is not None:
+        query = query.filter(CallStatsDaily.day >= date_from)
+    if date_to is not None:
+        query = query.filter(CallStatsDaily.day <= date_to)
+    return dict(db.execute(query).mappings().one())
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        days = rebuild_daily_stats(session)
+        print(f"[CallStats] Rebuilt call_stats_daily: {days} days")
+    finally:
+        session.close()
@@ -0,0 +1,146 @@
+"""
+Turn-level transcript storage (call_turns).
+
+The Voximplant scenario posts the transcript as a list of turns
+({speaker, text, offset}; older scenarios send "Агент: ..." strings). Each
+turn is stored as a row so search can filter by speaker and point to the
+place in the call; Call.transcript keeps the plain text used by the analysis.
+
+CLI (turns for calls stored before call_turns existed):
+    python -m app.services.call_turns backfill
+"""
+import argparse
+import re
+from typing import Any, List, Optional
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.call import Call
+from app.models.call_turn import CallTurn
+
+SPEAKERS = {
+    "agent": "agent", "ai": "agent", "assistant": "agent", "агент": "agent", "ассистент": "agent", "бот": "agent",
+    "customer": "customer", "user": "customer", "client": "customer",
+    "пользователь": "customer", "клиент": "customer",
+}
+
+_TURN_LINE = re.compile(r"^\s*([^:\n\d]{1,40}):\s*(.+)$")
+_PG_ARRAY_ITEM = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,{}]+)')
+
+
+def normalize_speaker(label: Optional[str]) -> str:
+    label = (label or "").strip()
+    return SPEAKERS.get(label.lower(), label.lower() or "unknown")
+
+
+def _turn(speaker: Optional[str], text: Optional[str], offset: Any = None) -> Optional[dict]:
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        offset_seconds = float(offset) if offset is not None else None
+    except (TypeError, ValueError):
+        offset_seconds = None
+    return {"speaker": normalize_speaker(speaker), "text": text, "offset_seconds": offset_seconds}
+
+
+def _parse_line(line: str) -> Optional[dict]:
+    match = _TURN_LINE.match(line)
+    if match:
+        return _turn(match.group(1), match.group(2))
+    return _turn(None, line)
+
+
+def parse_lines(text: Optional[str]) -> List[dict]:
+    """Turns from a plain transcript ("Speaker: text" per line, blank lines ignored)"""
+    text = (text or "").strip()
+    # Calls stored before the webhook was typed kept the scenario's array as a
+    # Postgres array literal: {"Агент: ...","Пользователь: ..."}
+    if text.startswith("{") and text.endswith("}"):
+        lines = [
+            quoted.replace('\\"', '"').replace("\\\\", "\\") if quoted else bare
+            for quoted, bare in _PG_ARRAY_ITEM.findall(text[1:-1])
+        ]
+    else:
+        lines = text.splitlines()
+    return [turn for turn in (_parse_line(line) for line in lines) if turn]
+
+
+def parse_turns(items: List[Any], raw_text: Optional[str] = None) -> List[dict]:
+    """Turns from the webhook's transcript list; falls back to raw_text lines"""
+    turns = []
+    for item in items or []:
+        if isinstance(item, dict):
+            turn = _turn(
+                item.get("speaker") or item.get("role"),
+                item.get("text"),
+                item.get("offset", item.get("offset_seconds"))
+            )
+        else:
+            turn = _parse_line(str(item))
+        if turn:
+            turns.append(turn)
+    return turns or parse_lines(raw_text)
+
+
+def _rows(call_id: int, turns: List[dict]) -> List[dict]:
+    return [{"call_id": call_id, "position": position, **turn} for position, turn in enumerate(turns)]
+
+
+async def replace_turns(db: AsyncSession, call_id: int, turns: List[dict]):
+    """Stores the call's turns (a redelivered transcript replaces the old ones)"""
+    await db.execute(delete(CallTurn).filter(CallTurn.call_id == call_id))
+    if turns:
+        await db.execute(insert(CallTurn), _rows(call_id, turns))
+
+
+def backfill_turns(db: Session, batch_size: int = 500) -> int:
+    """Parses Call.transcript of calls that have no turns yet; returns the number of calls"""
+    last_id, total = 0, 0
+    while True:
+        calls = db.execute(
+            select(Call.id, Call.transcript)
+            .filter(
+                Call.id > last_id,
+                Call.transcript.isnot(None),
+                ~exists().where(CallTurn.call_id == Call.id)
+            )
+            .order_by(Call.id)
+            .limit(batch_size)
+        ).all()
+        if not calls:
+            return total
+
+        rows = [row for call_id, transcript in calls for row in _rows(call_id, parse_lines(transcript))]
+        if rows:
+            db.execute(insert(CallTurn), rows)
+        db.commit()
+
+        last_id = calls[-1].id
+        total += len(calls)
+        print(f"[CallTurns] Backfilled {total} calls (last id {last_id})")
+
+
+def main():
+    from app.core.database import SessionLocal
+    from app.models.campaign import Campaign  # noqa: F401 - referenced by calls.campaign_id
+
+    parser = argparse.ArgumentParser(description="Turn-level transcripts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="Store turns for calls that only have Call.transcript")
+    backfill.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "backfill":
+            total = backfill_turns(db, args.batch_size)
+            print(f"[CallTurns] Done: {total} calls")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Parsing of phone number uploads for outbound campaigns.
+Supports CSV (header with phone/phone_number column, or first column) and NDJSON
+(one object with "phone"/"phone_number" per line, or one bare string per line).
+"""
+import csv
+import json
+import re
+from typing import IO, Iterator, Optional
+
+PHONE_COLUMNS = ("phone", "phone_number", "number", "телефон")
+_STRIP_RE = re.compile(r"[\s\-().]")
+_PHONE_RE = re.compile(r"^\+?\d{7,15}$")
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    """Strips formatting characters; returns None if the result is not a phone number"""
+    if value is None:
+        return None
+    phone = _STRIP_RE.sub("", str(value))
+    if not _PHONE_RE.match(phone):
+        return None
+    return phone
+
+
+def is_ndjson(filename: Optional[str], content_type: Optional[str]) -> bool:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    return name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype
+
+
+def _iter_csv(stream: IO[str]) -> Iterator[Optional[str]]:
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    column = 0
+    lowered = [h.strip().lower() for h in header]
+    for name in PHONE_COLUMNS:
+        if name in lowered:
+            column = lowered.index(name)
+            break
+    else:
+        # No header row - the first line is already a number
+        yield header[0] if header else None
+
+    for row in reader:
+        yield row[column] if len(row) > column else None
+
+
+def _iter_ndjson(stream: IO[str]) -> Iterator[Optional[str]]:
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        if isinstance(item, dict):
+            yield next((item[k] for k in PHONE_COLUMNS if item.get(k)), None)
+        elif isinstance(item, (str, int)):
+            yield str(item)
+        else:
+            yield None
+
+
+def iter_phone_numbers(stream: IO[str], ndjson: bool = False) -> Iterator[Optional[str]]:
+    """
+    Streams normalized phone numbers from an upload without loading it into memory.
+    Yields None for rows that could not be parsed, so callers can count them.
+    """
+    rows = _iter_ndjson(stream) if ndjson else _iter_csv(stream)
+    for value in rows:
+        yield normalize_phone(value)
@@ -0,0 +1,256 @@
+"""
+Throttled dialer for outbound campaigns.
+
+Each running campaign keeps at most `max_concurrent_calls` calls in flight
+(INITIATING or CALLING). A slot is freed when the transcript webhook moves the
+call to ANALYZING, or when the call gets no transcript within
+DIALER_CALL_TIMEOUT_SECONDS. Calls are claimed with row locks, so several
+API workers can run the dialer against the same database.
+
+A call whose StartScenarios request was never sent (open Voximplant circuit,
+no free connection) goes back to QUEUED instead of FAILED. While the circuit
+is open no calls are claimed; once it half-opens a single call is dialed as
+the trial request.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.call import Call, CallStatus
+from app.models.campaign import Campaign, CampaignStatus
+from app.services.http_client import UNSENT_ERRORS, voximplant_client
+from app.services.voximplant import voximplant_service
+from app.services.call_events import publish_call_status, publish_status_change
+from app.services.call_state import can_transition, transition, stage_values
+
+IN_FLIGHT_STATUSES = (CallStatus.INITIATING, CallStatus.CALLING)
+
+
+async def dial_call(db: AsyncSession, call: Call) -> Optional[str]:
+    """
+    Starts the Voximplant scenario for an already stored call.
+    call.call_id is committed before StartScenarios: the scenario asks for
+    the call's context right away.
+    Sets call.voximplant_call_id; the caller commits.
+    Returns media_session_access_url or None; raises one of UNSENT_ERRORS
+    when the request was not sent.
+    """
+    call.call_id = call.call_id or str(uuid.uuid4())
+    await db.commit()
+
+    voximplant_call_id = await voximplant_service.start_call(call.call_id, call.phone_number)
+    call.voximplant_call_id = voximplant_call_id
+    return voximplant_call_id
+
+
+class CampaignDialer:
+    def __init__(self):
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dial_tasks: set[asyncio.Task] = set()
+
+    def notify_slot_freed(self):
+        """Called when an in-flight campaign call finishes, to refill the slot right away"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        print(f"[Dialer] Started (poll every {settings.DIALER_POLL_INTERVAL_SECONDS}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Let StartScenarios requests that are already on the wire finish
+        if self._dial_tasks:
+            await asyncio.gather(*self._dial_tasks, return_exceptions=True)
+        print("[Dialer] Stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                print(f"[Dialer] Tick error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.DIALER_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def tick(self):
+        """One dialer pass: expire stale calls, fill free slots, close finished campaigns"""
+        async with AsyncSessionLocal() as db:
+            await self._expire_stale_calls(db)
+
+            result = await db.execute(
+                select(Campaign.id).filter(Campaign.status == CampaignStatus.RUNNING)
+            )
+            campaign_ids = list(result.scalars().all())
+            await db.rollback()
+
+            for campaign_id in campaign_ids:
+                limit = self._claim_limit()
+                if limit == 0:
+                    break
+                for call_id in await self._claim_calls(db, campaign_id, limit):
+                    task = asyncio.create_task(self._dial(call_id))
+                    self._dial_tasks.add(task)
+                    task.add_done_callback(self._dial_tasks.discard)
+
+            await self._complete_finished_campaigns(db, campaign_ids)
+
+    def _claim_limit(self) -> Optional[int]:
+        """Calls a campaign may claim now: none while the Voximplant circuit is open, one trial once it half-opens"""
+        breaker = voximplant_client.breaker
+        if breaker.state == breaker.CLOSED:
+            return None
+        if breaker.retry_after() > 0:
+            return 0
+        # Another trial call is still in flight
+        return 0 if self._dial_tasks else 1
+
+    async def _claim_calls(self, db: AsyncSession, campaign_id: int, limit: Optional[int] = None) -> list[int]:
+        """Moves up to (free slots, at most `limit`) QUEUED calls to INITIATING and returns their ids"""
+        # Campaign row lock serializes slot accounting between workers
+        result = await db.execute(
+            select(Campaign).filter(Campaign.id == campaign_id).with_for_update()
+        )
+        campaign = result.scalars().first()
+        if not campaign or campaign.status != CampaignStatus.RUNNING:
+            await db.rollback()
+            return []
+
+        in_flight = await db.scalar(
+            select(func.count(Call.id)).filter(
+                Call.campaign_id == campaign_id,
+                Call.status.in_(IN_FLIGHT_STATUSES)
+            )
+        )
+        free_slots = campaign.max_concurrent_calls - in_flight
+        if limit is not None:
+            free_slots = min(free_slots, limit)
+        if free_slots <= 0:
+            await db.rollback()
+            return []
+
+        result = await db.execute(
+            select(Call.id).filter(
+                Call.campaign_id == campaign_id,
+                Call.status == CallStatus.QUEUED
+            ).order_by(Call.id).limit(free_slots).with_for_update(skip_locked=True)
+        )
+        call_ids = list(result.scalars().all())
+
+        if call_ids:
+            await db.execute(
+                update(Call).filter(Call.id.in_(call_ids)).values(
+                    **stage_values(CallStatus.INITIATING), dialed_at=func.now()
+                )
+            )
+        await db.commit()
+        return call_ids
+
+    async def _dial(self, call_id: int):
+        async with AsyncSessionLocal() as db:
+            try:
+                call = await db.get(Call, call_id)
+                if not call:
+                    return
+
+                try:
+                    voximplant_call_id = await dial_call(db, call)
+                except UNSENT_ERRORS as e:
+                    await self._requeue(db, call, e)
+                    return
+                await db.refresh(call, ["status"], with_for_update=True)
+                if not can_transition(call.status, CallStatus.CALLING):
+                    # Transcript already arrived while StartScenarios was in flight
+                    await db.commit()
+                    return
+                transition(call, CallStatus.CALLING if voximplant_call_id else CallStatus.FAILED)
+                await publish_call_status(db, call)
+                await db.commit()
+
+                if call.status == CallStatus.FAILED:
+                    print(f"[Dialer] Call {call_id} to {call.phone_number} failed to start")
+                    self.notify_slot_freed()
+            except Exception as e:
+                print(f"[Dialer] Dial error for call {call_id}: {e}")
+                await db.rollback()
+                # Not a call the transcript webhook has already moved on
+                result = await db.execute(
+                    update(Call)
+                    .filter(Call.id == call_id, Call.status.in_(IN_FLIGHT_STATUSES))
+                    .values(**stage_values(CallStatus.FAILED))
+                    .returning(Call.id)
+                )
+                failed_ids = list(result.scalars().all())
+                await publish_status_change(db, failed_ids, CallStatus.FAILED)
+                await db.commit()
+                if failed_ids:
+                    self.notify_slot_freed()
+
+    async def _requeue(self, db: AsyncSession, call: Call, error: Exception):
+        """StartScenarios never reached Voximplant: the call is dialed again on a later pass"""
+        await db.refresh(call, ["status"], with_for_update=True)
+        if call.status == CallStatus.INITIATING:
+            transition(call, CallStatus.QUEUED)
+            call.dialed_at = None
+            await publish_call_status(db, call)
+        await db.commit()
+        print(f"[Dialer] Call {call.id} back in the queue, not sent: {type(error).__name__}")
+
+    async def _expire_stale_calls(self, db: AsyncSession):
+        """Campaign calls that never got a transcript (e.g. failed PSTN leg) stop holding a slot"""
+        deadline = datetime.utcnow() - timedelta(seconds=settings.DIALER_CALL_TIMEOUT_SECONDS)
+        result = await db.execute(
+            update(Call).filter(
+                Call.campaign_id.isnot(None),
+                Call.status.in_(IN_FLIGHT_STATUSES),
+                Call.dialed_at < deadline
+            ).values(**stage_values(CallStatus.FAILED)).returning(Call.id)
+        )
+        expired_ids = list(result.scalars().all())
+        await publish_status_change(db, expired_ids, CallStatus.FAILED)
+        await db.commit()
+        if expired_ids:
+            print(f"[Dialer] Marked {len(expired_ids)} stale campaign calls as FAILED")
+
+    async def _complete_finished_campaigns(self, db: AsyncSession, campaign_ids: list[int]):
+        for campaign_id in campaign_ids:
+            remaining = await db.scalar(
+                select(func.count(Call.id)).filter(
+                    Call.campaign_id == campaign_id,
+                    Call.status.in_((CallStatus.QUEUED,) + IN_FLIGHT_STATUSES)
+                )
+            )
+            if remaining:
+                continue
+            await db.execute(
+                update(Campaign).filter(
+                    Campaign.id == campaign_id,
+                    Campaign.status == CampaignStatus.RUNNING
+                ).values(status=CampaignStatus.COMPLETED, completed_at=func.now())
+            )
+            print(f"[Dialer] Campaign {campaign_id} completed")
+        await db.commit()
+
+
+campaign_dialer = CampaignDialer()
@@ -0,0 +1,200 @@
+"""
+Shared outbound HTTP clients.
+
+One `UpstreamClient` per external API and process keeps a pool of keep-alive
+(HTTP/2 where the server offers it) connections, so requests after the first
+skip the TCP/TLS handshake. The pool is limited per upstream host
+(HTTP_MAX_CONNECTIONS); waiting for a free connection longer than
+HTTP_POOL_TIMEOUT_SECONDS fails instead of queueing forever.
+
+Retries, with jittered exponential backoff:
+- every request whose connection could not be made (nothing was sent),
+- idempotent requests also on timeouts, dropped connections, 429 and 5xx.
+StartScenarios is not idempotent: a retry after the request reached
+Voximplant would dial the customer twice.
+
+A circuit breaker per upstream opens after CIRCUIT_FAILURE_THRESHOLD
+consecutive failures: requests then fail at once with CircuitOpenError
+instead of waiting for timeouts, and after CIRCUIT_RESET_SECONDS one trial
+request decides whether the upstream is back. Waiting for a pooled connection
+says nothing about the upstream and does not count as a failure.
+
+UNSENT_ERRORS are the errors `request` raises when nothing reached the
+upstream: callers may put the work back and try again later.
+
+Clients are created on first use inside the running event loop and closed by
+`close_http_clients` (API lifespan shutdown).
+"""
+import asyncio
+import random
+import time
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_CIRCUIT_OPENED, UPSTREAM_RETRIES
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# The request never left this process: safe to retry whatever it does
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+class CircuitOpenError(Exception):
+    """The upstream failed too often recently; the request was not sent"""
+
+
+UNSENT_ERRORS = (CircuitOpenError, httpx.PoolTimeout) + NOT_SENT_ERRORS
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_request(self):
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = self.HALF_OPEN
+        # Half-open: one trial request at a time, the rest keep failing fast
+        if self.state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        raise CircuitOpenError(f"{self.name}: circuit open after {self.failures} consecutive failures")
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets the trial request through (0 when not open)"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(self.opened_at + self.reset_seconds - time.monotonic(), 0.0)
+
+    def abandon(self):
+        """The request was cancelled: no verdict, a later request may be the trial"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                print(f"[HTTP] {self.name}: circuit opened after {self.failures} consecutive failures")
+                UPSTREAM_CIRCUIT_OPENED.labels(self.name).inc()
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff before retry number `attempt` (1-based): exponential, capped, +-50% jitter"""
+    delay = settings.HTTP_RETRY_BASE_DELAY_SECONDS * (2 ** (attempt - 1))
+    delay = min(delay, settings.HTTP_RETRY_MAX_DELAY_SECONDS)
+    return delay * random.uniform(0.5, 1.5)
+
+
+class UpstreamClient:
+    def __init__(self, name: str, base_url: str, timeout: float):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(name, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+        self.counters = {"requests": 0, "retries": 0, "failures": 0, "rejected": 0}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=settings.HTTP_HTTP2,
+                timeout=httpx.Timeout(
+                    self.timeout,
+                    connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+                    pool=settings.HTTP_POOL_TIMEOUT_SECONDS,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS,
+                ),
+            )
+        return self._client
+
+    async def request(self, method: str, path: str, *, idempotent: bool, **kwargs) -> httpx.Response:
+        """
+        Response of the last attempt (any status, the caller checks it).
+        Raises one of UNSENT_ERRORS when nothing was sent, or the last transport error.
+        """
+        attempts = max(settings.HTTP_RETRY_ATTEMPTS, 1)
+        for attempt in range(1, attempts + 1):
+            try:
+                self.breaker.before_request()
+            except CircuitOpenError:
+                self.counters["rejected"] += 1
+                raise
+
+            self.counters["requests"] += 1
+            retry = attempt < attempts
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except asyncio.CancelledError:
+                self.breaker.abandon()
+                raise
+            except httpx.PoolTimeout:
+                # All pooled connections busy: nothing was sent, no verdict on the upstream
+                self.breaker.abandon()
+                if not retry:
+                    raise
+            except NOT_SENT_ERRORS:
+                self._failed()
+                if not retry:
+                    raise
+            except httpx.TransportError:
+                # Timeouts, dropped connections: the upstream may have acted on the request
+                self._failed()
+                if not (retry and idempotent):
+                    raise
+            else:
+                if response.status_code < 500 and response.status_code != 429:
+                    self.breaker.record_success()
+                    return response
+                self._failed()
+                if not (retry and idempotent and response.status_code in RETRY_STATUSES):
+                    return response
+
+            self.counters["retries"] += 1
+            UPSTREAM_RETRIES.labels(self.name).inc()
+            await asyncio.sleep(retry_delay(attempt))
+
+    def _failed(self):
+        self.counters["failures"] += 1
+        self.breaker.record_failure()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict:
+        return {**self.counters, "circuit": self.breaker.state}
+
+
+voximplant_client = UpstreamClient("voximplant", settings.VOXIMPLANT_API_URL, settings.VOXIMPLANT_TIMEOUT_SECONDS)
+
+HTTP_CLIENTS = (voximplant_client,)
+
+
+async def close_http_clients():
+    for upstream in HTTP_CLIENTS:
+        await upstream.aclose()
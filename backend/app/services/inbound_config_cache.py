@@ -0,0 +1,134 @@
+"""
+Process-local cache of the active inbound configuration.
+
+GET /inbound/webhook/config (start of every inbound call) and inbound
+transcripts read the active InboundConfig from memory. A cached version holds
+the config fields and the pre-rendered webhook response with its ETag (hash
+of the body, the same in every process), so the webhook is a memory read and
+a client sending If-None-Match gets a 304.
+
+A trigger on inbound_configs notifies INBOUND_CONFIG_CHANNEL on any change
+(PUT /inbound/config, psql); every API process drops its version and loads
+the next one on the following read. Processes without the LISTEN connection
+(app.worker) read Postgres every time.
+"""
+import asyncio
+import hashlib
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.inbound_config import InboundConfig
+from app.schemas.inbound_config import InboundConfigForVoximplant
+from app.services.prompt_registry import TEMPLATE_COLUMNS
+
+CONFIG_FIELDS = ("language", "voice", "greeting_message", "prompt", "funnel_goal")
+# Inbound calls are created with the config's prompt_templates ids
+TEMPLATE_ID_FIELDS = tuple(TEMPLATE_COLUMNS.values())
+
+# Webhook answer when no inbound config is active
+WEBHOOK_DEFAULTS = {
+    "language": "ru",
+    "voice": "3EuKHIEZbSzrHGNmdYsx",
+    "greeting_message": "Здравствуйте! Чем могу помочь?",
+    "prompt": "Ты - полезный ассистент. Помогай клиентам с их вопросами.",
+    "funnel_goal": "Помочь клиенту решить его вопрос",
+}
+
+
+async def load_active_config(db: AsyncSession) -> Optional[dict]:
+    result = await db.execute(select(InboundConfig).filter(InboundConfig.is_active == True))
+    config = result.scalars().first()
+    if config is None:
+        return None
+    return {field: getattr(config, field) for field in CONFIG_FIELDS + TEMPLATE_ID_FIELDS}
+
+
+def render_webhook(config: Optional[dict]) -> tuple[bytes, str]:
+    """Webhook response body and its ETag"""
+    fields = {field: config[field] for field in CONFIG_FIELDS} if config else WEBHOOK_DEFAULTS
+    body = InboundConfigForVoximplant(
+        **fields,
+        elevenlabs_api_key=settings.ELEVENLABS_API_KEY,
+        elevenlabs_agent_id=settings.ELEVENLABS_AGENT_ID
+    ).model_dump_json().encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, list of tags or *)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class InboundConfigCache:
+    def __init__(self):
+        self._current: Optional[dict] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        # Set once the LISTEN connection is up: before that nothing would invalidate the cache
+        self.listening = False
+        # Bumped on every invalidation: a load that raced with one is not kept
+        self.version = 0
+        self.counters = {"hits": 0, "loads": 0, "invalidations": 0}
+
+    async def get(self, db: Optional[AsyncSession] = None) -> dict:
+        """
+        {"config": active config fields or None, "body": webhook JSON, "etag": ...}
+        Callers that already hold a session pass it and load with it: waiting for
+        a second pooled connection (or for a load that waits for one) while
+        holding the first can exhaust the pool.
+        """
+        current = self._current
+        if current is not None:
+            self.counters["hits"] += 1
+            return current
+        if db is not None:
+            version = self.version
+            return self._keep(version, await self._load(db))
+
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        # One load per process after an invalidation, however many calls are starting
+        async with self._load_lock:
+            if self._current is not None:
+                self.counters["hits"] += 1
+                return self._current
+            version = self.version
+            return self._keep(version, await self._load())
+
+    def _keep(self, version: int, current: dict) -> dict:
+        # Not kept if invalidated during the load, or if nothing would invalidate it
+        if self.listening and version == self.version:
+            self._current = current
+        return current
+
+    async def _load(self, db: Optional[AsyncSession] = None) -> dict:
+        if db is not None:
+            config = await load_active_config(db)
+        else:
+            async with AsyncSessionLocal() as own_db:
+                config = await load_active_config(own_db)
+        self.counters["loads"] += 1
+        body, etag = render_webhook(config)
+        return {"config": config, "body": body, "etag": etag}
+
+    def invalidate(self, payload: Optional[str] = None):
+        self.version += 1
+        self.counters["invalidations"] += 1
+        self._current = None
+
+    def on_connect(self):
+        """LISTEN (re)connected: changes made meanwhile were not notified"""
+        self.listening = True
+        self.invalidate()
+
+    def stats(self) -> dict:
+        return {**self.counters, "version": self.version, "cached": self._current is not None}
+
+
+inbound_config_cache = InboundConfigCache()
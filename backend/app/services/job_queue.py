@@ -0,0 +1,132 @@
+"""
+Postgres-backed queue for transcript analysis jobs.
+
+The webhook enqueues a job in the same transaction that stores the transcript,
+so a stored transcript always has a job. Workers claim jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, retry failures with jittered exponential
+backoff and re-queue jobs whose worker died mid-run.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update, exists, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.analysis_job import AnalysisJob, JobStatus
+from app.models.call import Call, CallStatus
+from app.services.call_events import publish_status_change
+from app.services.call_state import stage_values
+
+# Call statuses of the analysis pipeline (a call in one of these needs a job)
+PIPELINE_STATUSES = (
+    CallStatus.ANALYZING,
+    CallStatus.PREPARING_FOLLOWUP,
+    CallStatus.SENDING_SMS,
+    CallStatus.ADDING_TO_CRM,
+)
+
+
+def enqueue_analysis(db: AsyncSession, call_id: int) -> AnalysisJob:
+    """Adds an analysis job to the session; the caller commits it together with the call"""
+    job = AnalysisJob(call_id=call_id, status=JobStatus.PENDING, attempts=0)
+    db.add(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with +-50% jitter, capped at JOB_RETRY_MAX_DELAY_SECONDS"""
+    delay = settings.JOB_RETRY_BASE_DELAY_SECONDS * (2 ** max(attempts - 1, 0))
+    delay = min(delay, settings.JOB_RETRY_MAX_DELAY_SECONDS)
+    return delay * random.uniform(0.5, 1.5)
+
+
+async def claim_jobs(db: AsyncSession, worker_id: str, limit: int) -> list[AnalysisJob]:
+    """Locks up to `limit` due jobs for this worker and marks them RUNNING"""
+    if limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(AnalysisJob)
+        .filter(AnalysisJob.status == JobStatus.PENDING, AnalysisJob.run_after <= now)
+        .order_by(AnalysisJob.run_after, AnalysisJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = list(result.scalars().all())
+
+    for job in jobs:
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.locked_by = worker_id
+        job.locked_at = now
+    await db.commit()
+    return jobs
+
+
+async def complete_job(db: AsyncSession, job_id: int):
+    await db.execute(
+        update(AnalysisJob).filter(AnalysisJob.id == job_id).values(
+            status=JobStatus.DONE, finished_at=datetime.utcnow(), locked_by=None, locked_at=None
+        )
+    )
+    await db.commit()
+
+
+async def fail_job(db: AsyncSession, job: AnalysisJob, error: str) -> bool:
+    """
+    Schedules a retry, or marks the job and its call FAILED after JOB_MAX_ATTEMPTS.
+    Returns True if the job will be retried.
+    """
+    will_retry = job.attempts < settings.JOB_MAX_ATTEMPTS
+    values = {"last_error": error[:2000], "locked_by": None, "locked_at": None}
+
+    if will_retry:
+        values["status"] = JobStatus.PENDING
+        values["run_after"] = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        values["status"] = JobStatus.FAILED
+        values["finished_at"] = datetime.utcnow()
+        # Only a call still in the pipeline: another job of the call may have completed it
+        result = await db.execute(
+            update(Call)
+            .filter(Call.id == job.call_id, Call.status.in_(PIPELINE_STATUSES))
+            .values(**stage_values(CallStatus.FAILED))
+            .returning(Call.id)
+        )
+        await publish_status_change(db, list(result.scalars().all()), CallStatus.FAILED)
+
+    await db.execute(update(AnalysisJob).filter(AnalysisJob.id == job.id).values(**values))
+    await db.commit()
+    return will_retry
+
+
+async def requeue_stuck_jobs(db: AsyncSession) -> tuple[int, int]:
+    """
+    Recovers work lost to crashed workers:
+    - RUNNING jobs whose lease is older than JOB_LOCK_TIMEOUT_SECONDS go back to PENDING
+    - calls left in the analysis pipeline without any open job get a new job
+    Returns (requeued_jobs, created_jobs).
+    """
+    deadline = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    result = await db.execute(
+        update(AnalysisJob)
+        .filter(AnalysisJob.status == JobStatus.RUNNING, AnalysisJob.locked_at < deadline)
+        .values(status=JobStatus.PENDING, run_after=datetime.utcnow(), locked_by=None, locked_at=None)
+    )
+    requeued = result.rowcount
+
+    open_job = exists().where(and_(
+        AnalysisJob.call_id == Call.id,
+        AnalysisJob.status.in_((JobStatus.PENDING, JobStatus.RUNNING))
+    ))
+    result = await db.execute(
+        select(Call.id).filter(Call.status.in_(PIPELINE_STATUSES), ~open_job)
+    )
+    orphan_call_ids = list(result.scalars().all())
+    for call_id in orphan_call_ids:
+        enqueue_analysis(db, call_id)
+
+    await db.commit()
+    return requeued, len(orphan_call_ids)
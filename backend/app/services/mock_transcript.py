@@ -4,6 +4,8 @@ Will be replaced with actual Voximplant transcript retrieval later.
 """
 import random
 
+from app.models.call import DispositionType
+
 
 MOCK_TRANSCRIPTS = [
     """AI: Здравствуйте! Это HALO AI. Меня зовут Алиса. Я звоню, чтобы рассказать о нашей новой платформе для автоматизации звонков. Вам удобно сейчас разговаривать?
@@ -65,6 +67,50 @@ AI: Perfect! I'll send you a Telegram link. Thanks for your time, John!
 Customer: Thanks, bye!"""
 ]
 
+# Expected disposition of each MOCK_TRANSCRIPTS entry (call classifier evaluation)
+MOCK_DISPOSITIONS = [
+    DispositionType.INTERESTED,
+    DispositionType.REJECTED,
+    DispositionType.NO_ANSWER,
+    DispositionType.CONTINUE_IN_CHAT,
+]
+
+# Short calls as the scenario stores them: (transcript, duration_seconds, expected disposition).
+# Most are trivial; the last ones look trivial but are conversations the LLM has to read.
+MOCK_SHORT_CALLS = [
+    ("", 0.0, DispositionType.NO_ANSWER),
+    ("Агент: Здравствуйте! Это HALO AI, удобно говорить?", 12.0, DispositionType.NO_ANSWER),
+    ("Агент: Здравствуйте!\nПользователь: [тишина]\nАгент: Вы меня слышите?", 15.0, DispositionType.NO_ANSWER),
+    ("Пользователь: Абонент не отвечает или временно недоступен. Перезвоните позднее.", 8.0, DispositionType.NO_ANSWER),
+    ("Пользователь: Здравствуйте, вы позвонили Ивану. Оставьте сообщение после звукового сигнала.\n"
+     "Агент: Здравствуйте! Это HALO AI, перезвоним вам позже.", 20.0, DispositionType.NO_ANSWER),
+    ("Пользователь: Abonent vaqtincha aloqa doirasidan tashqarida.", 6.0, DispositionType.NO_ANSWER),
+    ("Пользователь: Муштарии мавриди назар дастнорас аст.", 6.0, DispositionType.NO_ANSWER),
+    ("Пользователь: Абонент занят. Пожалуйста, перезвоните позднее.", 5.0, DispositionType.BUSY),
+    ("Агент: Здравствуйте! Это HALO AI, удобно говорить?\nПользователь: Я за рулём, перезвоните позже.",
+     9.0, DispositionType.BUSY),
+    ("Агент: Assalomu alaykum! HALO AI dan qo'ng'iroq qilyapmiz.\nПользователь: Hozir bandman, keyinroq qo‘ng‘iroq qiling.",
+     10.0, DispositionType.BUSY),
+    ("Агент: Салом! Ин HALO AI.\nПользователь: Ман ҳозир банд ҳастам.", 7.0, DispositionType.BUSY),
+    ("Агент: Здравствуйте, это Анна?\nПользователь: Нет, вы ошиблись номером.", 8.0, DispositionType.WRONG_NUMBER),
+    ("Агент: Assalomu alaykum, Aziz akami?\nПользователь: Yo'q, noto'g'ri raqamga tushdingiz, adashdingiz.",
+     9.0, DispositionType.WRONG_NUMBER),
+    ("Агент: Салом, ин Фаррух аст?\nПользователь: Не, шумо хато занг задед.", 7.0, DispositionType.WRONG_NUMBER),
+    ("Агент: Здравствуйте! Это HALO AI, удобно говорить?\nПользователь: Алло? Алло!", 6.0, DispositionType.NO_ANSWER),
+    ("Агент: Assalomu alaykum! HALO AI.\nПользователь: Allo, labbay?", 5.0, DispositionType.NO_ANSWER),
+    ("Агент: Здравствуйте! Это HALO AI, удобно говорить?\nПользователь: Алло?", 140.0, DispositionType.NO_ANSWER),
+    ("Агент: Здравствуйте! Это HALO AI, удобно говорить?\nПользователь: Сейчас занят, но звучит интересно, "
+     "перезвоните позже.", 14.0, DispositionType.INTERESTED),
+    ("Агент: Assalomu alaykum! HALO AI.\nПользователь: Kerak emas, rahmat.", 6.0, DispositionType.REJECTED),
+    ("Агент: Салом! Ин HALO AI.\nПользователь: Не, даркор нест.", 5.0, DispositionType.REJECTED),
+]
+
+
+def labelled_mock_calls() -> list[tuple[str, float, DispositionType]]:
+    """Every mock call with its expected disposition; full conversations get a typical duration"""
+    conversations = [(transcript, 90.0, disposition) for transcript, disposition in zip(MOCK_TRANSCRIPTS, MOCK_DISPOSITIONS)]
+    return conversations + MOCK_SHORT_CALLS
+
 
 def get_mock_transcript() -> str:
     """Returns a random mock transcript"""
@@ -1,167 +1,212 @@
-from openai import AsyncOpenAI
+import hashlib
+import json
+import time
+
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
 from app.core.config import settings
+from app.core.metrics import OPENAI_ANALYSIS_SECONDS, OPENAI_TOKENS
+from app.schemas.analysis import CallAnalysis
+from app.services.analysis_cache import analysis_cache, analysis_cache_key
+from app.services.analysis_prompt import ANALYSIS_RUBRIC, build_analysis_prompt
 from typing import Optional
 
+ANALYSIS_TEMPERATURE = 0.7
+
+
+def strict_json_schema(schema: dict) -> dict:
+    """JSON schema for OpenAI strict mode: every object closed, all of its properties required"""
+    if schema.get("type") == "object":
+        schema["additionalProperties"] = False
+        schema["required"] = list(schema.get("properties", {}))
+    for value in schema.values():
+        for item in value if isinstance(value, list) else [value]:
+            if isinstance(item, dict):
+                strict_json_schema(item)
+    return schema
+
+
+# Structured output: the model can only answer with a CallAnalysis object
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": CallAnalysis.__name__,
+        "schema": strict_json_schema(CallAnalysis.model_json_schema()),
+        "strict": True,
+    },
+}
+
+# Part of the analysis cache key: any change of the rubric or of the result
+# schema gives new keys, so verdicts of an older rubric are never served
+ANALYSIS_VERSION = hashlib.sha256(
+    json.dumps([ANALYSIS_RUBRIC, ANALYSIS_RESPONSE_FORMAT], ensure_ascii=False, sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+# Validation errors quoted back to the model on the retry
+RETRY_ERROR_MAX_CHARS = 1000
+
+
+class AnalysisOutputError(Exception):
+    """The model refused or returned an invalid analysis (after the retry)"""
+
+
+def parse_analysis_content(content: Optional[str]) -> dict:
+    """Validates the model's JSON answer against CallAnalysis; raises ValueError if it does not match"""
+    content = (content or "").strip()
+
+    # Batch API files exported before response_format was set may wrap the JSON in a code block
+    if content.startswith("```"):
+        content = content.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+
+    return CallAnalysis.model_validate_json(content).model_dump(mode="json")
+
 
 class OpenAIService:
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, base_url=settings.OPENAI_BASE_URL)
+        self.counters = {
+            "requests": 0, "input_tokens": 0, "cached_tokens": 0, "output_tokens": 0,
+            "prompts_truncated": 0, "transcripts_truncated": 0,
+            "invalid_outputs": 0, "retries": 0, "refusals": 0,
+        }
 
     async def analyze_conversation(
         self,
         transcript: str,
         prompt: str,
-        funnel_goal: str = None
+        funnel_goal: str = None,
+        read_cache: bool = True
     ) -> dict:
+        """Analysis result only, see analyze_conversation_with_usage"""
+        result, _ = await self.analyze_conversation_with_usage(transcript, prompt, funnel_goal, read_cache)
+        return result
+
+    async def analyze_conversation_with_usage(
+        self,
+        transcript: str,
+        prompt: str,
+        funnel_goal: str = None,
+        read_cache: bool = True
+    ) -> tuple[dict, Optional[dict]]:
         """
-        Analyzes conversation and returns:
+        Analyzes conversation and returns a validated CallAnalysis as a dict:
         - summary
         - disposition
         - followup_message
         - customer_interest
         - crm_status
-        - funnel_achieved (if funnel_goal provided)
-        """
+        - funnel_achieved (null if no funnel_goal)
 
-        funnel_section = ""
-        if funnel_goal:
-            funnel_section = f"""
-ЦЕЛЬ ЗВОНКА (ВОРОНКА):
-{funnel_goal}
-
-"""
-
-        analysis_prompt = f"""
-Ты анализируешь запись телефонного звонка продаж. На основе транскрипции и оригинального промпта предоставь детальный анализ.
-
-ОРИГИНАЛЬНЫЙ ПРОМПТ:
-{prompt}
-
-{funnel_section}ТРАНСКРИПЦИЯ:
-{transcript}
-
-Пожалуйста, проанализируй и предоставь следующее в формате JSON (ВСЕ ТЕКСТОВЫЕ ПОЛЯ ДОЛЖНЫ БЫТЬ НА РУССКОМ ЯЗЫКЕ):
-
-1. **disposition**: ВНИМАТЕЛЬНО определи статус по следующим критериям:
-
-"interested" — Клиент ПРОЯВИЛ ОСОЗНАННЫЙ ИНТЕРЕС
-
-Используется ТОЛЬКО ЕСЛИ выполнено хотя бы одно из условий ниже:
-
-• Клиент обсуждает продукт, услугу или свою задачу
-• Клиент отвечает на вопросы о бизнесе / потребностях
-• Клиент задаёт уточняющие вопросы  о цене, сроках, формате
-•  Клиент выражает сомнения или возражения (в т.ч. «дорого», «подумаю»)
-• Клиент согласился получить информацию о продукте
-• Клиент договорился о встрече / звонке / продолжении общения
-• Клиент явно подтвердил, что ему это может быть полезно
-
-ВАЖНО:
-Сомнение, возражение по цене или фраза «я подумаю» —
-ЭТО НЕ ОТКАЗ.
-
-НЕ СЧИТАЕТСЯ "interested":
-«да»
-«удобно»
-«можно»
-«слушаю»
-«говорите»
-
-И любые ответы, которые только подтверждают начало разговора
-
-"rejected" — ИНТЕРЕС НЕ ПРОЯВЛЕН или ДИАЛОГ ОБОРВАН
-Используется, если разговор завершён или оборвался, и при этом:
-• Клиент не проявил интереса к продукту
-• Клиент не обсуждал свою задачу или бизнес
-• Клиент не дал согласия на получение информации
-• Клиент не было договорённостей о продолжении контакта
-
-В том числе:
-• Разговор закончился на этапе приветствия / установления контакта
-• Клиент дал только формальные ответы без вовлечения
-• Диалог прервался до выявления потребности или проявления интереса
-• Клиент отвечал, но прекратил диалог без объяснений
-• Клиент давал короткие ответы без вовлечения и исчез
-
- Даже если клиент сказал «удобно», но дальше разговор не развился — это rejected.
-
-"continue_in_chat" — Договорились продолжить общение в чате / мессенджере, по почте
-• Когда обе стороны согласились общаться через чат, Telegram, WhatsApp и т.д.
-• Когда оператор предложил перенести разговор в текстовый формат и клиент согласился
-• Когда договорились обмениваться информацией через мессенджер
-
-"busy" — Клиент говорит, что сейчас занят и отключается
-• Когда человек в диалоге говорит "Я занят", "Мне некогда", "Позвоните позже"
-• Когда клиент просит перезвонить в другое время
-• Когда клиент говорит "У меня нет времени" и вешает трубку
-• Когда договорились о перезвоне в конкретное время
-
-"wrong_number" — Оператор попал не туда
-• Когда человек говорит "Вы ошиблись", "Не туда попали", "Это не моё"
-• Когда клиент говорит, что это не его номер или не его компания
-• Когда номер недействителен или принадлежит другому лицу
-
-"no_answer" — ДИАЛОГА НЕ БЫЛО
-Используется ТОЛЬКО ЕСЛИ:
-• Клиент вообще не вступал в диалог
-• Нет ни одного осмысленного ответа клиента
-• Только гудки, тишина, автоответчик
-• Звонок не состоялся или сразу завершился
-
-НЕ ИСПОЛЬЗОВАТЬ "no_answer", если:
-клиент отвечал по существу
-клиент сообщил информацию о себе и своей ситуации
-диалог прервался после начала разговора
-диалог длился
-клиент задал хотя бы один вопрос
-
-2. **summary**: Краткое резюме разговора (1-3 предложения) НА РУССКОМ ЯЗЫКЕ
-3. **followup_message**: Короткое последующее сообщение (1-3 предложения + призыв к действию) для отправки клиенту НА РУССКОМ ЯЗЫКЕ
-4. **customer_interest**: Краткое описание того, что именно заинтересовало клиента (или "Не заинтересован" если отказался) НА РУССКОМ ЯЗЫКЕ
-5. **crm_status**: Одно из: "added" (если заинтересован), "not_created" (если не ответил/занят/неправильный номер), "pending" (другие случаи)"""
-
-        if funnel_goal:
-            analysis_prompt += """
-6. **funnel_achieved**: Boolean (true/false) - Была ли достигнута цель воронки во время этого звонка? Проанализируй, была ли выполнена указанная выше цель."""
-
-        analysis_prompt += "\n\nВерни ТОЛЬКО валидный JSON, никакого дополнительного текста."
+        and the request's token usage ({input_tokens, cached_tokens, output_tokens};
+        None when no request was made).
 
+        Results are cached by content (see app.services.analysis_cache);
+        read_cache=False always asks the model (re-analysis) and stores the new result.
+        Failures raise: transient API errors and AnalysisOutputError are retried
+        by the analysis job queue, there is no made-up default result.
+        """
+        model = settings.OPENAI_ANALYSIS_MODEL
+        cache_key = None
+        if settings.ANALYSIS_CACHE_ENABLED:
+            cache_key = self.cache_key(transcript, prompt, funnel_goal)
+            cached = await analysis_cache.get(cache_key) if read_cache else None
+            if cached is not None:
+                return cached, None
+
+        messages, prompt_stats = build_analysis_prompt(transcript, prompt, funnel_goal)
+        if prompt_stats["prompt_truncated"]:
+            self.counters["prompts_truncated"] += 1
+        if prompt_stats["transcript_truncated"]:
+            self.counters["transcripts_truncated"] += 1
+
+        started = time.perf_counter()
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Ты аналитик телефонных звонков продаж. Всегда отвечай только валидным JSON, без дополнительного текста или форматирования. Все текстовые поля должны быть на русском языке."},
-                    {"role": "user", "content": analysis_prompt}
-                ],
-                temperature=0.7
-            )
-
-            content = response.choices[0].message.content.strip()
+            result, usage = await self._request_analysis(model, messages)
+        except (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError) as e:
+            # Transient API failure - the analysis job is retried with backoff
+            OPENAI_ANALYSIS_SECONDS.labels("transient_error").observe(time.perf_counter() - started)
+            print(f"OpenAI analysis transient error: {e}")
+            raise
+        except AnalysisOutputError as e:
+            OPENAI_ANALYSIS_SECONDS.labels("invalid_output").observe(time.perf_counter() - started)
+            print(f"OpenAI analysis error: {e}")
+            raise
+        except Exception as e:
+            OPENAI_ANALYSIS_SECONDS.labels("error").observe(time.perf_counter() - started)
+            print(f"OpenAI analysis error: {e}")
+            raise
+        OPENAI_ANALYSIS_SECONDS.labels("ok").observe(time.perf_counter() - started)
 
-            # Remove markdown code blocks if present
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
+        if cache_key:
+            await analysis_cache.set(cache_key, model, result)
+        return result, usage
 
-            import json
-            result = json.loads(content)
+    def cache_key(self, transcript: str, prompt: str, funnel_goal: str = None) -> str:
+        return analysis_cache_key(
+            settings.OPENAI_ANALYSIS_MODEL, prompt, funnel_goal, transcript, ANALYSIS_VERSION
+        )
 
-            return result
+    def build_messages(self, transcript: str, prompt: str, funnel_goal: str = None) -> list[dict]:
+        """Chat messages of the analysis request (also used for OpenAI Batch API files)"""
+        return build_analysis_prompt(transcript, prompt, funnel_goal)[0]
 
-        except Exception as e:
-            print(f"OpenAI analysis error: {e}")
-            # Return default values on error
-            return {
-                "disposition": "no_answer",
-                "summary": "Анализ не удался",
-                "followup_message": "Спасибо за ваше время.",
-                "customer_interest": "Неизвестно",
-                "crm_status": "not_created"
-            }
+    async def _request_analysis(self, model: str, messages: list[dict]) -> tuple[dict, dict]:
+        """
+        One request with the strict CallAnalysis schema. An answer that still
+        fails validation (e.g. cut off at the token limit) is retried once with
+        the validation error shown to the model.
+        """
+        usage = {"input_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+        for attempt in (1, 2):
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=ANALYSIS_TEMPERATURE,
+                response_format=ANALYSIS_RESPONSE_FORMAT
+            )
+            for name, value in self._record_usage(response.usage).items():
+                usage[name] += value
+
+            message = response.choices[0].message
+            if message.refusal:
+                self.counters["refusals"] += 1
+                raise AnalysisOutputError(f"Model refused the analysis: {message.refusal}")
+
+            try:
+                return parse_analysis_content(message.content), usage
+            except ValueError as e:
+                self.counters["invalid_outputs"] += 1
+                error = str(e)[:RETRY_ERROR_MAX_CHARS]
+                print(f"OpenAI analysis output invalid (attempt {attempt}): {error}")
+
+            if attempt == 1:
+                self.counters["retries"] += 1
+                messages = messages + [
+                    {"role": "assistant", "content": message.content or ""},
+                    {"role": "user", "content": f"Ответ не прошёл проверку: {error}\nВерни исправленный JSON строго по схеме."},
+                ]
+
+        raise AnalysisOutputError(f"Invalid analysis after retry: {error}")
+
+    def _record_usage(self, usage) -> dict:
+        """Token usage of one request; cached_tokens were served from OpenAI's prompt cache"""
+        details = getattr(usage, "prompt_tokens_details", None) if usage else None
+        tokens = {
+            "input_tokens": usage.prompt_tokens if usage else 0,
+            "cached_tokens": (details.cached_tokens or 0) if details else 0,
+            "output_tokens": usage.completion_tokens if usage else 0,
+        }
+        self.counters["requests"] += 1
+        for name, value in tokens.items():
+            self.counters[name] += value
+            OPENAI_TOKENS.labels(name.removesuffix("_tokens")).inc(value)
+        return tokens
+
+    def stats(self) -> dict:
+        input_tokens = self.counters["input_tokens"]
+        return {
+            **self.counters,
+            "cached_ratio": round(self.counters["cached_tokens"] / input_tokens, 4) if input_tokens else 0.0,
+        }
 
 
 openai_service = OpenAIService()
@@ -0,0 +1,34 @@
+"""
+Opaque keyset cursors for lists ordered by (created_at DESC, id DESC).
+The cursor is the base64url-encoded (created_at, id) of the last row of a page.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def next_cursor(rows: list, limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None if this was the last page"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
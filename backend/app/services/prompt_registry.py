@@ -0,0 +1,156 @@
+"""
+Content-addressed registry of prompt texts (prompt_templates).
+
+A campaign's prompt, greeting and funnel goal are the same multi-KB texts for
+every call: they are stored once, keyed by sha256, and calls and the inbound
+config refer to them by id (Call.prompt etc. read the text back by id). Rows
+never change, so both in-process maps (hash -> id for registering, id -> text
+for reading) are plain LRUs with nothing to invalidate.
+
+New texts are inserted in the caller's transaction; their ids are remembered
+only once it commits, so a rolled back insert never leaves a dangling id in
+memory.
+"""
+import hashlib
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.prompt_template import PromptTemplate
+
+# Text field -> id column, the same on Call and InboundConfig
+TEMPLATE_COLUMNS = {
+    "greeting_message": "greeting_template_id",
+    "prompt": "prompt_template_id",
+    "funnel_goal": "funnel_goal_template_id",
+}
+
+# session.info key of the templates inserted by its open transaction
+PENDING_KEY = "prompt_registry_pending"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PromptRegistry:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._ids: OrderedDict[str, int] = OrderedDict()
+        self._texts: OrderedDict[int, str] = OrderedDict()
+        self.counters = {"hits": 0, "registered": 0, "loads": 0}
+
+    async def register(self, db: AsyncSession, texts: Iterable[str]) -> list[int]:
+        """Ids of the texts, inserting the new ones (the caller commits)"""
+        texts = list(texts)
+        hashes, ids, missing = self._lookup(texts)
+        if missing:
+            inserted = set((await db.execute(self._insert_statement(missing))).scalars())
+            rows = (await db.execute(self._select_statement(missing))).all()
+            ids.update(self._store(db.sync_session, missing, inserted, rows))
+        return [ids[key] for key in hashes]
+
+    def register_sync(self, db: Session, texts: Iterable[str]) -> list[int]:
+        """register() for sync sessions"""
+        texts = list(texts)
+        hashes, ids, missing = self._lookup(texts)
+        if missing:
+            inserted = set(db.execute(self._insert_statement(missing)).scalars())
+            rows = db.execute(self._select_statement(missing)).all()
+            ids.update(self._store(db, missing, inserted, rows))
+        return [ids[key] for key in hashes]
+
+    async def texts(self, db: AsyncSession, ids: Iterable[int]) -> dict[int, str]:
+        ids = set(ids)
+        missing = [template_id for template_id in ids if template_id not in self._texts]
+        self.counters["hits"] += len(ids) - len(missing)
+        if missing:
+            rows = await db.execute(
+                select(PromptTemplate.id, PromptTemplate.content).filter(PromptTemplate.id.in_(missing))
+            )
+            self.counters["loads"] += len(missing)
+            for template_id, text in rows:
+                self._remember(self._texts, template_id, text)
+        return {template_id: self._texts[template_id] for template_id in ids if template_id in self._texts}
+
+    def _lookup(self, texts: list[str]) -> tuple[list[str], dict[str, int], dict[str, str]]:
+        """(hashes, remembered ids by hash, texts not remembered by hash)"""
+        hashes = [content_hash(text) for text in texts]
+        ids, missing = {}, {}
+        for key, text in zip(hashes, texts):
+            if key in self._ids:
+                self._ids.move_to_end(key)
+                ids[key] = self._ids[key]
+            else:
+                missing[key] = text
+        self.counters["hits"] += len(texts) - len(missing)
+        return hashes, ids, missing
+
+    @staticmethod
+    def _insert_statement(missing: dict[str, str]):
+        return (
+            pg_insert(PromptTemplate)
+            .values([{"content_hash": key, "content": text} for key, text in missing.items()])
+            .on_conflict_do_nothing(index_elements=["content_hash"])
+            .returning(PromptTemplate.content_hash)
+        )
+
+    @staticmethod
+    def _select_statement(missing: dict[str, str]):
+        return select(PromptTemplate.id, PromptTemplate.content_hash).filter(PromptTemplate.content_hash.in_(missing))
+
+    def _store(self, session: Session, missing: dict[str, str], inserted: set[str], rows) -> dict[str, int]:
+        self.counters["registered"] += len(inserted)
+        pending = session.info.setdefault(PENDING_KEY, {})
+        ids = {}
+        for template_id, key in rows:
+            ids[key] = template_id
+            if key in inserted or key in pending:
+                # Not committed yet: remembered by _on_commit
+                pending[key] = (template_id, missing[key])
+            else:
+                self._remember_template(key, template_id, missing[key])
+        return ids
+
+    def _remember_template(self, key: str, template_id: int, text: str):
+        self._remember(self._ids, key, template_id)
+        self._remember(self._texts, template_id, text)
+
+    def _remember(self, memory: OrderedDict, key, value):
+        memory[key] = value
+        memory.move_to_end(key)
+        while len(memory) > self.max_entries:
+            memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {**self.counters, "ids": len(self._ids), "texts": len(self._texts)}
+
+
+prompt_registry = PromptRegistry(settings.PROMPT_REGISTRY_MEMORY_SIZE)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session: Session):
+    for key, (template_id, text) in session.info.pop(PENDING_KEY, {}).items():
+        prompt_registry._remember_template(key, template_id, text)
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session: Session):
+    session.info.pop(PENDING_KEY, None)
+
+
+async def register_texts(db: AsyncSession, texts: dict[str, str]) -> dict[str, int]:
+    """{"prompt": text, ...} -> {"prompt_template_id": id, ...} for a Call or InboundConfig"""
+    ids = await prompt_registry.register(db, texts.values())
+    return {TEMPLATE_COLUMNS[field]: template_id for field, template_id in zip(texts, ids)}
+
+
+def register_texts_sync(db: Session, texts: dict[str, str]) -> dict[str, int]:
+    ids = prompt_registry.register_sync(db, texts.values())
+    return {TEMPLATE_COLUMNS[field]: template_id for field, template_id in zip(texts, ids)}
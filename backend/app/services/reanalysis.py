@@ -0,0 +1,457 @@
+"""
+Re-analysis of historical calls after an analysis rubric change.
+
+A ReanalysisRun selects COMPLETED calls with a transcript by creation date,
+disposition and language, and walks them by ascending id in pages of
+REANALYSIS_PAGE_SIZE. After every page the checkpoint (last_call_id) and the
+counters are committed, so a paused, cancelled or crashed run resumes where
+it stopped. Each call's old result is removed from call_stats_daily and the
+new one added in the same transaction.
+
+Two modes:
+- online: the analysis workers pick the run up with bounded concurrency and
+  hold back while live analysis jobs are waiting
+- batch: requests are exported as OpenAI Batch API JSONL and the results file
+  is ingested later (batch pricing, no load on the live quota)
+
+CLI:
+    python -m app.services.reanalysis create --date-from 2026-09-01 --disposition rejected
+    python -m app.services.reanalysis run 12           # online run in the foreground
+    python -m app.services.reanalysis status 12
+    python -m app.services.reanalysis export 13 requests.jsonl
+    python -m app.services.reanalysis ingest 13 results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+from datetime import date, datetime, timedelta
+from typing import AsyncIterable, AsyncIterator, Callable, Iterator, Optional
+
+from openai import APIConnectionError, APITimeoutError, RateLimitError, InternalServerError
+from sqlalchemy import and_, exists, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer, undefer_group
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.analysis_job import AnalysisJob, JobStatus
+from app.models.call import Call, CallStatus, DispositionType, PROMPT_TEXTS
+from app.models.reanalysis_run import ReanalysisRun, ReanalysisMode, ReanalysisStatus
+from app.services.analysis import apply_analysis_fields
+from app.services.analysis_cache import analysis_cache
+from app.services.call_stats import record_completed_call
+from app.services.job_queue import retry_delay
+from app.services.openai_service import openai_service, parse_analysis_content, ANALYSIS_TEMPERATURE, ANALYSIS_RESPONSE_FORMAT
+
+TRANSIENT_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+BATCH_CUSTOM_ID_PREFIX = "call-"
+
+
+def run_filters(run: ReanalysisRun) -> list:
+    conditions = [Call.status == CallStatus.COMPLETED, Call.transcript.isnot(None)]
+    if run.date_from is not None:
+        conditions.append(Call.created_at >= run.date_from)
+    if run.date_to is not None:
+        conditions.append(Call.created_at < run.date_to + timedelta(days=1))
+    if run.disposition is not None:
+        conditions.append(Call.disposition == run.disposition)
+    if run.language is not None:
+        conditions.append(Call.language == run.language)
+    return conditions
+
+
+def create_run(
+    db: Session,
+    mode: ReanalysisMode = ReanalysisMode.ONLINE,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    disposition: Optional[DispositionType] = None,
+    language: Optional[str] = None,
+    concurrency: Optional[int] = None
+) -> ReanalysisRun:
+    run = ReanalysisRun(
+        mode=mode,
+        status=ReanalysisStatus.PENDING,
+        date_from=date_from,
+        date_to=date_to,
+        disposition=disposition,
+        language=language,
+        concurrency=concurrency or settings.REANALYSIS_CONCURRENCY,
+        last_call_id=0,
+    )
+    run.total_calls = db.query(func.count(Call.id)).filter(*run_filters(run)).scalar()
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+    return run
+
+
+async def apply_reanalysis(db: AsyncSession, call: Call, analysis: dict) -> bool:
+    """Replaces the call's analysis and its rollup contribution; returns True if the disposition changed"""
+    old_disposition = call.disposition
+    await record_completed_call(db, call, sign=-1)
+    apply_analysis_fields(call, analysis)
+    await record_completed_call(db, call)
+    return call.disposition != old_disposition
+
+
+async def reanalyze_call(call_id: int) -> Optional[bool]:
+    """Re-analyzes one call; None if it is no longer eligible, else whether the disposition changed"""
+    async with AsyncSessionLocal() as db:
+        call = await db.get(Call, call_id, options=[undefer(Call.transcript), undefer_group(PROMPT_TEXTS)])
+        if not call or call.status != CallStatus.COMPLETED or not call.transcript:
+            return None
+        transcript, prompt, funnel_goal = call.transcript, call.prompt, call.funnel_goal
+
+    # No connection is held during the OpenAI request
+    for attempt in range(1, settings.JOB_MAX_ATTEMPTS + 1):
+        try:
+            # Never the cached verdict: re-analysis exists to score the call again
+            analysis = await openai_service.analyze_conversation(
+                transcript=transcript,
+                prompt=prompt,
+                funnel_goal=funnel_goal,
+                read_cache=False
+            )
+            break
+        except TRANSIENT_ERRORS:
+            if attempt == settings.JOB_MAX_ATTEMPTS:
+                raise
+            await asyncio.sleep(retry_delay(attempt))
+
+    async with AsyncSessionLocal() as db:
+        call = await db.get(Call, call_id, with_for_update=True)
+        if not call or call.status != CallStatus.COMPLETED:
+            return None
+        changed = await apply_reanalysis(db, call, analysis)
+        await db.commit()
+        return changed
+
+
+async def live_backlog(db: AsyncSession) -> bool:
+    """True while live analysis jobs are due - re-analysis waits for them"""
+    return await db.scalar(
+        select(exists().where(and_(
+            AnalysisJob.status == JobStatus.PENDING,
+            AnalysisJob.run_after <= datetime.utcnow()
+        )))
+    )
+
+
+async def claim_run(db: AsyncSession, worker_id: str) -> Optional[ReanalysisRun]:
+    """Takes a pending online run, or a running one whose worker lease expired"""
+    stale = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    result = await db.execute(
+        select(ReanalysisRun)
+        .filter(
+            ReanalysisRun.mode == ReanalysisMode.ONLINE,
+            or_(
+                ReanalysisRun.status == ReanalysisStatus.PENDING,
+                and_(
+                    ReanalysisRun.status == ReanalysisStatus.RUNNING,
+                    or_(ReanalysisRun.locked_at.is_(None), ReanalysisRun.locked_at < stale)
+                )
+            )
+        )
+        .order_by(ReanalysisRun.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    run = result.scalars().first()
+    if run is None:
+        await db.rollback()
+        return None
+
+    run.status = ReanalysisStatus.RUNNING
+    run.locked_by = worker_id
+    run.locked_at = datetime.utcnow()
+    if run.started_at is None:
+        run.started_at = datetime.utcnow()
+    await db.commit()
+    return run
+
+
+async def execute_run(run_id: int, worker_id: str, should_stop: Callable[[], bool] = lambda: False):
+    """Processes pages of a claimed online run until it is done, paused/cancelled or should_stop()"""
+    while True:
+        async with AsyncSessionLocal() as db:
+            run = await db.get(ReanalysisRun, run_id)
+            if run is None or run.status != ReanalysisStatus.RUNNING or run.locked_by != worker_id:
+                return
+
+            if should_stop():
+                # Release the lease so another worker resumes from the checkpoint
+                run.locked_by = None
+                run.locked_at = None
+                await db.commit()
+                return
+
+            if await live_backlog(db):
+                run.locked_at = datetime.utcnow()
+                await db.commit()
+                await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            result = await db.execute(
+                select(Call.id)
+                .filter(*run_filters(run), Call.id > run.last_call_id)
+                .order_by(Call.id)
+                .limit(settings.REANALYSIS_PAGE_SIZE)
+            )
+            call_ids = list(result.scalars().all())
+            concurrency = run.concurrency
+
+            if not call_ids:
+                run.status = ReanalysisStatus.DONE
+                run.finished_at = datetime.utcnow()
+                run.locked_by = None
+                run.locked_at = None
+                await db.commit()
+                print(f"[Reanalysis] Run {run_id} done: {run.processed_calls} calls, {run.changed_calls} changed")
+                return
+
+        semaphore = asyncio.Semaphore(concurrency)
+        errors = []
+
+        async def process(call_id: int) -> Optional[bool]:
+            async with semaphore:
+                try:
+                    return await reanalyze_call(call_id)
+                except Exception as e:
+                    errors.append(f"call {call_id}: {type(e).__name__}: {e}")
+                    return False
+
+        results = await asyncio.gather(*(process(call_id) for call_id in call_ids))
+
+        async with AsyncSessionLocal() as db:
+            values = {
+                "processed_calls": ReanalysisRun.processed_calls + len(call_ids) - len(errors),
+                "changed_calls": ReanalysisRun.changed_calls + sum(1 for changed in results if changed),
+                "failed_calls": ReanalysisRun.failed_calls + len(errors),
+                "last_call_id": call_ids[-1],
+                "locked_at": datetime.utcnow(),
+            }
+            if errors:
+                values["last_error"] = errors[-1][:2000]
+            await db.execute(update(ReanalysisRun).filter(ReanalysisRun.id == run_id).values(**values))
+            await db.commit()
+
+        print(f"[Reanalysis] Run {run_id}: checkpoint at call {call_ids[-1]} ({len(errors)} failed in page)")
+
+
+def batch_request_lines(db: Session, run: ReanalysisRun) -> Iterator[str]:
+    """OpenAI Batch API request lines (one chat completion per call), paged by id"""
+    if run.status == ReanalysisStatus.PENDING:
+        run.status = ReanalysisStatus.RUNNING
+        run.started_at = datetime.utcnow()
+        db.commit()
+
+    last_id = 0
+    while True:
+        calls = (
+            db.query(Call)
+            .options(undefer(Call.transcript), undefer_group(PROMPT_TEXTS))
+            .filter(*run_filters(run), Call.id > last_id)
+            .order_by(Call.id)
+            .limit(settings.REANALYSIS_PAGE_SIZE)
+            .all()
+        )
+        if not calls:
+            return
+        for call in calls:
+            yield json.dumps({
+                "custom_id": f"{BATCH_CUSTOM_ID_PREFIX}{call.id}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": settings.OPENAI_ANALYSIS_MODEL,
+                    "messages": openai_service.build_messages(call.transcript, call.prompt, call.funnel_goal),
+                    "temperature": ANALYSIS_TEMPERATURE,
+                    "response_format": ANALYSIS_RESPONSE_FORMAT,
+                },
+            }, ensure_ascii=False) + "\n"
+        last_id = calls[-1].id
+        # Transcripts of exported pages are not needed any more
+        db.expunge_all()
+
+
+def parse_batch_result(line: str) -> tuple[int, dict]:
+    """(call_id, analysis) from one Batch API output line; raises ValueError on failed requests"""
+    item = json.loads(line)
+    custom_id = item.get("custom_id") or ""
+    if not custom_id.startswith(BATCH_CUSTOM_ID_PREFIX):
+        raise ValueError(f"Unknown custom_id {custom_id!r}")
+    call_id = int(custom_id[len(BATCH_CUSTOM_ID_PREFIX):])
+
+    response = item.get("response") or {}
+    if item.get("error") or response.get("status_code") != 200:
+        raise ValueError(f"call {call_id}: request failed: {item.get('error') or response.get('status_code')}")
+    content = response["body"]["choices"][0]["message"]["content"]
+    return call_id, parse_analysis_content(content)
+
+
+async def ingest_batch_results(run_id: int, lines: AsyncIterable[str]) -> dict:
+    """
+    Applies a Batch API output file to the run's calls. Ingesting a file again
+    keeps calls and call_stats_daily consistent (only the run counters grow).
+    """
+    counters = {"processed": 0, "changed": 0, "failed": 0, "skipped": 0}
+    last_error = None
+
+    async def flush(final: bool = False):
+        async with AsyncSessionLocal() as db:
+            run = await db.get(ReanalysisRun, run_id, with_for_update=True)
+            run.processed_calls += counters["processed"]
+            run.changed_calls += counters["changed"]
+            run.failed_calls += counters["failed"]
+            if last_error:
+                run.last_error = last_error[:2000]
+            if final and run.processed_calls + run.failed_calls >= run.total_calls:
+                run.status = ReanalysisStatus.DONE
+                run.finished_at = datetime.utcnow()
+            await db.commit()
+
+    totals = dict(counters)
+    pending = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            call_id, analysis = parse_batch_result(line)
+            async with AsyncSessionLocal() as db:
+                call = await db.get(
+                    Call, call_id, with_for_update=True, options=[undefer(Call.transcript), undefer_group(PROMPT_TEXTS)]
+                )
+                if not call or call.status != CallStatus.COMPLETED:
+                    counters["skipped"] += 1
+                    continue
+                if settings.ANALYSIS_CACHE_ENABLED:
+                    await analysis_cache.set(
+                        openai_service.cache_key(call.transcript, call.prompt, call.funnel_goal),
+                        settings.OPENAI_ANALYSIS_MODEL,
+                        analysis
+                    )
+                changed = await apply_reanalysis(db, call, analysis)
+                await db.commit()
+            counters["processed"] += 1
+            counters["changed"] += int(changed)
+        except Exception as e:
+            counters["failed"] += 1
+            last_error = f"{type(e).__name__}: {e}"
+
+        pending += 1
+        if pending >= settings.REANALYSIS_PAGE_SIZE:
+            await flush()
+            for key in totals:
+                totals[key] += counters[key]
+                counters[key] = 0
+            pending = 0
+
+    await flush(final=True)
+    for key in totals:
+        totals[key] += counters[key]
+    return totals
+
+
+async def _run_foreground(run_id: int):
+    worker_id = f"cli:{socket.gethostname()}:{os.getpid()}"
+    async with AsyncSessionLocal() as db:
+        run = await db.get(ReanalysisRun, run_id, with_for_update=True)
+        if run is None or run.mode != ReanalysisMode.ONLINE:
+            print(f"[Reanalysis] Run {run_id} not found or not an online run")
+            return
+        if run.status in (ReanalysisStatus.DONE, ReanalysisStatus.CANCELLED):
+            print(f"[Reanalysis] Run {run_id} is {run.status.value}")
+            return
+        run.status = ReanalysisStatus.RUNNING
+        run.locked_by = worker_id
+        run.locked_at = datetime.utcnow()
+        if run.started_at is None:
+            run.started_at = datetime.utcnow()
+        await db.commit()
+    await execute_run(run_id, worker_id)
+
+
+async def _file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, encoding="utf-8") as results:
+        for line in results:
+            yield line
+
+
+def _print_run(run: ReanalysisRun):
+    print(
+        f"Run {run.id} [{run.mode.value}] {run.status.value}: "
+        f"{run.processed_calls}/{run.total_calls} processed, {run.changed_calls} changed, "
+        f"{run.failed_calls} failed, checkpoint call {run.last_call_id}"
+    )
+    if run.last_error:
+        print(f"  last error: {run.last_error.splitlines()[0]}")
+
+
+def main():
+    from app.core.database import SessionLocal
+    from app.models.campaign import Campaign  # noqa: F401 - referenced by calls.campaign_id
+
+    parser = argparse.ArgumentParser(description="Re-analyze completed calls")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Create a run for a filtered set of calls")
+    create.add_argument("--mode", choices=[m.value for m in ReanalysisMode], default=ReanalysisMode.ONLINE.value)
+    create.add_argument("--date-from", type=date.fromisoformat)
+    create.add_argument("--date-to", type=date.fromisoformat)
+    create.add_argument("--disposition", choices=[d.value for d in DispositionType])
+    create.add_argument("--language")
+    create.add_argument("--concurrency", type=int)
+
+    for name in ("run", "status"):
+        commands.add_parser(name).add_argument("run_id", type=int)
+
+    export = commands.add_parser("export", help="Write OpenAI Batch API requests (JSONL)")
+    export.add_argument("run_id", type=int)
+    export.add_argument("path")
+
+    ingest = commands.add_parser("ingest", help="Apply an OpenAI Batch API output file (JSONL)")
+    ingest.add_argument("run_id", type=int)
+    ingest.add_argument("path")
+
+    args = parser.parse_args()
+    db = SessionLocal()
+    try:
+        if args.command == "create":
+            run = create_run(
+                db,
+                mode=ReanalysisMode(args.mode),
+                date_from=args.date_from,
+                date_to=args.date_to,
+                disposition=DispositionType(args.disposition) if args.disposition else None,
+                language=args.language,
+                concurrency=args.concurrency
+            )
+            _print_run(run)
+        elif args.command == "run":
+            asyncio.run(_run_foreground(args.run_id))
+            _print_run(db.get(ReanalysisRun, args.run_id))
+        elif args.command == "status":
+            _print_run(db.get(ReanalysisRun, args.run_id))
+        elif args.command == "export":
+            run = db.get(ReanalysisRun, args.run_id)
+            count = 0
+            with open(args.path, "w", encoding="utf-8") as out:
+                for line in batch_request_lines(db, run):
+                    out.write(line)
+                    count += 1
+            print(f"[Reanalysis] Wrote {count} batch requests to {args.path}")
+        elif args.command == "ingest":
+            totals = asyncio.run(ingest_batch_results(args.run_id, _file_lines(args.path)))
+            print(f"[Reanalysis] Ingested {args.path}: {totals}")
+            db.expire_all()
+            _print_run(db.get(ReanalysisRun, args.run_id))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Transcript webhook ingestion.
+
+POST /call-transcript only appends the raw body to transcript_ingest_log
+under an idempotency key and acknowledges; a redelivery with the same key is
+a no-op. Applying the transcript (find or create the call, transcript turns,
+ANALYZING, analysis job, status event) runs after the response in
+`process_delivery`. Deliveries left unprocessed by a crashed API process, or
+failed, are replayed by the analysis worker up to TRANSCRIPT_MAX_ATTEMPTS
+failures.
+"""
+import hashlib
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.call import Call, CallStatus
+from app.models.transcript_ingest import TranscriptIngestEntry
+from app.schemas.call import TranscriptWebhook
+from app.services.call_events import publish_call_status
+from app.services.call_state import transition
+from app.services.call_turns import parse_turns, replace_turns
+from app.services.dialer import campaign_dialer
+from app.services.inbound_config_cache import TEMPLATE_ID_FIELDS, inbound_config_cache
+from app.services.job_queue import enqueue_analysis
+from app.services.prompt_registry import register_texts
+
+# Unprocessed deliveries older than this are replayed by the worker
+REPLAY_AFTER_SECONDS = 60
+
+
+def idempotency_key(payload: TranscriptWebhook, header: Optional[str] = None) -> str:
+    """Idempotency-Key header if sent, else the call id + transcript hash (one transcript per call)"""
+    if header:
+        return f"header:{header}"
+    transcript_hash = hashlib.sha256((payload.raw_text or "").encode("utf-8")).hexdigest()
+    return f"call:{payload.call_id}:{transcript_hash}"
+
+
+async def record_delivery(db: AsyncSession, key: str, payload: TranscriptWebhook, body: bytes) -> Optional[int]:
+    """Appends the delivery to the ingest log; returns its id, or None for a duplicate"""
+    result = await db.execute(
+        pg_insert(TranscriptIngestEntry)
+        .values(idempotency_key=key, external_call_id=payload.call_id, payload=body.decode("utf-8"))
+        .on_conflict_do_nothing(index_elements=[TranscriptIngestEntry.idempotency_key])
+        .returning(TranscriptIngestEntry.id)
+    )
+    delivery_id = result.scalar()
+    await db.commit()
+    return delivery_id
+
+
+async def _find_call(db: AsyncSession, external_call_id: Optional[str]) -> Optional[Call]:
+    if not external_call_id:
+        return None
+    # Outbound calls: our call_id; inbound calls: the Voximplant id saved on creation.
+    # Recent partitions first: a transcript seldom comes days after its call
+    since = datetime.utcnow() - timedelta(days=settings.CALL_LOOKUP_RECENT_DAYS)
+    for period in (Call.created_at >= since, Call.created_at < since):
+        result = await db.execute(
+            select(Call)
+            .options(undefer(Call.transcript))
+            .filter(or_(Call.call_id == external_call_id, Call.voximplant_call_id == external_call_id), period)
+            .order_by(Call.id)
+            .limit(1)
+            .with_for_update()
+        )
+        call = result.scalars().first()
+        if call is not None:
+            return call
+    return None
+
+
+async def _create_inbound_call(db: AsyncSession, payload: TranscriptWebhook) -> Call:
+    # Active inbound config settings (process-local cache)
+    inbound_config = (await inbound_config_cache.get(db))["config"]
+    if inbound_config:
+        template_ids = {field: inbound_config[field] for field in TEMPLATE_ID_FIELDS}
+    else:
+        template_ids = await register_texts(db, {"greeting_message": "Входящий звонок", "prompt": "", "funnel_goal": ""})
+
+    call = Call(
+        phone_number=payload.phone or "unknown",
+        language=inbound_config["language"] if inbound_config else "ru",
+        voice=inbound_config["voice"] if inbound_config else "3EuKHIEZbSzrHGNmdYsx",
+        **template_ids,
+        status=CallStatus.CALLING,
+        call_id=str(uuid.uuid4()),  # our own internal call_id
+        voximplant_call_id=payload.call_id,  # original Voximplant call_id
+    )
+    db.add(call)
+    await db.flush()
+    print(f"[Webhook] Created INBOUND call {call.id} for Voximplant call_id {payload.call_id}")
+    return call
+
+
+async def apply_transcript(db: AsyncSession, payload: TranscriptWebhook) -> Optional[Call]:
+    """Stores the transcript and queues the analysis; returns None if the call already has it"""
+    call = await _find_call(db, payload.call_id)
+    if call is None:
+        call = await _create_inbound_call(db, payload)
+
+    if call.status == CallStatus.COMPLETED:
+        print(f"[Webhook] Call {call.id} is already completed, transcript ignored")
+        return None
+    if call.status == CallStatus.ANALYZING and call.transcript == (payload.raw_text or ""):
+        # Same transcript under another idempotency key - the analysis is already queued
+        return None
+
+    call.duration = payload.duration_seconds or 0
+    call.transcript = payload.raw_text or ""
+    await replace_turns(db, call.id, parse_turns(payload.transcript, payload.raw_text))
+    if call.status != CallStatus.ANALYZING:
+        transition(call, CallStatus.ANALYZING)
+
+    # Analysis job is committed atomically with the transcript; app.worker picks it up
+    enqueue_analysis(db, call.id)
+    await publish_call_status(db, call)
+    return call
+
+
+async def process_delivery(delivery_id: int) -> Optional[Call]:
+    """Applies one logged delivery (idempotent: processed entries are skipped)"""
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(TranscriptIngestEntry, delivery_id, with_for_update=True)
+        if entry is None or entry.processed_at is not None:
+            return None
+
+        try:
+            payload = TranscriptWebhook.model_validate_json(entry.payload)
+            call = await apply_transcript(db, payload)
+            entry.call_ref_id = call.id if call else None
+            entry.processed_at = datetime.utcnow()
+            entry.error = None
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"[Webhook] Delivery {delivery_id} failed: {e}")
+            await _record_error(delivery_id, f"{type(e).__name__}: {e}")
+            return None
+
+    if call is not None:
+        print(f"[Webhook] Transcript saved for call {call.id} (delivery {delivery_id})")
+        # Campaign call finished - its dialer slot is free now
+        if call.campaign_id:
+            campaign_dialer.notify_slot_freed()
+    return call
+
+
+async def _record_error(delivery_id: int, error: str):
+    async with AsyncSessionLocal() as db:
+        entry = await db.get(TranscriptIngestEntry, delivery_id)
+        if entry is not None:
+            entry.error = error[:2000]
+            entry.attempts += 1
+            await db.commit()
+            if entry.attempts >= settings.TRANSCRIPT_MAX_ATTEMPTS:
+                print(f"[Webhook] Delivery {delivery_id} gave up after {entry.attempts} attempts")
+
+
+async def replay_pending_deliveries(db: AsyncSession, limit: int = 100) -> int:
+    """
+    Processes deliveries acknowledged but never applied (API process died
+    before the background task, or processing failed). Fresh deliveries go
+    first; ones that failed TRANSCRIPT_MAX_ATTEMPTS times are no longer
+    replayed, so failing payloads cannot hold back newer deliveries.
+    """
+    deadline = datetime.utcnow() - timedelta(seconds=REPLAY_AFTER_SECONDS)
+    result = await db.execute(
+        select(TranscriptIngestEntry.id)
+        .filter(
+            TranscriptIngestEntry.processed_at.is_(None),
+            TranscriptIngestEntry.attempts < settings.TRANSCRIPT_MAX_ATTEMPTS,
+            TranscriptIngestEntry.received_at < deadline
+        )
+        .order_by(TranscriptIngestEntry.attempts, TranscriptIngestEntry.id)
+        .limit(limit)
+    )
+    delivery_ids = list(result.scalars().all())
+    await db.rollback()
+    for delivery_id in delivery_ids:
+        await process_delivery(delivery_id)
+    return len(delivery_ids)
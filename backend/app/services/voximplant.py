@@ -1,11 +1,21 @@
+import time
+
 import httpx
 from app.core.config import settings
+from app.core.metrics import VOXIMPLANT_ERRORS, VOXIMPLANT_REQUEST_SECONDS
+from app.services.call_context import start_payload
+from app.services.http_client import UNSENT_ERRORS, voximplant_client
 from typing import Optional
 
 
-class VoximplantService:
-    BASE_URL = "https://api.voximplant.com/platform_api"
+def _observe(operation: str, started: float, error: Optional[str] = None):
+    """Request latency by outcome; failures also count by reason (http_<status>, no_result, exception name)"""
+    VOXIMPLANT_REQUEST_SECONDS.labels(operation, "error" if error else "ok").observe(time.perf_counter() - started)
+    if error:
+        VOXIMPLANT_ERRORS.labels(operation, error).inc()
+
 
+class VoximplantService:
     def __init__(self):
         self.account_id = settings.VOXIMPLANT_ACCOUNT_ID
         self.api_key = settings.VOXIMPLANT_API_KEY
@@ -13,64 +23,24 @@ class VoximplantService:
         self.rule_id = settings.VOXIMPLANT_RULE_ID
         self.scenario_id = settings.VOXIMPLANT_SCENARIO_ID
         self.caller_id = settings.VOXIMPLANT_CALLER_ID
-        self.webook_url = settings.WEBHOOK_URL
-        self.openai_api_key = settings.OPENAI_API_KEY
-        self.elevenlabs_api_key = settings.ELEVENLABS_API_KEY
-        self.elevenlabs_agent_id = settings.ELEVENLABS_AGENT_ID
-        self.yandex_api_key = settings.YANDEX_API_KEY
-        self.yandex_folder_id = settings.YANDEX_FOLDER_ID
-        self.qwen_api_key = settings.QWEN_API_KEY
 
     # Temporary storage for call data (in production use database)
     _call_data_store = {}
 
-    async def start_call(
-        self,
-        call_id: str,
-        phone_number: str,
-        language: str,
-        tts_provider: str,
-        voice: str,
-        greeting_message: str,
-        prompt: str,
-        funnel_goal: str,
-        stability: float = 0.5,
-        speed: float = 1.0,
-        similarity_boost: float = 0.75
-    ) -> Optional[str]:
+    async def start_call(self, call_id: str, phone_number: str) -> Optional[str]:
         """
         Initiates a call via Voximplant using script_custom_data
-        TTS providers: elevenlabs, openai, yandex
+        The scenario fetches the rest of the call (prompt, voice, TTS provider
+        and keys) from GET /call-context/{call_id}, see app.services.call_context
         Returns: media_session_access_url or None
+        Raises one of UNSENT_ERRORS (open circuit, no connection) when the
+        request never reached Voximplant: the call can be dialed again later
         """
         import json
 
-        # Prepare custom data for scenario
-        custom_data = {
-            "call_id": call_id,
-            "webhook_url": self.webook_url,
-            "phone": phone_number,
-            "caller_id": self.caller_id,
-            "language": language,
-            "tts_provider": tts_provider,
-            "voice": voice,
-            "greeting_message": greeting_message,
-            "prompt": prompt,
-            "funnel_goal": funnel_goal,
-            "openai_api_key": self.openai_api_key,
-            "elevenlabs_api_key": self.elevenlabs_api_key,
-            "elevenlabs_agent_id": self.elevenlabs_agent_id,
-            "yandex_api_key": self.yandex_api_key,
-            "yandex_folder_id": self.yandex_folder_id,
-            "qwen_api_key": self.qwen_api_key,
-            # Voice settings
-            "stability": stability,
-            "speed": speed,
-            "similarity_boost": similarity_boost
-        }
+        custom_data = start_payload(call_id)
 
-        print(f"[Voximplant] Starting call to {phone_number} with TTS: {tts_provider}")
-        print(f"[Voximplant] Custom data: {json.dumps(custom_data)}")
+        print(f"[Voximplant] Starting call {call_id} to {phone_number}")
 
         # Build form data with script_custom_data
         form_data = {
@@ -82,32 +52,43 @@ class VoximplantService:
 
         print(f"[Voximplant] Form data keys: {list(form_data.keys())}")
 
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/StartScenarios",
-                    data=form_data,
-                    headers={"Content-Type": "application/x-www-form-urlencoded"}
-                )
-
-                print(f"[Voximplant] Response status: {response.status_code}")
-                print(f"[Voximplant] Response body: {response.text}")
-
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("result"):
-                    call_id = result.get("media_session_access_url")
-                    print(f"[Voximplant] Call started successfully, ID: {call_id}")
-                    return call_id
-                else:
-                    print(f"[Voximplant] API returned no result: {result}")
-                    return None 
+            # Not idempotent: only retried if the request could not be sent at all
+            response = await voximplant_client.request(
+                "POST",
+                "/StartScenarios",
+                idempotent=False,
+                data=form_data,
+                headers={"Content-Type": "application/x-www-form-urlencoded"}
+            )
+
+            print(f"[Voximplant] Response status: {response.status_code}")
+            print(f"[Voximplant] Response body: {response.text}")
+
+            response.raise_for_status()
+            result = response.json()
+
+            if result.get("result"):
+                call_id = result.get("media_session_access_url")
+                _observe("start_call", started)
+                print(f"[Voximplant] Call started successfully, ID: {call_id}")
+                return call_id
+            else:
+                _observe("start_call", started, "no_result")
+                print(f"[Voximplant] API returned no result: {result}")
+                return None 
 
         except httpx.HTTPStatusError as e:
+            _observe("start_call", started, f"http_{e.response.status_code}")
             print(f"[Voximplant] HTTP error {e.response.status_code}: {e.response.text}")
             return None
+        except UNSENT_ERRORS as e:
+            _observe("start_call", started, type(e).__name__)
+            print(f"[Voximplant] Call {call_id} not started, request not sent: {e}")
+            raise
         except Exception as e:
+            _observe("start_call", started, type(e).__name__)
             print(f"[Voximplant] API error: {e}")
             return None
 
@@ -129,17 +110,22 @@ class VoximplantService:
             "call_session_history_id": call_id
         }
 
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/GetCallHistory",
-                    params=params
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await voximplant_client.request("POST", "/GetCallHistory", idempotent=True, params=params)
+            response.raise_for_status()
+            history = response.json()
+        except httpx.HTTPStatusError as e:
+            _observe("get_call_history", started, f"http_{e.response.status_code}")
+            print(f"Voximplant get call history error: {e}")
+            return None
         except Exception as e:
+            _observe("get_call_history", started, type(e).__name__)
             print(f"Voximplant get call history error: {e}")
             return None
 
+        _observe("get_call_history", started)
+        return history
+
 
 voximplant_service = VoximplantService()
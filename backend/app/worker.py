@@ -0,0 +1,236 @@
+"""
+Analysis worker pool.
+
+Runs transcript analysis jobs from the analysis_jobs table outside the API:
+
+    python -m app.worker                      # ANALYSIS_WORKER_PROCESSES x ANALYSIS_WORKER_CONCURRENCY
+    python -m app.worker --processes 4 --concurrency 8
+
+Each process claims jobs with SELECT ... FOR UPDATE SKIP LOCKED, so throughput
+scales by adding processes or containers. SIGTERM/SIGINT stop claiming new jobs
+and let in-flight analyses finish.
+
+Idle capacity also runs online re-analysis runs (app.services.reanalysis),
+one per process, paused while live jobs are waiting. Every
+CALL_PARTITION_MAINTENANCE_SECONDS one of the processes creates upcoming calls
+partitions and archives expired ones (app.services.call_partitions).
+
+Prometheus metrics of all processes are served on WORKER_METRICS_PORT.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import traceback
+from typing import Optional
+
+from prometheus_client import start_http_server
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.core.metrics import exposition_registry, setup_multiprocess
+from app.models.campaign import Campaign  # noqa: F401 - referenced by calls.campaign_id
+from app.services.analysis import process_transcript_analysis
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_prompt import token_encoding
+from app.services.call_classifier import call_classifier
+from app.services.call_partitions import maintain_partitions
+from app.services.openai_service import openai_service
+from app.services.job_queue import claim_jobs, complete_job, fail_job, requeue_stuck_jobs
+from app.services.reanalysis import claim_run, execute_run
+from app.services.transcript_ingest import replay_pending_deliveries
+
+# How often an idle worker looks for an online re-analysis run
+REANALYSIS_CLAIM_INTERVAL_SECONDS = 10
+
+
+class AnalysisWorker:
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._running: set[asyncio.Task] = set()
+        self._reanalysis: Optional[asyncio.Task] = None
+        self._partitions: Optional[asyncio.Task] = None
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def run(self):
+        print(f"[Worker {self.worker_id}] Started, concurrency {self.concurrency}")
+        # Loading (possibly downloading) the tokenizer blocks - do it before taking jobs
+        await asyncio.to_thread(token_encoding)
+        await self._requeue_stuck()
+        last_requeue = asyncio.get_running_loop().time()
+        last_reanalysis_check = 0.0
+        last_partition_check = 0.0
+
+        while not self._stopping.is_set():
+            # Periodically recover jobs of workers that died mid-run
+            now = asyncio.get_running_loop().time()
+            if now - last_requeue > settings.JOB_LOCK_TIMEOUT_SECONDS / 2:
+                await self._requeue_stuck()
+                last_requeue = now
+
+            # At most one re-analysis run per process, next to live jobs
+            if (self._reanalysis is None or self._reanalysis.done()) and \
+                    now - last_reanalysis_check > REANALYSIS_CLAIM_INTERVAL_SECONDS:
+                last_reanalysis_check = now
+                await self._claim_reanalysis()
+
+            # Partition maintenance runs in a thread (archival copies whole months)
+            if (self._partitions is None or self._partitions.done()) and \
+                    now - last_partition_check > settings.CALL_PARTITION_MAINTENANCE_SECONDS:
+                last_partition_check = now
+                self._partitions = asyncio.create_task(self._maintain_partitions())
+
+            self._wakeup.clear()
+            free_slots = self.concurrency - len(self._running)
+            if free_slots > 0:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        jobs = await claim_jobs(db, self.worker_id, free_slots)
+                except Exception as e:
+                    print(f"[Worker {self.worker_id}] Claim error: {e}")
+                    jobs = []
+
+                for job in jobs:
+                    task = asyncio.create_task(self._run_job(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._on_job_done)
+
+            # Woken up early when a job finishes and frees a slot
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._running:
+            print(f"[Worker {self.worker_id}] Draining {len(self._running)} in-flight jobs")
+            await asyncio.gather(*self._running, return_exceptions=True)
+        if self._reanalysis is not None and not self._reanalysis.done():
+            print(f"[Worker {self.worker_id}] Finishing the current re-analysis page")
+            await asyncio.gather(self._reanalysis, return_exceptions=True)
+        print(
+            f"[Worker {self.worker_id}] Stopped, analysis cache: {analysis_cache.stats()}, "
+            f"openai: {openai_service.stats()}, pre-classifier: {call_classifier.stats()}"
+        )
+
+    def _on_job_done(self, task: asyncio.Task):
+        self._running.discard(task)
+        # A slot is free - claim the next job without waiting for the poll interval
+        self._wakeup.set()
+
+    async def _run_job(self, job):
+        try:
+            await process_transcript_analysis(job.call_id)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc()}"
+            async with AsyncSessionLocal() as db:
+                will_retry = await fail_job(db, job, error)
+            print(
+                f"[Worker {self.worker_id}] Job {job.id} (call {job.call_id}) failed, "
+                f"attempt {job.attempts}/{settings.JOB_MAX_ATTEMPTS}"
+                f"{', will retry' if will_retry else ', giving up'}: {e}"
+            )
+            return
+
+        async with AsyncSessionLocal() as db:
+            await complete_job(db, job.id)
+
+    async def _claim_reanalysis(self):
+        try:
+            async with AsyncSessionLocal() as db:
+                run = await claim_run(db, self.worker_id)
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] Re-analysis claim error: {e}")
+            return
+        if run is None:
+            return
+
+        print(f"[Worker {self.worker_id}] Re-analysis run {run.id} from call {run.last_call_id}")
+        self._reanalysis = asyncio.create_task(self._run_reanalysis(run.id))
+
+    async def _run_reanalysis(self, run_id: int):
+        try:
+            await execute_run(run_id, self.worker_id, should_stop=self._stopping.is_set)
+        except Exception as e:
+            # Lease expires and the run is picked up again from its checkpoint
+            print(f"[Worker {self.worker_id}] Re-analysis run {run_id} error: {e}")
+
+    async def _maintain_partitions(self):
+        try:
+            await asyncio.to_thread(maintain_partitions, engine)
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] Partition maintenance error: {e}")
+
+    async def _requeue_stuck(self):
+        try:
+            async with AsyncSessionLocal() as db:
+                replayed = await replay_pending_deliveries(db)
+            async with AsyncSessionLocal() as db:
+                requeued, created = await requeue_stuck_jobs(db)
+            if replayed:
+                print(f"[Worker {self.worker_id}] Replayed {replayed} unprocessed transcript deliveries")
+            if requeued or created:
+                print(f"[Worker {self.worker_id}] Re-queued {requeued} stuck jobs, created {created} missing jobs")
+        except Exception as e:
+            print(f"[Worker {self.worker_id}] Requeue error: {e}")
+
+
+async def _serve(concurrency: int):
+    worker = AnalysisWorker(concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+def run_worker_process(concurrency: int):
+    asyncio.run(_serve(concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HALO AI transcript analysis worker pool")
+    parser.add_argument("--processes", type=int, default=settings.ANALYSIS_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=settings.ANALYSIS_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        # Before the processes import the metrics: each writes its own samples
+        setup_multiprocess(os.path.join(settings.METRICS_MULTIPROC_DIR, "worker"))
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT, registry=exposition_registry())
+        print(f"[Worker] Metrics on :{settings.WORKER_METRICS_PORT}/metrics")
+
+    if args.processes <= 1:
+        run_worker_process(args.concurrency)
+        return
+
+    # spawn: every process builds its own engine/connection pool
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=run_worker_process, args=(args.concurrency,), name=f"analysis-worker-{i}")
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
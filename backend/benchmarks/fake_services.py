@@ -0,0 +1,137 @@
+"""
+Local stand-ins for the Voximplant Management API and the OpenAI chat
+completions API, for load tests that must not dial phones or spend tokens.
+
+    python benchmarks/fake_services.py --voximplant-port 9801 --openai-port 9802
+    python benchmarks/fake_services.py --openai-latency-ms 1500 --openai-error-rate 0.05
+
+Point the backend at them with
+    VOXIMPLANT_API_URL=http://127.0.0.1:9801/platform_api
+    OPENAI_BASE_URL=http://127.0.0.1:9802/v1
+
+Every response waits latency-ms +- jitter; error-rate of the requests get a
+500 (Voximplant) or a 500/429 (OpenAI, retried by the analysis job queue).
+The OpenAI fake answers with a valid CallAnalysis for the mock transcripts.
+"""
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.models.call import CRMStatus, DispositionType
+
+
+@dataclass
+class Behaviour:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    async def delay(self):
+        seconds = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    def fails(self) -> bool:
+        return random.random() < self.error_rate
+
+
+def voximplant_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/platform_api/StartScenarios")
+    async def start_scenarios(request: Request):
+        form = await request.form()
+        custom_data = json.loads(form.get("script_custom_data") or "{}")
+        await behaviour.delay()
+        if behaviour.fails():
+            return JSONResponse({"error": {"msg": "Internal error", "code": 500}}, status_code=500)
+        return {
+            "result": 1,
+            "media_session_access_url": f"https://fake.voximplant.local/{custom_data.get('call_id') or uuid.uuid4()}",
+        }
+
+    @app.post("/platform_api/GetCallHistory")
+    async def get_call_history():
+        await behaviour.delay()
+        return {"result": [], "total_count": 0}
+
+    return app
+
+
+def analysis_content(messages: list[dict]) -> str:
+    """A CallAnalysis answer: a customer who says yes is interested, everyone else is not"""
+    transcript = messages[-1]["content"] if messages else ""
+    interested = any(word in transcript.lower() for word in ("да,", "интересно", "давайте", "хорошо"))
+    return json.dumps({
+        "disposition": (DispositionType.INTERESTED if interested else DispositionType.REJECTED).value,
+        "summary": "Нагрузочный тест: звонок обработан фейковым OpenAI",
+        "followup_message": "Спасибо за разговор!",
+        "customer_interest": "Высокий" if interested else "Низкий",
+        "crm_status": (CRMStatus.ADDED if interested else CRMStatus.NOT_CREATED).value,
+        "funnel_achieved": interested,
+    }, ensure_ascii=False)
+
+
+def openai_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await behaviour.delay()
+        if behaviour.fails():
+            status = random.choice((429, 500))
+            return JSONResponse({"error": {"message": "Fake failure", "type": "server_error"}}, status_code=status)
+
+        messages = body.get("messages") or []
+        prompt_tokens = sum(len(str(message.get("content") or "")) for message in messages) // 4
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": analysis_content(messages), "refusal": None},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 60, "total_tokens": prompt_tokens + 60},
+        }
+
+    return app
+
+
+async def serve(voximplant_port: int, openai_port: int, voximplant: Behaviour, openai: Behaviour):
+    servers = [
+        uvicorn.Server(uvicorn.Config(voximplant_app(voximplant), host="127.0.0.1", port=voximplant_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(openai_app(openai), host="127.0.0.1", port=openai_port, log_level="warning")),
+    ]
+    print(f"[Fakes] Voximplant on :{voximplant_port} ({voximplant}), OpenAI on :{openai_port} ({openai})", flush=True)
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Voximplant and OpenAI APIs for load tests")
+    parser.add_argument("--voximplant-port", type=int, default=9801)
+    parser.add_argument("--openai-port", type=int, default=9802)
+    parser.add_argument("--voximplant-latency-ms", type=float, default=150)
+    parser.add_argument("--voximplant-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.25, help="latency +- this fraction")
+    args = parser.parse_args()
+
+    voximplant = Behaviour(args.voximplant_latency_ms, args.voximplant_latency_ms * args.jitter, args.voximplant_error_rate)
+    openai = Behaviour(args.openai_latency_ms, args.openai_latency_ms * args.jitter, args.openai_error_rate)
+    asyncio.run(serve(args.voximplant_port, args.openai_port, voximplant, openai))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+End-to-end load test of the call pipeline against fake Voximplant and OpenAI.
+
+Starts benchmarks/fake_services.py, `python -m app.server` and
+`python -m app.worker` wired to the fakes, then opens POST /calls at --rate
+calls/s for --duration seconds. Every call that started gets its mock
+transcript on POST /call-transcript after --talk-seconds, as the Voximplant
+scenario would send it. When all calls are COMPLETED or FAILED (or
+--drain-timeout passes) it reports throughput and p50/p95/p99 latency of both
+endpoints and the time from POST /calls to COMPLETED.
+
+    python benchmarks/pipeline_load.py --rate 20 --duration 30
+    python benchmarks/pipeline_load.py --rate 20 --duration 30 --save baseline.json
+    python benchmarks/pipeline_load.py --rate 20 --duration 30 --baseline baseline.json   # exit 1 on regression
+    python benchmarks/pipeline_load.py --openai-latency-ms 3000 --openai-error-rate 0.05 --worker-processes 4
+
+Regression gate: --baseline compares with a saved run and fails when a p95
+or the time to COMPLETED grew, or throughput / completed share dropped, by
+more than --tolerance. Compare runs on the same machine and settings only.
+
+Needs a migrated, disposable database (python -m app.core.schema) with the
+user from create_admin.py, and the usual .env. Analysis results are not
+cached during the run, so every call reaches the fake OpenAI (unless the
+local pre-classifier settles it).
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from server_scaling import BACKEND_DIR, free_port, wait_healthy
+from webhook_latency import percentile
+
+from app.core.database import SessionLocal
+from app.models.call import Call, CallStatus
+from app.services.mock_transcript import get_mock_transcript, get_mock_duration
+
+FINAL = (CallStatus.COMPLETED, CallStatus.FAILED)
+
+
+def wait_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1.0):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Nothing listens on port {port}")
+
+
+class Stack:
+    """Fake services, API and analysis worker as subprocesses; logs go to log_dir"""
+
+    def __init__(self, args):
+        self.args = args
+        self.log_dir = tempfile.mkdtemp(prefix="halo-load-")
+        self.processes: list[subprocess.Popen] = []
+        self.url = None
+
+    def _spawn(self, name: str, command: list[str], env: dict):
+        log = open(os.path.join(self.log_dir, f"{name}.log"), "w")
+        self.processes.append(subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT))
+
+    def start(self):
+        args = self.args
+        voximplant_port, openai_port, api_port = free_port(), free_port(), free_port()
+        env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+        self._spawn("fakes", [
+            sys.executable, "benchmarks/fake_services.py",
+            "--voximplant-port", str(voximplant_port), "--openai-port", str(openai_port),
+            "--voximplant-latency-ms", str(args.voximplant_latency_ms),
+            "--voximplant-error-rate", str(args.voximplant_error_rate),
+            "--openai-latency-ms", str(args.openai_latency_ms),
+            "--openai-error-rate", str(args.openai_error_rate),
+        ], env)
+        wait_port(voximplant_port)
+        wait_port(openai_port)
+
+        self.url = f"http://127.0.0.1:{api_port}"
+        env.update({
+            "VOXIMPLANT_API_URL": f"http://127.0.0.1:{voximplant_port}/platform_api",
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            "WEBHOOK_URL": f"{self.url}/call-transcript",
+            "DIALER_ENABLED": "false",
+            "ANALYSIS_CACHE_ENABLED": "false",
+            "WORKER_METRICS_PORT": "0",
+            "METRICS_MULTIPROC_DIR": os.path.join(self.log_dir, "metrics"),
+        })
+        self._spawn("api", [
+            sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(api_port),
+            "--workers", str(args.workers),
+        ], env)
+        self._spawn("worker", [sys.executable, "-m", "app.worker", "--processes", str(args.worker_processes)], env)
+        wait_healthy(self.url)
+        print(f"[Load] Stack up at {self.url}, logs in {self.log_dir}")
+
+    def stop(self):
+        for process in reversed(self.processes):
+            process.send_signal(signal.SIGTERM)
+        for process in self.processes:
+            try:
+                process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def latency_summary(latencies: list[float], errors: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post("/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def drive(url: str, args) -> tuple[dict, list[int]]:
+    """Opens calls at args.rate/s and sends their transcripts; returns endpoint stats and the ids to follow"""
+    total = int(args.rate * args.duration)
+    latencies = {"calls": [], "transcript": []}
+    errors = {"calls": 0, "transcript": 0}
+    start_failed = 0
+    tracked: list[int] = []
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits) as client:
+        headers = {"Authorization": f"Bearer {await login(client, args.username, args.password)}"}
+
+        async def timed(name: str, method: str, path: str, body: dict, **kwargs):
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body, **kwargs)
+            except httpx.HTTPError:
+                response = None
+            latencies[name].append((time.perf_counter() - started) * 1000)
+            if response is None or response.status_code >= 400:
+                errors[name] += 1
+                return None
+            return response.json()
+
+        async def one_call(n: int):
+            nonlocal start_failed
+            call = await timed("calls", "POST", "/calls", {
+                "phone_number": f"+7900{n:07d}",
+                "language": "ru",
+                "tts_provider": "openai",
+                "voice": "alloy",
+                "greeting_message": "Здравствуйте!",
+                "prompt": "Нагрузочный тест",
+                "funnel_goal": "Записать клиента на встречу",
+            }, headers=headers)
+            if call is None:
+                return
+            if not call.get("voximplant_call_id"):
+                start_failed += 1
+                return
+
+            await asyncio.sleep(args.talk_seconds)
+            transcript = get_mock_transcript()
+            if await timed("transcript", "POST", "/call-transcript", {
+                "call_id": call["call_id"],
+                "phone": call["phone_number"],
+                "duration_seconds": get_mock_duration(),
+                "transcript": transcript.split("\n\n"),
+                "raw_text": transcript,
+            }) is not None:
+                tracked.append(call["id"])
+
+        tasks = []
+        started = time.perf_counter()
+        # Open loop: calls arrive on schedule however slow the API answers
+        for n in range(total):
+            delay = started + n / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one_call(n)))
+        calls_elapsed = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "calls": latency_summary(latencies["calls"], errors["calls"], calls_elapsed),
+        "transcript": latency_summary(latencies["transcript"], errors["transcript"], elapsed),
+        "start_failed": start_failed,
+    }, tracked
+
+
+def follow_pipeline(call_ids: list[int], drain_timeout: float) -> dict:
+    """Waits for the calls to become COMPLETED/FAILED; seconds from creation to COMPLETED"""
+    deadline = time.monotonic() + drain_timeout
+    with SessionLocal() as db:
+        while call_ids and time.monotonic() < deadline:
+            pending = db.execute(
+                select(func.count()).select_from(Call).filter(Call.id.in_(call_ids), Call.status.notin_(FINAL))
+            ).scalar()
+            db.rollback()
+            if not pending:
+                break
+            time.sleep(1.0)
+
+        rows = db.execute(
+            select(Call.status, func.extract("epoch", Call.completed_at - Call.created_at)).filter(Call.id.in_(call_ids))
+        ).all() if call_ids else []
+
+    seconds = [float(elapsed) for status, elapsed in rows if status == CallStatus.COMPLETED and elapsed is not None]
+    failed = sum(1 for status, _ in rows if status == CallStatus.FAILED)
+    return {
+        "calls": len(call_ids),
+        "completed": len(seconds),
+        "failed": failed,
+        "unfinished": len(call_ids) - len(seconds) - failed,
+        "p50_s": percentile(seconds, 50),
+        "p95_s": percentile(seconds, 95),
+        "p99_s": percentile(seconds, 99),
+    }
+
+
+# Latency changes smaller than this are noise on a busy machine, whatever the ratio
+MIN_LATENCY_DELTA_MS = 10.0
+
+
+def regressions(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for endpoint in ("calls", "transcript"):
+        now, before = result[endpoint], baseline[endpoint]
+        if (now["p95_ms"] > before["p95_ms"] * (1 + tolerance)
+                and now["p95_ms"] - before["p95_ms"] > MIN_LATENCY_DELTA_MS):
+            found.append(f"{endpoint} p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+        if now["rps"] < before["rps"] * (1 - tolerance):
+            found.append(f"{endpoint} throughput {before['rps']:.1f} -> {now['rps']:.1f} req/s")
+        if now["errors"] / max(now["requests"], 1) > before["errors"] / max(before["requests"], 1) + 0.01:
+            found.append(f"{endpoint} errors {before['errors']} -> {now['errors']}")
+
+    now, before = result["pipeline"], baseline["pipeline"]
+    if before["p95_s"] and now["p95_s"] > before["p95_s"] * (1 + tolerance):
+        found.append(f"time to COMPLETED p95 {before['p95_s']:.1f} -> {now['p95_s']:.1f} s")
+    if now["completed"] / max(now["calls"], 1) < before["completed"] / max(before["calls"], 1) - 0.01:
+        found.append(f"completed {before['completed']}/{before['calls']} -> {now['completed']}/{now['calls']}")
+    return found
+
+
+def report(result: dict):
+    for endpoint, path in (("calls", "POST /calls"), ("transcript", "POST /call-transcript")):
+        stats = result[endpoint]
+        print(
+            f"{path}: {stats['requests']} requests, {stats['errors']} errors, {stats['rps']:.1f} req/s | "
+            f"p50 {stats['p50_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms, p99 {stats['p99_ms']:.1f} ms"
+        )
+    pipeline = result["pipeline"]
+    print(
+        f"Pipeline: {pipeline['completed']}/{pipeline['calls']} COMPLETED, {pipeline['failed']} FAILED, "
+        f"{pipeline['unfinished']} unfinished, {result['start_failed']} not started | time to COMPLETED "
+        f"p50 {pipeline['p50_s']:.1f} s, p95 {pipeline['p95_s']:.1f} s, p99 {pipeline['p99_s']:.1f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call pipeline load test with fake Voximplant and OpenAI")
+    parser.add_argument("--rate", type=float, default=10.0, help="new calls per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of new calls")
+    parser.add_argument("--talk-seconds", type=float, default=2.0, help="POST /calls -> transcript delay")
+    parser.add_argument("--drain-timeout", type=float, default=120.0)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1, help="API processes (app.server --workers)")
+    parser.add_argument("--worker-processes", type=int, default=1, help="app.worker --processes")
+    parser.add_argument("--voximplant-latency-ms", type=float, default=150)
+    parser.add_argument("--voximplant-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-latency-ms", type=float, default=800)
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--save", help="write the result as JSON")
+    parser.add_argument("--baseline", help="JSON of an earlier run: exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    stack = Stack(args)
+    try:
+        stack.start()
+        result, tracked = asyncio.run(drive(stack.url, args))
+        result["pipeline"] = follow_pipeline(tracked, args.drain_timeout)
+    finally:
+        stack.stop()
+    result["settings"] = {name: value for name, value in vars(args).items() if name not in ("password", "save", "baseline")}
+
+    report(result)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(result, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION: {line}")
+        if found:
+            sys.exit(1)
+        print(f"No regression against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+API throughput by worker count.
+
+Starts `python -m app.server --workers N` on a free local port for each N,
+runs the webhook_latency load against it and stops it with SIGTERM
+(graceful drain), then prints requests/s per worker count.
+
+    python benchmarks/server_scaling.py --workers 1 2 4
+    python benchmarks/server_scaling.py --workers 1 4 --endpoint transcript -c 100 -n 5000
+
+The load generator runs on the same machine: on a small box it competes with
+the server for CPU, so compare the scaling trend, not absolute numbers.
+Needs a migrated database (python -m app.core.schema) and the usual .env.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from webhook_latency import run
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_healthy(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become healthy")
+
+
+def benchmark(workers: int, endpoint: str, concurrency: int, total: int) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DIALER_ENABLED": "false"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_healthy(url)
+        # Warm-up: connection pools, caches, every worker process
+        asyncio.run(run(url, endpoint, concurrency, concurrency * 4))
+        result = asyncio.run(run(url, endpoint, concurrency, total))
+    finally:
+        started = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutdown_seconds = time.perf_counter() - started
+    return {**result, "shutdown_s": shutdown_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API requests/s by uvicorn worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--endpoint", choices=["config", "transcript"], default="config")
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("-n", "--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}, endpoint: {args.endpoint}")
+    baseline = None
+    for workers in args.workers:
+        result = benchmark(workers, args.endpoint, args.concurrency, args.requests)
+        baseline = baseline or result["rps"]
+        print(
+            f"workers {workers}: {result['rps']:.1f} req/s (x{result['rps'] / baseline:.2f}), "
+            f"{result['errors']} errors | p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms | "
+            f"SIGTERM -> exit {result['shutdown_s']:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Webhook latency benchmark.
+
+Fires concurrent requests at the Voximplant-facing webhooks of a running API
+and reports throughput and p50/p95/p99 latency.
+
+    python benchmarks/webhook_latency.py --url http://localhost:8000 --endpoint config
+    python benchmarks/webhook_latency.py --url http://localhost:8000 --endpoint transcript -c 50 -n 2000
+
+The transcript endpoint creates inbound calls and triggers analysis, so run it
+against a disposable database.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+from app.services.mock_transcript import get_mock_transcript, get_mock_duration
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_request(endpoint: str) -> tuple[str, str, dict | None]:
+    if endpoint == "config":
+        return "GET", "/inbound/webhook/config", None
+
+    transcript = get_mock_transcript()
+    return "POST", "/call-transcript", {
+        "call_id": str(uuid.uuid4()),
+        "phone": "+79000000000",
+        "duration_seconds": get_mock_duration(),
+        "transcript": transcript.split("\n\n"),
+        "raw_text": transcript,
+    }
+
+
+async def run(url: str, endpoint: str, concurrency: int, total: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(base_url=url, timeout=60.0) as client:
+        async def worker():
+            nonlocal errors
+            for _ in counter:
+                method, path, body = build_request(endpoint)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark webhook latency under concurrent load")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["config", "transcript"], default="config")
+    parser.add_argument("-c", "--concurrency", type=int, default=50)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.endpoint, args.concurrency, args.requests))
+    print(
+        f"{args.endpoint}: {result['requests']} requests, {result['errors']} errors, "
+        f"{result['rps']:.1f} req/s | mean {result['mean_ms']:.1f} ms, "
+        f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -39,7 +39,7 @@ export const callsAPI = {
   createCall: (data) => api.post('/calls', data),
   getCall: (id) => api.get(`/calls/${id}`),
   listCalls: () => api.get('/calls'),
-  getAnalytics: () => api.get('/analytics'),
+  getAnalytics: (params) => api.get('/analytics', { params }),
 };
 
 export const inboundAPI = {
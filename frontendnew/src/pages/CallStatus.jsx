@@ -60,6 +60,31 @@ const STATUS_ORDER = [
   'completed',
 ];
 
+// When the call entered each stage (see backend app/services/call_state.py)
+const STAGE_TIMESTAMPS = {
+  initiating: 'created_at',
+  calling: 'calling_at',
+  analyzing: 'analyzing_at',
+  preparing_followup: 'preparing_followup_at',
+  sending_sms: 'sending_sms_at',
+  adding_to_crm: 'adding_to_crm_at',
+  completed: 'completed_at',
+};
+
+// Furthest stage reached: by timestamps, or by the current status if it is ahead
+const reachedStageIndex = (call) => {
+  let index = STATUS_ORDER.indexOf(call?.status);
+  STATUS_ORDER.forEach((status, i) => {
+    if (call?.[STAGE_TIMESTAMPS[status]] && i > index) {
+      index = i;
+    }
+  });
+  return index;
+};
+
+const formatStageTime = (value) =>
+  value ? new Date(value).toLocaleTimeString('ru-RU') : null;
+
 export default function CallStatus() {
   const { callId } = useParams();
   const navigate = useNavigate();
@@ -69,6 +94,9 @@ export default function CallStatus() {
 
   useEffect(() => {
     let pollInterval;
+    let events;
+
+    const isFinal = (status) => status === 'completed' || status === 'failed';
 
     const fetchCallStatus = async () => {
       try {
@@ -76,7 +104,7 @@ export default function CallStatus() {
         setCall(response.data);
         setLoading(false);
 
-        if (response.data.status === 'completed' || response.data.status === 'failed') {
+        if (isFinal(response.data.status)) {
           if (pollInterval) {
             clearInterval(pollInterval);
           }
@@ -90,10 +118,39 @@ export default function CallStatus() {
       }
     };
 
+    // Fallback when the event stream is unavailable
+    const startPolling = () => {
+      if (!pollInterval) {
+        pollInterval = setInterval(fetchCallStatus, 2000);
+      }
+    };
+
     fetchCallStatus();
-    pollInterval = setInterval(fetchCallStatus, 2000);
+
+    if (window.EventSource) {
+      events = new EventSource(callsAPI.callEventsUrl(callId));
+      events.addEventListener('status', (e) => {
+        const event = JSON.parse(e.data);
+        if (!event.status) return;
+        setCall((prev) => (prev ? { ...prev, ...event } : prev));
+        if (isFinal(event.status)) {
+          events.close();
+          // Final status: load summary, follow-up etc.
+          fetchCallStatus();
+        }
+      });
+      events.onerror = () => {
+        events.close();
+        startPolling();
+      };
+    } else {
+      startPolling();
+    }
 
     return () => {
+      if (events) {
+        events.close();
+      }
       if (pollInterval) {
         clearInterval(pollInterval);
       }
@@ -130,7 +187,7 @@ export default function CallStatus() {
 
   const isCompleted = call?.status === 'completed';
   const isFailed = call?.status === 'failed';
-  const currentStatusIndex = STATUS_ORDER.indexOf(call?.status);
+  const currentStatusIndex = reachedStageIndex(call);
 
   return (
     <div className="max-w-2xl mx-auto animate-fadeIn">
@@ -153,8 +210,9 @@ export default function CallStatus() {
           {STATUS_ORDER.map((status, index) => {
             const config = STATUS_CONFIG[status];
             const Icon = config.icon;
-            const isCurrent = call?.status === status;
+            const isCurrent = currentStatusIndex === index;
             const isPast = currentStatusIndex > index;
+            const stageTime = formatStageTime(call?.[STAGE_TIMESTAMPS[status]]);
             const isFutureOrFailed = !isPast && !isCurrent;
 
             return (
@@ -191,9 +249,14 @@ export default function CallStatus() {
                   {config.message}
                 </span>
 
+                {/* Stage time */}
+                {(isPast || isCurrent) && stageTime && (
+                  <span className="text-xs text-gray-400 ml-auto">{stageTime}</span>
+                )}
+
                 {/* Current indicator */}
                 {isCurrent && !isCompleted && (
-                  <Loader2 className="w-4 h-4 text-blue-600 animate-spin ml-auto" />
+                  <Loader2 className={`w-4 h-4 text-blue-600 animate-spin ${stageTime ? '' : 'ml-auto'}`} />
                 )}
               </div>
             );
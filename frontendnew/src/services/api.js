@@ -39,7 +39,13 @@ export const callsAPI = {
   createCall: (data) => api.post('/calls', data),
   getCall: (id) => api.get(`/calls/${id}`),
   listCalls: () => api.get('/calls'),
-  getAnalytics: () => api.get('/analytics'),
+  // params: {q, mode: 'text' | 'substring', speaker: 'agent' | 'customer', cursor, limit}
+  searchCalls: (params) => api.get('/calls/search', { params }),
+  getCallTurns: (id) => api.get(`/calls/${id}/turns`),
+  getAnalytics: (params) => api.get('/analytics', { params }),
+  // Server-Sent Events with status changes of one call (EventSource cannot send headers)
+  callEventsUrl: (id) =>
+    `${API_BASE_URL}/api/calls/events?call_id=${id}&token=${encodeURIComponent(localStorage.getItem('access_token') || '')}`,
 };
 
 export const inboundAPI = {
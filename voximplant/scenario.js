@@ -8,6 +8,20 @@ var transcript = []  // Транскрипция
 
 var callStartTimestamp = null;
 
+// Реплика транскрипции: кто, что и через сколько секунд от начала звонка
+function pushTranscriptTurn(speaker, text) {
+    transcript.push({
+        speaker: speaker,
+        text: text,
+        offset: callStartTimestamp ? (Date.now() - callStartTimestamp) / 1000 : null
+    });
+}
+
+// Транскрипция одним текстом ("Агент: ...\nПользователь: ...") для raw_text
+function transcriptText() {
+    return transcript.map(function(turn) { return turn.speaker + ": " + turn.text; }).join("\n");
+}
+
 // ===============================
 // OPEN AI CUSTOM VARIABLES 
 // ===============================
@@ -41,6 +55,57 @@ VoxEngine.addEventListener(AppEvents.Started, function(e) {
         return;
     }
 
+    webhookUrl = data.webhook_url || null;
+
+    // Бэкенд передаёт только {call_id, token, webhook_url}: промпт, голос и ключи забираем одним запросом
+    if (data.token) {
+        fetchCallContext(data.call_id, data.token);
+    } else {
+        startCall(data);
+    }
+});
+
+// Базовый URL бэкенда из webhook_url (".../api/call-transcript" или просто адрес сервера)
+function backendBaseUrl() {
+    var index = webhookUrl.indexOf('/api/call-transcript');
+    return index === -1 ? webhookUrl : webhookUrl.substring(0, index);
+}
+
+function fetchCallContext(contextCallId, token) {
+    if (!webhookUrl) {
+        Logger.write("[ERROR] webhook_url не указан — контекст звонка получить неоткуда");
+        VoxEngine.terminate();
+        return;
+    }
+
+    var contextUrl = backendBaseUrl() + '/api/call-context/' + encodeURIComponent(contextCallId);
+    Logger.write("[CONTEXT] Fetching " + contextUrl);
+
+    Net.httpRequestAsync(contextUrl, {
+        method: "GET",
+        headers: {"X-Call-Token": token}
+    }).then(function(response) {
+        if (response.code !== 200) {
+            Logger.write("[CONTEXT ERROR] Status " + response.code + ": " + response.text);
+            VoxEngine.terminate();
+            return;
+        }
+        var context;
+        try {
+            context = JSON.parse(response.text);
+        } catch (err) {
+            Logger.write("[CONTEXT ERROR] Failed to parse context: " + err);
+            VoxEngine.terminate();
+            return;
+        }
+        startCall(context);
+    }).catch(function(err) {
+        Logger.write("[CONTEXT ERROR] " + err);
+        VoxEngine.terminate();
+    });
+}
+
+function startCall(data) {
     callId = data.call_id;
     ttsProvider = data.tts_provider;
     targetPhone = data.phone;
@@ -50,7 +115,6 @@ VoxEngine.addEventListener(AppEvents.Started, function(e) {
     greetingMessage = data.greeting_message || "Hello, I am AI assistant HALO"
     systemPrompt = data.prompt || "You are a helpful AI assistant.";
     funnelGoal = data.funnel_goal || "Провести разговор с клиентом";
-    webhookUrl = data.webhook_url || null;
     openaiApiKey = data.openai_api_key;
     elevenlabsApiKey = data.elevenlabs_api_key;
     elevenLabsAgentId = data.elevenlabs_agent_id;
@@ -105,7 +169,7 @@ VoxEngine.addEventListener(AppEvents.Started, function(e) {
         call.addEventListener(CallEvents.Disconnected, onCallDisconnectedQwen);
         call.addEventListener(CallEvents.Failed, onCallFailedQwen);
     }
-});
+}
 
 // ===============================
 // 📞 Обработчики звонка OpenAI 
@@ -134,12 +198,7 @@ function onCallConnectedOpenAI() {
         // ===============================
         function addToTranscript(role, text) {
             if (text && text.trim()) {
-                // transcript.push({
-                //     role: role,          // "user" или "assistant"
-                //     text: text.trim(),
-                //     timestamp: new Date().toISOString()
-                // });
-                transcript.push(`${role}: ${text}`)
+                pushTranscriptTurn(role, text.trim());
                 Logger.write("[TRANSCRIPT] " + role + ": " + text.trim());
             }
         }
@@ -324,7 +383,7 @@ function onCallDisconnectedOpenAI() {
     Logger.write("[CALL DURATION] " + callDurationSeconds + " seconds");
 
     // Формируем финальную транскрипцию
-    var fullTranscript = transcript;
+    var fullTranscript = transcriptText();
     
     Logger.write("[FULL TRANSCRIPT]\n" + (fullTranscript || "(empty)"));
 
@@ -431,13 +490,13 @@ async function onCallConnectedElevenLabs() {
       conversationalAIClient.addEventListener(ElevenLabs.ConversationalAIEvents.Ping, logEvent("Ping"));
       conversationalAIClient.addEventListener(ElevenLabs.ConversationalAIEvents.UserTranscript, (evt) => {
         const text = evt.data.payload.user_transcription_event.user_transcript;
-        transcript.push(`Пользователь: ${text}`);
+        pushTranscriptTurn("Пользователь", text);
         Logger.write(`Пользователь: ${text}`);
       });
 
       conversationalAIClient.addEventListener(ElevenLabs.ConversationalAIEvents.AgentResponse, (evt) => {
         const text = evt.data.payload.agent_response_event.agent_response;
-        transcript.push(`Агент: ${text}`);
+        pushTranscriptTurn("Агент", text);
         Logger.write(`Агент: ${text}`);
       });
       conversationalAIClient.addEventListener(ElevenLabs.ConversationalAIEvents.AgentResponseCorrection, logEvent("AgentResponseCorrection"));
@@ -460,7 +519,7 @@ async function onCallConnectedElevenLabs() {
 }
 
 function onCallDisconnectedElevenLabs() {
-    Logger.write("transcript:\n" + transcript.join("\n"));
+    Logger.write("transcript:\n" + transcriptText());
     if (conversationalAIClient) {
       conversationalAIClient.close();
       conversationalAIClient = null;
@@ -476,7 +535,7 @@ function onCallDisconnectedElevenLabs() {
     Logger.write("[CALL DURATION] " + callDurationSeconds + " seconds");
 
     // Формируем финальную транскрипцию
-    var fullTranscript = transcript
+    var fullTranscript = transcriptText();
     
     Logger.write("[FULL TRANSCRIPT]\n" + (fullTranscript || "(empty)"));
 
@@ -542,7 +601,7 @@ async function onCallConnectedYandex () {
 
     function addToTranscript(role, text) {
         if (text && text.trim()) {
-            transcript.push(`${role}: ${text.trim()}`);
+            pushTranscriptTurn(role, text.trim());
             Logger.write("[TRANSCRIPT] " + role + ": " + text.trim());
         }
     }
@@ -717,7 +776,7 @@ function onCallDisconnectedYandex () {
     Logger.write("[CALL DURATION] " + callDurationSeconds + " seconds");
 
     // Формируем финальную транскрипцию
-    var fullTranscript = transcript
+    var fullTranscript = transcriptText();
     
     Logger.write("[FULL TRANSCRIPT]\n" + (fullTranscript || "(empty)"));
 
@@ -776,7 +835,7 @@ async function onCallConnectedQwen() {
 
     function addToTranscript(role, text) {
         if (text && text.trim()) {
-            transcript.push(`${role}: ${text.trim()}`);
+            pushTranscriptTurn(role, text.trim());
             Logger.write("[TRANSCRIPT] " + role + ": " + text.trim());
         }
     }
@@ -909,7 +968,7 @@ function onCallDisconnectedQwen() {
     }
 
     Logger.write("[CALL DURATION] " + callDurationSeconds + " seconds");
-    Logger.write("[FULL TRANSCRIPT]\n" + (transcript.join("\n") || "(empty)"));
+    Logger.write("[FULL TRANSCRIPT]\n" + (transcriptText() || "(empty)"));
 
     // Отправляем на webhook
     if (webhookUrl) {
@@ -928,7 +987,7 @@ function onCallDisconnectedQwen() {
                 phone: targetPhone,
                 duration_seconds: callDurationSeconds,
                 transcript: transcript,
-                raw_text: transcript
+                raw_text: transcriptText()
             })
         }).then(function(response) {
             Logger.write("[WEBHOOK] Sent. Status: " + response.code);